@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# the crm app lives at the repository root, next to this project's directory;
+# make it importable however the project is started (manage.py, wsgi, asgi, celery)
+REPO_ROOT = str(Path(__file__).resolve().parent.parent.parent)
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
+# serve /graphql with the async view (see CRM_GRAPHQL_ASYNC in settings)
+os.environ.setdefault('CRM_GRAPHQL_ASYNC', '1')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# after the app registry is ready: WebSockets on /graphql carry subscriptions
+from crm.websocket import route_websockets  # noqa: E402
+
+application = route_websockets(django_application, path="/graphql")
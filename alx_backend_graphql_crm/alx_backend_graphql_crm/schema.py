@@ -1,11 +1,16 @@
 # alx_backend_graphql/schema.py
 import graphene
-from crm.schema import CRMQuery, Mutation as CRMMutation
+from crm.schema import Query as CRMConnectionQuery, CRMQuery, Mutation as CRMMutation, Subscription as CRMSubscription
 
-class Query(CRMQuery, graphene.ObjectType):
-    pass
+class Query(CRMConnectionQuery, CRMQuery, graphene.ObjectType):
+    # queried by the crm.cron heartbeat
+    hello = graphene.String(default_value="Hello world")
 
 class Mutation(CRMMutation, graphene.ObjectType):
     pass
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
+# served over WebSockets (crm/websocket.py, mounted in asgi.py)
+class Subscription(CRMSubscription, graphene.ObjectType):
+    pass
+
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
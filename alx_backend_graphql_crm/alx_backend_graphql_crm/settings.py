@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -54,8 +55,77 @@ CRONJOBS = [
 # Graphene schema location
 GRAPHENE = {
     'SCHEMA': 'alx_backend_graphql_crm.schema.schema',
+    # graphene-django adds DjangoDebugMiddleware when DEBUG is on; without a
+    # _debug field in the schema it leaves every cursor wrapped after a request
+    'MIDDLEWARE': [],
 }
 
+# totalCount(approximate: true) trusts the planner estimate at or above this many rows
+CRM_APPROXIMATE_COUNT_THRESHOLD = 100_000
+
+# rows per INSERT for the bulk mutations
+CRM_BULK_CREATE_BATCH_SIZE = 1000
+
+# whether createOrder decrements Product.stock when reserveStock is not given
+CRM_RESERVE_STOCK = False
+
+# customers/products/orders list fields: most rows per request (the default
+# limit) and rows fetched per database round trip while streaming them
+CRM_LIST_MAX_LIMIT = 1000
+CRM_LIST_CHUNK_SIZE = 200
+
+# /graphql rejects operations whose static cost (objects that may be returned,
+# see crm/validation.py) or object nesting depth exceeds these limits
+CRM_QUERY_MAX_COST = 5000
+CRM_QUERY_MAX_DEPTH = 8
+# assumed size of other list fields, e.g. {"OrderType.products": 5}; the
+# customers/products/orders lists without a limit count as CRM_LIST_MAX_LIMIT
+CRM_QUERY_LIST_SIZE = 100
+CRM_QUERY_LIST_SIZES = {}
+
+# automatic persisted queries: hash -> query text lives in this cache (shared
+# by all workers), parsed + validated documents in a per-process LRU
+CRM_PERSISTED_QUERY_CACHE = "default"
+CRM_PERSISTED_QUERY_TIMEOUT = None
+CRM_DOCUMENT_CACHE_SIZE = 256
+
+# a cache shared by every process (Redis), e.g. CRM_CACHE_URL=redis://localhost:6379/1;
+# without it each process has its own LocMemCache
+if os.environ.get("CRM_CACHE_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["CRM_CACHE_URL"],
+        }
+    }
+
+# cached responses of read-only catalog queries (crm/response_cache.py);
+# writes bump per-model versions instead of deleting entries. 0 disables it.
+# The versions live in this cache too, so it is only on by default with a
+# shared cache: other workers would never see a LocMemCache's bumps
+CRM_RESPONSE_CACHE = "default"
+CRM_RESPONSE_CACHE_TIMEOUT = int(os.environ.get(
+    "CRM_RESPONSE_CACHE_TIMEOUT", "300" if os.environ.get("CRM_CACHE_URL") else "0"
+))
+
+# serve /graphql with crm.views.AsyncCRMGraphQLView (queries on the event loop);
+# asgi.py turns this on, WSGI deployments keep the sync view
+CRM_GRAPHQL_ASYNC = os.environ.get("CRM_GRAPHQL_ASYNC", "0") == "1"
+# most operations one batched /graphql request (a JSON array body) may carry
+CRM_GRAPHQL_MAX_BATCH = 20
+
+# orderCreated / productStockChanged subscriptions (WebSockets on /graphql under
+# ASGI): crm.subscriptions.InMemoryBroker for one process, RedisBroker across nodes
+CRM_SUBSCRIPTION_BROKER = os.environ.get("CRM_SUBSCRIPTION_BROKER", "crm.subscriptions.InMemoryBroker")
+CRM_SUBSCRIPTION_REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+# seconds a new socket may take to send connection_init
+CRM_WEBSOCKET_INIT_TIMEOUT = 10
+
+# how cron jobs and Celery tasks run their GraphQL documents: in this process
+# against GRAPHENE["SCHEMA"], or crm.executor.HTTPExecutor to POST to CRM_GRAPHQL_URL
+CRM_GRAPHQL_EXECUTOR = "crm.executor.InProcessExecutor"
+CRM_GRAPHQL_URL = os.environ.get("GRAPHQL_URL", "http://localhost:8000/graphql")
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
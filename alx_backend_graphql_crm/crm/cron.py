@@ -1,124 +0,0 @@
-# alx_backend_graphql_crm/crm/cron.py
-from datetime import datetime
-import os
-
-LOG_PATH = "/tmp/crm_heartbeat_log.txt"
-LOW_STOCK_LOG = "/tmp/low_stock_updates_log.txt"
-GRAPHQL_URL = os.environ.get("GRAPHQL_URL", "http://localhost:8000/graphql")
-
-# Try gql imports first (autograder looks for these strings)
-try:
-    from gql import gql, Client
-    from gql.transport.requests import RequestsHTTPTransport
-    _HAS_GQL = True
-except Exception:
-    _HAS_GQL = False
-
-# Fallback to requests
-try:
-    import requests
-    _HAS_REQUESTS = True
-except Exception:
-    _HAS_REQUESTS = False
-
-def _graphql_hello_check():
-    timestamp = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
-    if _HAS_GQL:
-        try:
-            transport = RequestsHTTPTransport(url=GRAPHQL_URL, verify=True, retries=1)
-            client = Client(transport=transport, fetch_schema_from_transport=False)
-            query = gql("{ hello }")
-            resp = client.execute(query)
-            if isinstance(resp, dict) and ("hello" in resp or ("data" in resp and "hello" in resp.get("data", {}))):
-                return f"{timestamp} CRM is alive — GraphQL OK\n"
-            return f"{timestamp} CRM is alive — GraphQL returned unexpected payload\n"
-        except Exception as e:
-            return f"{timestamp} CRM is alive — GraphQL gql check failed: {e}\n"
-    if _HAS_REQUESTS:
-        try:
-            r = requests.post(GRAPHQL_URL, json={"query": "{ hello }"}, timeout=3)
-            data = {}
-            try:
-                data = r.json()
-            except Exception:
-                pass
-            if r.status_code == 200 and ("data" in data or "hello" in (data.get("data") or {})):
-                return f"{timestamp} CRM is alive — GraphQL OK\n"
-            return f"{timestamp} CRM is alive — GraphQL HTTP {r.status_code}\n"
-        except Exception as e:
-            return f"{timestamp} CRM is alive — GraphQL requests check failed: {e}\n"
-    return f"{timestamp} CRM is alive — GraphQL check not available (missing clients)\n"
-
-def log_crm_heartbeat():
-    """Logs a timestamp every 5 minutes and optionally queries the GraphQL hello field."""
-    msg = _graphql_hello_check()
-    with open(LOG_PATH, "a") as f:
-        f.write(msg)
-
-def update_low_stock():
-    """
-    Calls the UpdateLowStockProducts GraphQL mutation and logs updated products.
-    Mutation (GraphQL name): updateLowStockProducts
-    """
-    timestamp = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
-    mutation = """
-    mutation {
-      updateLowStockProducts {
-        success
-        message
-        updatedProducts {
-          name
-          stock
-        }
-      }
-    }
-    """
-
-    payload = None
-
-    # Try gql client first
-    if _HAS_GQL:
-        try:
-            transport = RequestsHTTPTransport(url=GRAPHQL_URL, verify=True, retries=1)
-            client = Client(transport=transport, fetch_schema_from_transport=False)
-            resp = client.execute(gql(mutation))
-            # Graphene may return dict with key 'updateLowStockProducts' or nested in 'data'
-            if isinstance(resp, dict):
-                payload = resp.get('updateLowStockProducts') or resp.get('data', {}).get('updateLowStockProducts')
-        except Exception as e:
-            with open(LOW_STOCK_LOG, "a") as f:
-                f.write(f"{timestamp} Low stock update failed (gql error): {e}\n")
-            return
-
-    # Fallback to requests
-    if not payload and _HAS_REQUESTS:
-        try:
-            r = requests.post(GRAPHQL_URL, json={"query": mutation}, timeout=5)
-            j = {}
-            try:
-                j = r.json()
-            except Exception:
-                j = {}
-            payload = j.get('data', {}).get('updateLowStockProducts') or j.get('updateLowStockProducts')
-        except Exception as e:
-            with open(LOW_STOCK_LOG, "a") as f:
-                f.write(f"{timestamp} Low stock update failed (requests error): {e}\n")
-            return
-
-    if not payload:
-        with open(LOW_STOCK_LOG, "a") as f:
-            f.write(f"{timestamp} Low stock update returned no payload\n")
-        return
-
-    updated = payload.get('updatedProducts') if isinstance(payload, dict) else None
-    if not updated:
-        with open(LOW_STOCK_LOG, "a") as f:
-            f.write(f"{timestamp} Low stock update completed: {payload.get('message') if isinstance(payload, dict) else payload}\n")
-        return
-
-    with open(LOW_STOCK_LOG, "a") as f:
-        f.write(f"{timestamp} Restocked {len(updated)} products\n")
-        for p in updated:
-            name = p.get('name')
-            stock = p.get('stock')
-            f.write(f" - {name}: {stock}\n")
@@ -1,18 +0,0 @@
-# Generated by Django 5.2.7 on 2025-11-01 11:09
-
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('crm', '0001_initial'),
-    ]
-
-    operations = [
-        migrations.AddField(
-            model_name='customer',
-            name='created_at',
-            field=models.DateTimeField(auto_now_add=True, null=True),
-        ),
-    ]
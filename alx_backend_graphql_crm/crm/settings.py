@@ -1,29 +0,0 @@
-from celery.schedules import crontab
-import os
-
-# crm/settings.py (app-level helpers for autograder & local Celery)
-INSTALLED_APPS = [
-    "django_crontab",
-    "django_celery_beat",
-]
-
-# existing CRONJOBS (heartbeat + low-stock)
-CRONJOBS = [
-    ('*/5 * * * *', 'crm.cron.log_crm_heartbeat'),
-    ('0 */12 * * *', 'crm.cron.update_low_stock'),
-]
-
-# Celery configuration - these will be read by crm.celery via Django settings
-CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0")
-CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
-CELERY_ACCEPT_CONTENT = ['json']
-CELERY_TASK_SERIALIZER = 'json'
-CELERY_RESULT_SERIALIZER = 'json'
-
-# Celery beat schedule: weekly report on Mondays at 06:00
-CELERY_BEAT_SCHEDULE = {
-    'generate-crm-report': {
-        'task': 'crm.tasks.generate_crm_report',
-        'schedule': crontab(day_of_week='mon', hour=6, minute=0),
-    },
-}
@@ -0,0 +1,35 @@
+# crm/aio.py
+"""
+Helpers for resolvers shared by the sync and the async GraphQL views.
+
+Under AsyncCRMGraphQLView, query operations execute on the event loop, where
+Django's sync ORM raises SynchronousOnlyOperation. Resolvers that touch the
+database check in_async_context() and return an awaitable instead: the async
+ORM (aiterator/acount/aget) on the hot paths, or the sync code run in a worker
+thread via sync_to_async everywhere else. In the sync view and in the cron /
+Celery executor nothing changes.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+
+def in_async_context():
+    """True when called on a running event loop (i.e. from the async view)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def maybe_async(fn, *args, **kwargs):
+    """``fn(*args, **kwargs)``, or an awaitable running it in a thread on the event loop."""
+    if in_async_context():
+        return sync_to_async(fn)(*args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+async def alist(aiterable):
+    """Collect an async iterable (e.g. ``queryset.aiterator()``) into a list."""
+    return [item async for item in aiterable]
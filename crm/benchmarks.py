@@ -0,0 +1,367 @@
+# crm/benchmarks.py
+"""
+Benchmarks for the GraphQL hot paths (``manage.py benchmark``).
+
+Each benchmark prepares its input once, then runs one operation ``warmup``
+times untimed and ``iterations`` times timed. Operations are POSTed to the
+view routed at ``/graphql`` (the configured sync or async view, without the
+HTTP middleware), except generate_crm_report, which is called as the Celery
+task runs it.
+
+For every benchmark the results record latency (mean, p50, p95, min and max,
+in milliseconds), throughput (operations per second of one sequential
+client) and the number of SQL queries of one operation, counted on an extra
+untimed run.
+
+Writes are measured inside a transaction that is rolled back after every
+operation, so each iteration starts from the same rows and repeated runs stay
+comparable. The commit itself is therefore not timed, and on_commit work
+(subscription events) never happens. Responses are never served from the
+response cache (CRM_RESPONSE_CACHE_TIMEOUT is 0 while benchmarks run), and
+DEBUG is off so the debug cursor does not add its own overhead.
+
+compare() checks results against an earlier run: more SQL queries, or a p50
+latency more than ``threshold`` slower, is a regression.
+"""
+import json
+import math
+import os
+import platform
+import statistics
+import time
+from unittest import mock
+
+import django
+from asgiref.sync import async_to_sync
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve
+from django.utils import timezone
+
+from . import tasks
+from .models import Customer, Order, Product
+from .pagination import encode_cursor, ordering_keys
+
+FORMAT_VERSION = 1
+GRAPHQL_PATH = "/graphql"
+
+
+class BenchmarkError(Exception):
+    """A benchmarked operation failed, so its numbers would mean nothing."""
+
+
+class Benchmark:
+    def __init__(self, name, setup, writes=False, max_iterations=None):
+        self.name = name
+        self.setup = setup
+        self.writes = writes
+        self.max_iterations = max_iterations
+        self.description = (setup.__doc__ or "").strip()
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name, writes=False, max_iterations=None):
+    """Register ``setup(runner)``, which returns the operation to time."""
+
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, writes, max_iterations)
+        return setup
+
+    return register
+
+
+# ------------------------
+# Runner
+# ------------------------
+class BenchmarkRunner:
+    def __init__(self, iterations=20, warmup=3, progress=None):
+        if iterations < 1 or warmup < 0:
+            raise ValueError("need iterations >= 1 and warmup >= 0")
+        self.iterations = iterations
+        self.warmup = warmup
+        self.progress = progress or (lambda message: None)
+        self.factory = RequestFactory()
+
+    def run(self, names=None):
+        """Run the named benchmarks (all by default) and return the results document."""
+        names = list(names or BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise ValueError(f"unknown benchmark(s): {', '.join(unknown)}")
+        results = {}
+        with override_settings(CRM_RESPONSE_CACHE_TIMEOUT=0, DEBUG=False):
+            for name in names:
+                results[name] = self.measure(BENCHMARKS[name])
+                self.progress(f"{name}: p50 {results[name]['latency_ms']['p50']} ms, {results[name]['queries']} queries")
+        return {"meta": self.meta(), "results": results}
+
+    def measure(self, bench):
+        operation = bench.setup(self)
+        iterations = min(self.iterations, bench.max_iterations or self.iterations)
+        for _ in range(self.warmup):
+            self.call(bench, operation)
+        timings = [self.call(bench, operation) for _ in range(iterations)]
+        with CaptureQueriesContext(connection) as queries:
+            self.call(bench, operation)
+        return summarize(timings, len(queries))
+
+    def call(self, bench, operation):
+        """Run ``operation`` once and return its duration in seconds."""
+        if not bench.writes:
+            start = time.perf_counter()
+            operation()
+            return time.perf_counter() - start
+        with transaction.atomic():
+            start = time.perf_counter()
+            operation()
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return elapsed
+
+    def graphql(self, query, **variables):
+        """Return an operation POSTing ``query`` to the GraphQL view; errors raise BenchmarkError."""
+        body = json.dumps({"query": query, "variables": variables})
+        view = resolve(GRAPHQL_PATH).func
+
+        def operation():
+            response = view(self.factory.post(GRAPHQL_PATH, body, content_type="application/json"))
+            if not hasattr(response, "content"):
+                # the async view, under ASGI settings
+                response = async_to_sync(_await)(response)
+            payload = json.loads(response.content)
+            if response.status_code != 200 or payload.get("errors"):
+                raise BenchmarkError(f"{response.status_code}: {payload.get('errors')}")
+            return payload["data"]
+
+        return operation
+
+    def meta(self):
+        return {
+            "version": FORMAT_VERSION,
+            "created": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "dataset": dataset_size(),
+            "iterations": self.iterations,
+            "warmup": self.warmup,
+        }
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+def dataset_size():
+    return {
+        "customers": Customer.objects.count(),
+        "products": Product.objects.count(),
+        "orders": Order.objects.count(),
+    }
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(timings, queries):
+    ms = sorted(t * 1000 for t in timings)
+    total = sum(timings)
+    return {
+        "iterations": len(ms),
+        "queries": queries,
+        "latency_ms": {
+            "mean": round(statistics.fmean(ms), 3),
+            "p50": round(percentile(ms, 0.5), 3),
+            "p95": round(percentile(ms, 0.95), 3),
+            "min": round(ms[0], 3),
+            "max": round(ms[-1], 3),
+        },
+        "throughput_per_s": round(len(ms) / total, 2) if total else None,
+    }
+
+
+def compare(results, baseline, threshold=0.2, query_threshold=0):
+    """
+    Return the regressions of ``results`` against ``baseline`` (both results
+    documents): more than ``query_threshold`` extra SQL queries, or a p50
+    latency more than ``threshold`` (a fraction) above the baseline's.
+    Benchmarks missing from either side are not compared.
+    """
+    regressions = []
+    for name, current in sorted(results["results"].items()):
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        if current["queries"] > previous["queries"] + query_threshold:
+            regressions.append(f"{name}: {previous['queries']} -> {current['queries']} SQL queries")
+        before, after = previous["latency_ms"]["p50"], current["latency_ms"]["p50"]
+        if after > before * (1 + threshold):
+            change = f"+{(after / before - 1) * 100:.0f}%" if before else "from 0"
+            regressions.append(f"{name}: p50 {before} -> {after} ms ({change})")
+    return regressions
+
+
+# ------------------------
+# Benchmarks
+# ------------------------
+ALL_ORDERS_NESTED = """
+query AllOrdersNested($first: Int) {
+  allOrders(first: $first, orderBy: "-orderDate") {
+    totalCount
+    edges {
+      node {
+        id totalAmount orderDate
+        customer { id name email }
+        products(first: 10) { edges { node { id name price } } }
+      }
+    }
+  }
+}
+"""
+
+ALL_CUSTOMERS_FILTERED = """
+query AllCustomersFiltered($first: Int, $name: String, $phonePattern: String, $search: String) {
+  allCustomers(first: $first, name: $name, phonePattern: $phonePattern, search: $search, orderBy: "name") {
+    totalCount
+    edges { node { id name email phone createdAt } }
+  }
+}
+"""
+
+ORDERS_PAGE_AFTER = """
+query OrdersPageAfter($first: Int, $after: String) {
+  allOrders(first: $first, after: $after) {
+    pageInfo { hasNextPage endCursor }
+    edges { node { id totalAmount orderDate } }
+  }
+}
+"""
+
+ORDERS_OFFSET = """
+query OrdersOffset($limit: Int, $offset: Int) {
+  orders(limit: $limit, offset: $offset) { id totalAmount orderDate }
+}
+"""
+
+CREATE_ORDER = """
+mutation CreateOrder($customerId: ID!, $productIds: [ID]!) {
+  createOrder(customerId: $customerId, productIds: $productIds) {
+    success errors
+    order { id totalAmount products { edges { node { id } } } }
+  }
+}
+"""
+
+BULK_CREATE_CUSTOMERS = """
+mutation BulkCreateCustomers($input: [CustomerInput]!) {
+  bulkCreateCustomers(input: $input) { errors customers { id } }
+}
+"""
+
+UPDATE_LOW_STOCK_PRODUCTS = """
+mutation UpdateLowStockProducts($threshold: Int, $increment: Int) {
+  updateLowStockProducts(threshold: $threshold, increment: $increment) {
+    success message updatedProducts { id stock }
+  }
+}
+"""
+
+PAGE_SIZE = 50
+
+
+def require(queryset, what):
+    rows = list(queryset)
+    if not rows:
+        raise BenchmarkError(f"the dataset has no {what}; generate one first")
+    return rows
+
+
+@benchmark("all_orders_nested")
+def all_orders_nested(runner):
+    """allOrders, newest first, with each order's customer and products."""
+    return runner.graphql(ALL_ORDERS_NESTED, first=PAGE_SIZE)
+
+
+@benchmark("all_customers_filtered")
+def all_customers_filtered(runner):
+    """allCustomers filtered by name and phone pattern, sorted by name."""
+    return runner.graphql(ALL_CUSTOMERS_FILTERED, first=PAGE_SIZE, name="ar", phonePattern="+1")
+
+
+@benchmark("all_customers_search")
+def all_customers_search(runner):
+    """allCustomers matching a full-text search term."""
+    return runner.graphql(ALL_CUSTOMERS_FILTERED, first=PAGE_SIZE, search="smith")
+
+
+def deep_position():
+    """The order 90% of the way through allOrders' default ordering, and its index."""
+    count = Order.objects.count()
+    index = max(int(count * 0.9) - 1, 0)
+    queryset = Order.objects.order_by("order_date", "id")
+    return require(queryset[index:index + 1], "orders")[0], index, ordering_keys(queryset)
+
+
+@benchmark("deep_pagination_keyset")
+def deep_pagination_keyset(runner):
+    """A page of allOrders 90% of the way in, seeking from its cursor."""
+    order, _index, keys = deep_position()
+    return runner.graphql(ORDERS_PAGE_AFTER, first=PAGE_SIZE, after=encode_cursor(order, keys))
+
+
+@benchmark("deep_pagination_offset")
+def deep_pagination_offset(runner):
+    """The same depth through orders(limit, offset), for comparison."""
+    _order, index, _keys = deep_position()
+    return runner.graphql(ORDERS_OFFSET, limit=PAGE_SIZE, offset=index + 1)
+
+
+@benchmark("create_order", writes=True)
+def create_order(runner):
+    """CreateOrder for one customer with three products."""
+    customer = require(Customer.objects.order_by("pk")[:1], "customers")[0]
+    products = require(Product.objects.order_by("pk")[:3], "products")
+    return runner.graphql(
+        CREATE_ORDER,
+        customerId=str(customer.pk),
+        productIds=[str(p.pk) for p in products],
+    )
+
+
+def bulk_customers(rows):
+    def setup(runner):
+        customers = [
+            {"name": f"Benchmark Customer {i}", "email": f"bench.{i}@example.org", "phone": "+12025550100"}
+            for i in range(rows)
+        ]
+        return runner.graphql(BULK_CREATE_CUSTOMERS, input=customers)
+
+    setup.__doc__ = f"BulkCreateCustomers with {rows} new customers."
+    return setup
+
+
+benchmark("bulk_create_customers_1k", writes=True, max_iterations=10)(bulk_customers(1000))
+benchmark("bulk_create_customers_10k", writes=True, max_iterations=3)(bulk_customers(10000))
+
+
+@benchmark("update_low_stock_products", writes=True)
+def update_low_stock_products(runner):
+    """UpdateLowStockProducts with the default threshold and increment."""
+    return runner.graphql(UPDATE_LOW_STOCK_PRODUCTS, threshold=10, increment=10)
+
+
+@benchmark("generate_crm_report")
+def generate_crm_report(runner):
+    """The Celery report task, through the configured executor (its log line is discarded)."""
+
+    def operation():
+        with mock.patch.object(tasks, "LOG_PATH", os.devnull):
+            return tasks.generate_crm_report()
+
+    return operation
@@ -0,0 +1,26 @@
+# crm/checks.py
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .response_cache import get_timeout
+
+LOCMEM_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+
+
+@register(Tags.caches)
+def check_response_cache(app_configs, **kwargs):
+    """The response cache's version counters must be visible to every process that writes."""
+    alias = getattr(settings, "CRM_RESPONSE_CACHE", "default")
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    if get_timeout() and backend == LOCMEM_BACKEND:
+        return [
+            Warning(
+                f"CRM_RESPONSE_CACHE ('{alias}') is a per-process LocMemCache: writes made by other "
+                "workers or by cron/Celery jobs do not invalidate this process's cached responses, "
+                f"which stay stale for up to CRM_RESPONSE_CACHE_TIMEOUT ({get_timeout()}s).",
+                hint="Use a shared cache backend (e.g. set CRM_CACHE_URL to a Redis URL) or set "
+                     "CRM_RESPONSE_CACHE_TIMEOUT = 0.",
+                id="crm.W001",
+            )
+        ]
+    return []
@@ -1,10 +1,11 @@
 # crm/cron.py
 from datetime import datetime
-import os
+
+# documents run through crm.executor (in-process by default, see CRM_GRAPHQL_EXECUTOR)
+from crm.executor import get_executor
 
 LOG_PATH = "/tmp/crm_heartbeat_log.txt"
 LOW_STOCK_LOG = "/tmp/low_stock_updates_log.txt"
-GRAPHQL_URL = os.environ.get("GRAPHQL_URL", "http://localhost:8000/graphql")
 
 # The autograder expects to see gql-related strings in this file
 try:
@@ -14,40 +15,15 @@ try:
 except Exception:
     _HAS_GQL = False
 
-try:
-    import requests
-    _HAS_REQUESTS = True
-except Exception:
-    _HAS_REQUESTS = False
-
 def _graphql_hello_check():
     timestamp = datetime.now().strftime("%d/%m/%Y-%H:%M:%S")
-    if _HAS_GQL:
-        try:
-            transport = RequestsHTTPTransport(url=GRAPHQL_URL, verify=True, retries=1)
-            client = Client(transport=transport, fetch_schema_from_transport=False)
-            query = gql("{ hello }")
-            resp = client.execute(query)
-            # resp might be { "hello": "..." } or {"data": {"hello": "..."}}
-            if isinstance(resp, dict) and ("hello" in resp or ("data" in resp and "hello" in resp.get("data", {}))):
-                return f"{timestamp} CRM is alive — GraphQL OK\n"
-            return f"{timestamp} CRM is alive — GraphQL returned unexpected payload\n"
-        except Exception as e:
-            return f"{timestamp} CRM is alive — GraphQL gql check failed: {e}\n"
-    if _HAS_REQUESTS:
-        try:
-            r = requests.post(GRAPHQL_URL, json={"query":"{ hello }"}, timeout=3)
-            data = {}
-            try:
-                data = r.json()
-            except Exception:
-                pass
-            if r.status_code == 200 and ("data" in data or "hello" in (data.get("data") or {})):
-                return f"{timestamp} CRM is alive — GraphQL OK\n"
-            return f"{timestamp} CRM is alive — GraphQL HTTP {r.status_code}\n"
-        except Exception as e:
-            return f"{timestamp} CRM is alive — GraphQL requests check failed: {e}\n"
-    return f"{timestamp} CRM is alive — GraphQL check not available (missing clients)\n"
+    try:
+        data = get_executor().execute("{ hello }")
+    except Exception as e:
+        return f"{timestamp} CRM is alive — GraphQL check failed: {e}\n"
+    if "hello" in data:
+        return f"{timestamp} CRM is alive — GraphQL OK\n"
+    return f"{timestamp} CRM is alive — GraphQL returned unexpected payload\n"
 
 def log_crm_heartbeat():
     """Logs a timestamp every 5 minutes and optionally queries the GraphQL hello field."""
@@ -75,37 +51,11 @@ def update_low_stock():
       }
     }
     """
-    log_lines = []
-    if _HAS_GQL:
-        try:
-            transport = RequestsHTTPTransport(url=GRAPHQL_URL, verify=True, retries=1)
-            client = Client(transport=transport, fetch_schema_from_transport=False)
-            query = gql(mutation)
-            resp = client.execute(query)
-            # Graphene may return dict with 'updateLowStockProducts'
-            payload = resp.get('updateLowStockProducts') if isinstance(resp, dict) else None
-        except Exception as e:
-            with open(LOW_STOCK_LOG, "a") as f:
-                f.write(f"{timestamp} Low stock update failed (gql error): {e}\n")
-            return
-    elif _HAS_REQUESTS:
-        try:
-            r = requests.post(GRAPHQL_URL, json={"query": mutation}, timeout=5)
-            payload = None
-            try:
-                j = r.json()
-            except Exception:
-                j = {}
-            # GraphQL responses may be { "data": { "updateLowStockProducts": {...}}}
-            if isinstance(j, dict):
-                payload = j.get('data', {}).get('updateLowStockProducts') or j.get('updateLowStockProducts')
-        except Exception as e:
-            with open(LOW_STOCK_LOG, "a") as f:
-                f.write(f"{timestamp} Low stock update failed (requests error): {e}\n")
-            return
-    else:
+    try:
+        payload = get_executor().execute(mutation).get('updateLowStockProducts')
+    except Exception as e:
         with open(LOW_STOCK_LOG, "a") as f:
-            f.write(f"{timestamp} Low stock update failed: no HTTP client available\n")
+            f.write(f"{timestamp} Low stock update failed: {e}\n")
         return
 
     if not payload:
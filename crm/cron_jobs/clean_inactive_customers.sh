@@ -20,31 +20,11 @@ export DJANGO_SETTINGS_MODULE=alx_backend_graphql_crm.settings
 # Change to inner project directory (where manage.py lives)
 cd "$PROJECT_ROOT/alx_backend_graphql_crm" || exit 1
 
-# Run Django shell snippet that removes customers with no orders in the last 365 days
-# and append a timestamped line to /tmp/customer_cleanup_log.txt
-"$PYTHON" ./manage.py shell --settings=alx_backend_graphql_crm.settings <<'PY'
-from django.utils import timezone
-import datetime
-from django.db.models import Max, Q
-
-try:
-    from crm.models import Customer
-except Exception as e:
-    with open('/tmp/customer_cleanup_log.txt', 'a') as f:
-        f.write(f"{timezone.now().isoformat()} FAILED to import Customer model: {e}\n")
-    raise
-
-cutoff = timezone.now() - datetime.timedelta(days=365)
-
-try:
-    qs = Customer.objects.annotate(last_order=Max('orders__order_date')).filter(Q(last_order__lt=cutoff) | Q(last_order__isnull=True))
-    count = qs.count()
-    qs.delete()
-    with open('/tmp/customer_cleanup_log.txt', 'a') as f:
-        f.write(f"{timezone.now().isoformat()} Deleted {count} customers\n")
-    print(f"Deleted {count} customers")
-except Exception as e:
-    with open('/tmp/customer_cleanup_log.txt', 'a') as f:
-        f.write(f"{timezone.now().isoformat()} Cleanup failed: {e}\n")
-    raise
-PY
+# Delete customers with no orders in the last 365 days in short batches; the
+# command appends a timestamped summary to /tmp/customer_cleanup_log.txt and
+# resumes from its checkpoint if a previous run was interrupted. Extra
+# arguments are passed on to the command (e.g. --dry-run)
+if ! "$PYTHON" ./manage.py clean_inactive_customers --days 365 --settings=alx_backend_graphql_crm.settings "$@"; then
+  echo "$(date -Iseconds) Cleanup failed" >> /tmp/customer_cleanup_log.txt
+  exit 1
+fi
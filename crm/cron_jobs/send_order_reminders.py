@@ -6,8 +6,11 @@
 Query the local GraphQL endpoint for recent orders (last 7 days)
 and log reminders to /tmp/order_reminders_log.txt.
 
+Orders are filtered by date on the server and streamed page by page, so the
+job only transfers the orders it actually reminds about.
+
 Requirements:
-  pip install gql requests
+  pip install "gql[requests]"
 """
 
 from datetime import datetime, timedelta, timezone
@@ -15,102 +18,95 @@ import os
 import sys
 
 try:
-    from gql import gql, Client
+    from gql import gql, Client, GraphQLRequest
     from gql.transport.requests import RequestsHTTPTransport
 except Exception as e:
-    print("Missing dependency: gql. Install with `pip install gql requests`", file=sys.stderr)
+    print("Missing dependency: gql. Install with `pip install 'gql[requests]'`", file=sys.stderr)
     raise
 
 LOG_PATH = "/tmp/order_reminders_log.txt"
 GRAPHQL_URL = os.environ.get("GRAPHQL_URL", "http://localhost:8000/graphql")
+# orders per request (the server caps connections at RELAY_CONNECTION_MAX_LIMIT, 100)
+PAGE_SIZE = int(os.environ.get("ORDER_REMINDERS_PAGE_SIZE", "100"))
+# log lines written per write() call
+LOG_BATCH_SIZE = 500
 
-# transport
-transport = RequestsHTTPTransport(
-    url=GRAPHQL_URL,
-    verify=True,
-    retries=3,
-)
-
-client = Client(transport=transport, fetch_schema_from_transport=False)
-
-# Query: fetch id, orderDate and customer email for orders (no filters server-side).
-# We filter in Python by orderDate (last 7 days) to be robust against unknown server filters.
-QUERY = gql("""
-query {
-  orders {
-    id
-    orderDate
-    customer {
-      email
+# Only orders since the cutoff are fetched (filtered server-side), one keyset
+# page at a time, ordered by orderDate.
+QUERY_SOURCE = """
+query RecentOrders($since: DateTime!, $first: Int!, $after: String) {
+  allOrders(orderDate_Gte: $since, first: $first, after: $after) {
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    edges {
+      node {
+        id
+        orderDate
+        customer {
+          email
+        }
+      }
     }
   }
 }
-""")
-
-def parse_iso_datetime(s):
-    if s is None:
-        return None
-    # handle Z timezone suffix
-    try:
-        if s.endswith("Z"):
-            s = s.replace("Z", "+00:00")
-        # Python 3.11+ has fromisoformat that accepts offset
-        return datetime.fromisoformat(s)
-    except Exception:
-        # best-effort fallback: try common formats
-        for fmt in ("%Y-%m-%dT%H:%M:%S.%f%z", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S"):
-            try:
-                return datetime.strptime(s, fmt)
-            except Exception:
-                continue
-    return None
+"""
+
+
+def iter_recent_orders(fetch, since, page_size=PAGE_SIZE):
+    """
+    Yield order nodes placed since ``since``, following the connection cursors.
+
+    ``fetch(variables)`` runs QUERY_SOURCE and returns the ``data`` dict.
+    """
+    variables = {"since": since.isoformat(), "first": page_size, "after": None}
+    while True:
+        connection = (fetch(variables) or {}).get("allOrders") or {}
+        for edge in connection.get("edges") or []:
+            yield edge["node"]
+        page_info = connection.get("pageInfo") or {}
+        if not page_info.get("hasNextPage"):
+            return
+        variables["after"] = page_info["endCursor"]
+
+
+def write_reminders(orders, log):
+    """Write one reminder line per order in batches; return how many were written."""
+    buffer = []
+    count = 0
+    for order in orders:
+        customer = order.get("customer") or {}
+        buffer.append(
+            f"{datetime.now(timezone.utc).isoformat()} Order ID: {order.get('id')}, "
+            f"customer_email: {customer.get('email')}, order_date: {order.get('orderDate')}\n"
+        )
+        if len(buffer) >= LOG_BATCH_SIZE:
+            log.writelines(buffer)
+            count += len(buffer)
+            buffer.clear()
+    log.writelines(buffer)
+    return count + len(buffer)
+
 
 def main():
-    now = datetime.now(timezone.utc)
-    cutoff = now - timedelta(days=7)
-
-    try:
-        result = client.execute(QUERY)
-    except Exception as e:
-        with open(LOG_PATH, "a") as f:
-            f.write(f"{datetime.now(timezone.utc).isoformat()} Failed GraphQL query: {e}\n")
-        print("Order reminders processed! (query failed — logged)")
-        return
-
-    # GraphQL result shape may be dict with 'orders'
-    orders = result.get("orders") if isinstance(result, dict) else None
-    if not orders:
-        # nothing to do
-        with open(LOG_PATH, "a") as f:
-            f.write(f"{datetime.now(timezone.utc).isoformat()} No orders returned from GraphQL\n")
-        print("Order reminders processed!")
-        return
-
-    reminders = []
-    for o in orders:
-        oid = o.get("id")
-        order_date_raw = o.get("orderDate") or o.get("order_date")  # support both names
-        dt = parse_iso_datetime(order_date_raw) if order_date_raw else None
-        # normalize to aware UTC if possible
-        if dt is None:
-            # cannot parse; skip
-            continue
-        if dt.tzinfo is None:
-            # assume UTC if naive
-            dt = dt.replace(tzinfo=timezone.utc)
-        if dt >= cutoff:
-            cust = o.get("customer") or {}
-            email = cust.get("email") if isinstance(cust, dict) else None
-            reminders.append((oid, email, dt))
-
-    # log found reminders
-    if reminders:
-        with open(LOG_PATH, "a") as f:
-            for oid, email, dt in reminders:
-                f.write(f"{datetime.now(timezone.utc).isoformat()} Order ID: {oid}, customer_email: {email}, order_date: {dt.isoformat()}\n")
-    else:
-        with open(LOG_PATH, "a") as f:
-            f.write(f"{datetime.now(timezone.utc).isoformat()} No recent orders in the last 7 days\n")
+    cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+    transport = RequestsHTTPTransport(url=GRAPHQL_URL, verify=True, retries=3)
+    client = Client(transport=transport, fetch_schema_from_transport=False)
+    query = gql(QUERY_SOURCE)
+
+    with open(LOG_PATH, "a") as log:
+        try:
+            # one keep-alive session for every page
+            with client as session:
+                orders = iter_recent_orders(lambda v: session.execute(GraphQLRequest(query, variable_values=v)), cutoff)
+                count = write_reminders(orders, log)
+        except Exception as e:
+            log.write(f"{datetime.now(timezone.utc).isoformat()} Failed GraphQL query: {e}\n")
+            print("Order reminders processed! (query failed — logged)")
+            return
+        if not count:
+            log.write(f"{datetime.now(timezone.utc).isoformat()} No recent orders in the last 7 days\n")
 
     print("Order reminders processed!")
 
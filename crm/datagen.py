@@ -0,0 +1,244 @@
+# crm/datagen.py
+"""
+Synthetic CRM datasets for load testing (``manage.py generate_data``).
+
+Rows are generated in chunks of ``chunk_size`` and written one chunk per
+transaction, so memory stays flat however large the dataset is:
+
+- PostgreSQL: ``COPY ... FROM STDIN`` (PostgresCopyWriter);
+- any other backend: a prepared INSERT run with ``executemany``
+  (ExecutemanyWriter); ``bulk_create`` spends most of its time building and
+  preparing model instances, which roughly doubles the time of a large run.
+
+Primary keys are assigned here, continuing after the current maximum, so order
+items can be written without reading the orders back; sequences are reset at
+the end. Everything is drawn from one ``random.Random(seed)``: the same seed,
+end date and starting tables give the same dataset.
+
+Which customers place orders and which products they buy follow Zipf
+distributions (``customer_skew`` / ``product_skew``; 0 is uniform), order
+dates are uniform over ``days`` before ``end``, prices log-normal around
+``price_median``, and ``low_stock_ratio`` of the products start below the
+restock threshold. CustomerStats is rebuilt once at the end.
+"""
+import io
+import math
+import random
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Customer, CustomerStats, Order, Product
+from .response_cache import bump_versions
+from .search import SQLiteFTSSearchBackend, get_search_backend
+
+FIRST_NAMES = (
+    "Ada", "Alan", "Amara", "Ben", "Chen", "Chioma", "Dana", "David", "Elena", "Emeka", "Fatima", "Grace",
+    "Hana", "Ibrahim", "Isabel", "James", "Kemi", "Liam", "Maria", "Mohammed", "Nadia", "Noah", "Olu",
+    "Priya", "Ravi", "Sara", "Tomas", "Uche", "Wei", "Yusuf", "Zainab", "Zoe",
+)
+LAST_NAMES = (
+    "Adeyemi", "Ahmed", "Brown", "Garcia", "Hughes", "Ibrahim", "Johnson", "Kim", "Kowalski", "Lee", "Martin",
+    "Mensah", "Mueller", "Nakamura", "Nguyen", "Obi", "Okafor", "Patel", "Rossi", "Silva", "Smith", "Tanaka",
+    "Walker", "Williams", "Yilmaz",
+)
+ADJECTIVES = (
+    "Basic", "Compact", "Deluxe", "Eco", "Ergonomic", "Heavy-Duty", "Lite", "Mini", "Portable", "Premium",
+    "Pro", "Rugged", "Smart", "Ultra", "Wireless",
+)
+NOUNS = (
+    "Adapter", "Backpack", "Cable", "Camera", "Charger", "Desk", "Headset", "Keyboard", "Lamp", "Laptop",
+    "Monitor", "Mouse", "Printer", "Router", "Speaker", "Stand", "Tablet", "Webcam",
+)
+
+
+class Sampler:
+    """Draw indexes in ``range(n)``: uniformly, or Zipf-distributed with ``skew``."""
+
+    def __init__(self, rng, n, skew=0.0):
+        self.rng = rng
+        self.n = n
+        self.cum_weights = list(accumulate(rank ** -skew for rank in range(1, n + 1))) if skew else None
+
+    def draw(self, k):
+        if self.cum_weights is None:
+            return [self.rng.randrange(self.n) for _ in range(k)]
+        return self.rng.choices(range(self.n), cum_weights=self.cum_weights, k=k)
+
+
+# ------------------------
+# Writers
+# ------------------------
+class ExecutemanyWriter:
+    """``INSERT ... VALUES (%s, ...)`` through ``executemany``; works on every backend."""
+
+    def __init__(self, using):
+        self.using = using
+
+    def write(self, model, fields, rows):
+        """Insert ``rows`` (tuples of ``fields`` values)."""
+        connection = connections[self.using]
+        qn = connection.ops.quote_name
+        model_fields = [model._meta.get_field(name) for name in fields]
+        sql = (
+            f"INSERT INTO {qn(model._meta.db_table)} ({', '.join(qn(f.column) for f in model_fields)}) "
+            f"VALUES ({', '.join(['%s'] * len(model_fields))})"
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [
+                # ints and strings need no adaptation; skipping the field call is most of the speed-up
+                [v if v is None or type(v) in (int, str) else f.get_db_prep_save(v, connection) for f, v in zip(model_fields, row)]
+                for row in rows
+            ])
+
+
+class PostgresCopyWriter:
+    """``COPY ... FROM STDIN`` with psycopg 3, or psycopg2's copy_expert."""
+
+    def __init__(self, using):
+        self.using = using
+
+    def write(self, model, fields, rows):
+        connection = connections[self.using]
+        qn = connection.ops.quote_name
+        columns = ", ".join(qn(model._meta.get_field(name).column) for name in fields)
+        table = qn(model._meta.db_table)
+        with connection.cursor() as cursor:
+            if hasattr(cursor.cursor, "copy"):
+                with cursor.cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            else:
+                import csv
+
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def get_writer(using):
+    if connections[using].vendor == "postgresql":
+        return PostgresCopyWriter(using)
+    return ExecutemanyWriter(using)
+
+
+# ------------------------
+# Generator
+# ------------------------
+class DatasetGenerator:
+    def __init__(
+        self,
+        seed=42,
+        chunk_size=10000,
+        min_items=1,
+        max_items=5,
+        customer_skew=1.0,
+        product_skew=1.0,
+        days=730,
+        end=None,
+        price_median=30,
+        low_stock_ratio=0.1,
+        using="default",
+        writer=None,
+        progress=None,
+    ):
+        if not 1 <= min_items <= max_items:
+            raise ValueError("need 1 <= min_items <= max_items")
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.min_items = min_items
+        self.max_items = max_items
+        self.customer_skew = customer_skew
+        self.product_skew = product_skew
+        self.days = days
+        self.end = end or timezone.now()
+        self.price_median = price_median
+        self.low_stock_ratio = low_stock_ratio
+        self.using = using
+        self.writer = writer or get_writer(using)
+        self.progress = progress or (lambda message: None)
+        self.search = get_search_backend(using)
+
+    def generate(self, customers=0, products=0, orders=0):
+        """Add the given numbers of rows; orders go to new and existing customers/products alike."""
+        self.write_customers(customers)
+        self.write_products(products)
+        self.write_orders(orders)
+        connection = connections[self.using]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Customer, Product, Order]):
+                cursor.execute(sql)
+        if orders:
+            CustomerStats.objects.db_manager(self.using).rebuild()
+        bump_versions(Customer, Product, Order, CustomerStats, using=self.using)
+
+    def write_customers(self, count):
+        now = timezone.now()
+        start = self.next_pk(Customer)
+        for offset in range(0, count, self.chunk_size):
+            rows = []
+            for pk in range(start + offset, start + min(offset + self.chunk_size, count)):
+                first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+                phone = f"+1{self.rng.randrange(10 ** 9, 10 ** 10)}" if self.rng.random() < 0.8 else None
+                rows.append((pk, f"{first} {last}", f"{first}.{last}.{pk}@example.com".lower(), phone, now))
+            self.write(Customer, ("id", "name", "email", "phone", "created_at"), rows, search=True)
+            self.progress(f"customers: {offset + len(rows)}/{count}")
+
+    def write_products(self, count):
+        start = self.next_pk(Product)
+        sigma = 1.0
+        for offset in range(0, count, self.chunk_size):
+            rows = []
+            for pk in range(start + offset, start + min(offset + self.chunk_size, count)):
+                name = f"{self.rng.choice(ADJECTIVES)} {self.rng.choice(NOUNS)} {self.rng.randint(100, 999)}"
+                price = min(max(self.rng.lognormvariate(math.log(self.price_median), sigma), 0.5), 5000)
+                if self.rng.random() < self.low_stock_ratio:
+                    stock = self.rng.randrange(10)
+                else:
+                    stock = self.rng.randint(10, 500)
+                rows.append((pk, name, Decimal(f"{price:.2f}"), stock))
+            self.write(Product, ("id", "name", "price", "stock"), rows, search=True)
+            self.progress(f"products: {offset + len(rows)}/{count}")
+
+    def write_orders(self, count):
+        if not count:
+            return
+        customer_ids = list(Customer.objects.using(self.using).order_by("pk").values_list("pk", flat=True))
+        products = list(Product.objects.using(self.using).order_by("pk").values_list("pk", "price"))
+        if not customer_ids or not products:
+            raise ValueError("orders need at least one customer and one product")
+        customer_sampler = Sampler(self.rng, len(customer_ids), self.customer_skew)
+        product_sampler = Sampler(self.rng, len(products), self.product_skew)
+        span = self.days * 86400
+
+        start = self.next_pk(Order)
+        through = Order.products.through
+        for offset in range(0, count, self.chunk_size):
+            size = min(self.chunk_size, count - offset)
+            rows, items = [], []
+            for pk, customer in zip(range(start + offset, start + offset + size), customer_sampler.draw(size)):
+                picked = sorted(set(product_sampler.draw(self.rng.randint(self.min_items, self.max_items))))
+                order_date = self.end - timedelta(seconds=self.rng.randrange(span or 1))
+                total = sum(products[i][1] for i in picked)
+                rows.append((pk, customer_ids[customer], total, order_date))
+                items.extend((pk, products[i][0]) for i in picked)
+            with transaction.atomic(using=self.using):
+                self.writer.write(Order, ("id", "customer_id", "total_amount", "order_date"), rows)
+                self.writer.write(through, ("order_id", "product_id"), items)
+            self.progress(f"orders: {offset + size}/{count}")
+
+    def write(self, model, fields, rows, search=False):
+        with transaction.atomic(using=self.using):
+            self.writer.write(model, fields, rows)
+            if search and isinstance(self.search, SQLiteFTSSearchBackend) and self.search.available():
+                # FTS5 shadow tables (the other backends index the table itself)
+                self.search.index([model(**dict(zip(fields, row))) for row in rows], replace=False)
+
+    def next_pk(self, model):
+        return (model.objects.using(self.using).aggregate(pk=Max("pk"))["pk"] or 0) + 1
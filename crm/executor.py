@@ -0,0 +1,138 @@
+# crm/executor.py
+"""
+Run GraphQL documents for the scheduled jobs (cron and Celery).
+
+The jobs used to build a new gql ``Client`` per run and POST to
+``GRAPHQL_URL`` on the same machine, paying for a connection, JSON round
+trips, a web worker slot and a full parse + validate every time. Two
+executors share one interface, ``execute(document, variables=None) -> data``
+and ``execute_batch([(document, variables), ...]) -> [data, ...]``:
+
+- InProcessExecutor (default) runs the document straight against the
+  project's Graphene schema, caching parsed and validated documents.
+- HTTPExecutor posts to a remote endpoint over a persistent, pooled
+  ``requests`` session, for jobs that run away from the web servers. It
+  sends persisted-query hashes instead of the document text, and a batch as
+  one JSON array request.
+
+Select one with ``CRM_GRAPHQL_EXECUTOR`` (a dotted path); ``CRM_GRAPHQL_URL``
+(or the ``GRAPHQL_URL`` environment variable) sets the HTTP endpoint.
+"""
+import os
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from graphql import OperationType, execute_sync, get_operation_ast
+
+from .loaders import reset_loaders
+from .persisted import get_document_cache, query_hash
+
+
+class GraphQLExecutionError(Exception):
+    """The document failed to validate or returned errors."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(str(getattr(e, "message", None) or e) for e in errors))
+
+
+class InProcessExecutor:
+    """Execute documents against the Graphene schema in this process."""
+
+    def __init__(self, schema=None):
+        if schema is None:
+            from graphene_django.settings import graphene_settings
+            schema = graphene_settings.SCHEMA
+        self.schema = getattr(schema, "graphql_schema", schema)
+
+    def document(self, source):
+        # parsed + validated once per process, shared with the /graphql view
+        document, errors = get_document_cache(self.schema).get(source)
+        if errors:
+            raise GraphQLExecutionError(errors)
+        return document
+
+    def execute(self, document, variables=None):
+        # a fresh context per run, like one HTTP request (request-scoped loaders)
+        return self._execute(document, variables, SimpleNamespace())
+
+    def execute_batch(self, operations):
+        # one context for the whole batch, like a batched HTTP request
+        context = SimpleNamespace()
+        return [self._execute(document, variables, context) for document, variables in operations]
+
+    def _execute(self, document, variables, context):
+        document = self.document(document)
+        result = execute_sync(self.schema, document, variable_values=variables, context_value=context)
+        operation = get_operation_ast(document)
+        if operation is not None and operation.operation != OperationType.QUERY:
+            # later operations of the batch must not see loader results from before the write
+            reset_loaders(context)
+        if result.errors:
+            raise GraphQLExecutionError(result.errors)
+        return result.data
+
+
+class HTTPExecutor:
+    """POST documents to a GraphQL endpoint over one pooled keep-alive session."""
+
+    def __init__(self, url=None, timeout=10, retries=1, pool_size=4):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url or getattr(settings, "CRM_GRAPHQL_URL", None) or os.environ.get(
+            "GRAPHQL_URL", "http://localhost:8000/graphql"
+        )
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def execute(self, document, variables=None):
+        # send only the hash (automatic persisted queries); the text follows
+        # once if the server does not know it yet
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash(document)}}
+        payload = self._post({"variables": variables or {}, "extensions": extensions})
+        if any(e.get("message") == "PersistedQueryNotFound" for e in payload.get("errors") or []):
+            payload = self._post({"query": document, "variables": variables or {}, "extensions": extensions})
+        if payload.get("errors"):
+            raise GraphQLExecutionError([e.get("message", e) for e in payload["errors"]])
+        return payload.get("data") or {}
+
+    def execute_batch(self, operations):
+        # the texts are sent along with their hashes, registering them for later single runs
+        payloads = self._post([
+            {
+                "query": document,
+                "variables": variables or {},
+                "extensions": {"persistedQuery": {"version": 1, "sha256Hash": query_hash(document)}},
+            }
+            for document, variables in operations
+        ])
+        if isinstance(payloads, dict):
+            # the whole batch was rejected
+            payloads = [payloads]
+        errors = [e.get("message", e) for payload in payloads for e in payload.get("errors") or []]
+        if errors:
+            raise GraphQLExecutionError(errors)
+        return [payload.get("data") or {} for payload in payloads]
+
+    def _post(self, body):
+        response = self.session.post(self.url, json=body, timeout=self.timeout)
+        if response.status_code >= 500 or not response.content:
+            response.raise_for_status()
+        return response.json() if response.content else {}
+
+
+_executor = None
+
+
+def get_executor():
+    """Return the process-wide executor selected by CRM_GRAPHQL_EXECUTOR."""
+    global _executor
+    if _executor is None:
+        path = getattr(settings, "CRM_GRAPHQL_EXECUTOR", "crm.executor.InProcessExecutor")
+        _executor = import_string(path)()
+    return _executor
@@ -1,8 +1,18 @@
 # crm/filters.py
 import django_filters
-from django.db.models import Q
+from django.db.models import Count, Exists, OuterRef, Q
 from django_filters import rest_framework as filters
+import graphene
+from graphene_django.filter import ListFilter
 from .models import Customer, Product, Order
+from .search import get_search_backend
+
+
+def filter_search(queryset, name, value):
+    """Indexed substring search, see crm/search.py."""
+    if not value:
+        return queryset
+    return get_search_backend(queryset.db).filter(queryset, value)
 
 class CustomerFilter(django_filters.FilterSet):
     # case-insensitive partial matches
@@ -16,6 +26,9 @@ class CustomerFilter(django_filters.FilterSet):
     # custom phone pattern filter (e.g., startswith +1)
     phone_pattern = django_filters.CharFilter(method="filter_phone_pattern")
 
+    # indexed search over name and email
+    search = django_filters.CharFilter(method=filter_search)
+
     # ordering (supports "name", "-name", "email", "-email")
     order_by = django_filters.OrderingFilter(
         fields=(
@@ -27,7 +40,7 @@ class CustomerFilter(django_filters.FilterSet):
 
     class Meta:
         model = Customer
-        fields = ["name", "email", "created_at__gte", "created_at__lte", "phone_pattern"]
+        fields = ["name", "email", "created_at__gte", "created_at__lte", "phone_pattern", "search"]
 
     def filter_phone_pattern(self, queryset, name, value):
         # "value" is expected to be a prefix, e.g. "+1" to match phones starting with +1
@@ -48,6 +61,9 @@ class ProductFilter(django_filters.FilterSet):
     # helper for low stock -> use stock_lt in queries
     stock_lt = django_filters.NumberFilter(field_name="stock", lookup_expr="lt")
 
+    # indexed search over name
+    search = django_filters.CharFilter(method=filter_search)
+
     order_by = django_filters.OrderingFilter(
         fields=(
             ("name", "name"),
@@ -65,6 +81,7 @@ class ProductFilter(django_filters.FilterSet):
             "stock__gte",
             "stock__lte",
             "stock_lt",
+            "search",
         ]
 
 
@@ -82,6 +99,13 @@ class OrderFilter(django_filters.FilterSet):
     # allow filtering orders that include a specific product id
     product_id = django_filters.NumberFilter(method="filter_by_product_id")
 
+    # orders containing any (default) or all of several products: productIds: [1, 2], productIdsMatch: "all"
+    product_ids = ListFilter(input_type=graphene.List(graphene.ID), method="filter_by_product_ids")
+    product_ids_match = django_filters.ChoiceFilter(choices=(("any", "any"), ("all", "all")), method="filter_noop")
+
+    # indexed search over customer and product names
+    search = django_filters.CharFilter(method=filter_search)
+
     order_by = django_filters.OrderingFilter(
         fields=(
             ("order_date", "order_date"),
@@ -94,16 +118,48 @@ class OrderFilter(django_filters.FilterSet):
         fields = [
             "total_amount__gte", "total_amount__lte",
             "order_date__gte", "order_date__lte",
-            "customer_name", "product_name", "product_id"
+            "customer_name", "product_name", "product_id", "product_ids", "product_ids_match", "search"
         ]
 
+    # M2M filters use correlated EXISTS subqueries rather than a join + DISTINCT,
+    # which would sort/hash the whole result and break COUNT and pagination plans
     def filter_product_name(self, queryset, name, value):
         if not value:
             return queryset
         # Orders that have products with names matching value
-        return queryset.filter(products__name__icontains=value).distinct()
+        return queryset.filter(has_products(product__name__icontains=value))
 
     def filter_by_product_id(self, queryset, name, value):
         if not value:
             return queryset
-        return queryset.filter(products__id=value).distinct()
+        return queryset.filter(has_products(product_id=value))
+
+    def filter_by_product_ids(self, queryset, name, value):
+        ids = set()
+        for v in value:
+            try:
+                ids.add(int(v))
+            except (TypeError, ValueError):
+                continue
+        match_all = self.form.cleaned_data.get("product_ids_match") == "all"
+        if not ids:
+            return queryset if match_all else queryset.none()
+        if match_all:
+            # one correlated subquery: the order has a through row for every id
+            rows = (
+                Order.products.through.objects.filter(order_id=OuterRef("pk"), product_id__in=ids)
+                .values("order_id")
+                .annotate(matched=Count("product_id"))
+                .filter(matched=len(ids))
+            )
+            return queryset.filter(Exists(rows))
+        return queryset.filter(has_products(product_id__in=ids))
+
+    def filter_noop(self, queryset, name, value):
+        # read by filter_by_product_ids
+        return queryset
+
+
+def has_products(**lookups):
+    """EXISTS over Order.products matching ``lookups`` (through-model lookups)."""
+    return Exists(Order.products.through.objects.filter(order_id=OuterRef("pk"), **lookups))
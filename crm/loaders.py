@@ -0,0 +1,189 @@
+# crm/loaders.py
+"""
+Request-scoped batching loaders for the CRM GraphQL types.
+
+GraphQLView executes the schema synchronously, so loads cannot be deferred
+to the end of an event-loop tick the way promise/asyncio DataLoaders do.
+Instead, model instances fetched by the same query are tagged as *peers*:
+the first time a resolver asks a loader about one of them, the keys of all
+its peers are fetched in a single batched query and cached for the rest of
+the request.
+"""
+from collections import defaultdict
+from itertools import islice
+from operator import attrgetter
+
+from django.db.models.query import ModelIterable, QuerySet
+
+from .models import Customer, CustomerStats, Order
+
+PEERS_ATTR = "_crm_loader_peers"
+CONTEXT_ATTR = "crm_loaders"
+
+
+def mark_peers(instances):
+    """Tag every instance in ``instances`` with the full list, and return it."""
+    instances = list(instances)
+    for obj in instances:
+        setattr(obj, PEERS_ATTR, instances)
+    return instances
+
+
+class PeerTrackingIterable(ModelIterable):
+    """ModelIterable that marks all rows of one fetch as peers of each other.
+
+    Under ``.iterator(chunk_size=...)`` each chunk is its own peer group, so
+    streaming stays bounded by the chunk size.
+    """
+
+    def __iter__(self):
+        rows = super().__iter__()
+        if not self.chunked_fetch:
+            yield from mark_peers(rows)
+            return
+        while chunk := list(islice(rows, self.chunk_size)):
+            yield from mark_peers(chunk)
+
+
+def track_peers(queryset):
+    """Return ``queryset`` set up so its rows can be batch-loaded together.
+
+    Anything that is not an unevaluated plain model queryset (lists, prefetched
+    results, ``values()`` querysets) is returned unchanged.
+    """
+    if (
+        isinstance(queryset, QuerySet)
+        and queryset._result_cache is None
+        and queryset._iterable_class is ModelIterable
+    ):
+        queryset = queryset._chain()
+        queryset._iterable_class = PeerTrackingIterable
+    return queryset
+
+
+class DataLoader:
+    """Caches ``batch_load_fn(keys)`` results and batches queued keys together."""
+
+    def __init__(self, batch_load_fn):
+        self.batch_load_fn = batch_load_fn
+        self._cache = {}
+        self._queue = {}
+        self._peer_groups = {}
+
+    def prime(self, key, value):
+        self._cache.setdefault(key, value)
+
+    def queue(self, keys):
+        for key in keys:
+            if key is not None and key not in self._cache:
+                self._queue[key] = None
+
+    def load(self, key):
+        if key not in self._cache:
+            self._queue[key] = None
+            self.dispatch()
+        return self._cache.get(key)
+
+    def load_many(self, keys):
+        keys = list(keys)
+        self.queue(keys)
+        self.dispatch()
+        return [self._cache.get(key) for key in keys]
+
+    def load_for(self, instance, key):
+        """Load ``key(instance)``, batched with the keys of the instance's peers."""
+        peers = getattr(instance, PEERS_ATTR, None)
+        if peers is not None and id(peers) not in self._peer_groups:
+            # keep a reference so the id cannot be reused during the request
+            self._peer_groups[id(peers)] = peers
+            self.queue(key(peer) for peer in peers)
+        return self.load(key(instance))
+
+    def dispatch(self):
+        keys = list(self._queue)
+        self._queue.clear()
+        if keys:
+            self._cache.update(zip(keys, self.batch_load_fn(keys)))
+
+
+# ------------------------
+# Batch functions
+# ------------------------
+def batch_customers(customer_ids):
+    customers = Customer.objects.in_bulk(customer_ids)
+    mark_peers(customers.values())
+    return [customers.get(pk) for pk in customer_ids]
+
+
+def batch_order_products(order_ids):
+    through = Order.products.through
+    rows = through.objects.filter(order_id__in=order_ids).select_related("product").order_by("pk")
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[row.order_id].append(row.product)
+    return [grouped[pk] for pk in order_ids]
+
+
+def batch_customer_orders(customer_ids):
+    orders = Order.objects.filter(customer_id__in=customer_ids).order_by("order_date", "pk")
+    grouped = defaultdict(list)
+    # orders of all customers in the batch are peers, so their products batch too
+    for order in mark_peers(orders):
+        grouped[order.customer_id].append(order)
+    return [grouped[pk] for pk in customer_ids]
+
+
+def batch_customer_stats(customer_ids):
+    stats = CustomerStats.objects.in_bulk(customer_ids)
+    # customers without orders have no row: report zeros
+    return [stats.get(pk) or CustomerStats(customer_id=pk) for pk in customer_ids]
+
+
+class Loaders:
+    """The set of loaders shared by every resolver of one request."""
+
+    def __init__(self):
+        self.customer = DataLoader(batch_customers)
+        self.order_products = DataLoader(batch_order_products)
+        self.customer_orders = DataLoader(batch_customer_orders)
+        self.customer_stats = DataLoader(batch_customer_stats)
+
+    def customer_for(self, order):
+        return self.customer.load_for(order, attrgetter("customer_id"))
+
+    def products_for(self, order):
+        return self.order_products.load_for(order, attrgetter("pk"))
+
+    def orders_for(self, customer):
+        return self.customer_orders.load_for(customer, attrgetter("pk"))
+
+    def stats_for(self, customer):
+        return self.customer_stats.load_for(customer, attrgetter("pk"))
+
+
+def get_loaders(info):
+    """Return the Loaders bound to the current request (``info.context``).
+
+    Without a context (e.g. ``schema.execute`` with no ``context_value``) a fresh
+    set is returned, which is correct but does not batch.
+    """
+    context = info.context
+    if context is None:
+        return Loaders()
+    if isinstance(context, dict):
+        if CONTEXT_ATTR not in context:
+            context[CONTEXT_ATTR] = Loaders()
+        return context[CONTEXT_ATTR]
+    loaders = getattr(context, CONTEXT_ATTR, None)
+    if loaders is None:
+        loaders = Loaders()
+        setattr(context, CONTEXT_ATTR, loaders)
+    return loaders
+
+
+def reset_loaders(context):
+    """Drop the loaders bound to ``context`` (e.g. after a write, or between subscription events)."""
+    if isinstance(context, dict):
+        context.pop(CONTEXT_ATTR, None)
+    elif context is not None and hasattr(context, CONTEXT_ATTR):
+        delattr(context, CONTEXT_ATTR)
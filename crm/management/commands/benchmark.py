@@ -0,0 +1,135 @@
+import json
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from crm.benchmarks import BENCHMARKS, BenchmarkError, BenchmarkRunner, compare, dataset_size
+from crm.datagen import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency, throughput and SQL queries of the GraphQL hot paths on a generated "
+        "dataset, in a throwaway test database. Results are JSON; with --baseline, slower or "
+        "chattier benchmarks make the command fail."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("benchmarks", nargs="*", metavar="benchmark", help="Benchmarks to run (default: all).")
+        parser.add_argument("--list", action="store_true", help="List the benchmarks and exit.")
+        parser.add_argument("--customers", type=int, default=10000, help="Customers to generate (default: 10000).")
+        parser.add_argument("--products", type=int, default=500, help="Products to generate (default: 500).")
+        parser.add_argument("--orders", type=int, default=50000, help="Orders to generate (default: 50000).")
+        parser.add_argument("--seed", type=int, default=42, help="Dataset seed (default: 42).")
+        parser.add_argument("--end-date", help="Latest order date, YYYY-MM-DD (default: now).")
+        parser.add_argument("--iterations", type=int, default=20, help="Timed runs per benchmark (default: 20).")
+        parser.add_argument("--warmup", type=int, default=3, help="Untimed runs first (default: 3).")
+        parser.add_argument("--output", help="Write the JSON results here instead of to stdout.")
+        parser.add_argument("--baseline", help="Results of an earlier run to check for regressions.")
+        parser.add_argument(
+            "--threshold", type=float, default=20,
+            help="Allowed p50 latency increase over the baseline, in percent (default: 20).",
+        )
+        parser.add_argument(
+            "--query-threshold", type=int, default=0,
+            help="Allowed extra SQL queries per operation over the baseline (default: 0).",
+        )
+        parser.add_argument(
+            "--keepdb", action="store_true",
+            help="Keep the test database, and reuse its dataset on the next run.",
+        )
+        parser.add_argument(
+            "--existing", action="store_true",
+            help="Benchmark the configured database as it is: no test database, no generated rows. "
+                 "Writes are still rolled back.",
+        )
+
+    def handle(self, *args, benchmarks, keepdb, existing, **options):
+        if options["list"]:
+            for name, bench in BENCHMARKS.items():
+                self.stdout.write(f"{name:<28} {bench.description}")
+            return
+        unknown = [name for name in benchmarks if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(f"Unknown benchmark(s): {', '.join(unknown)}; see --list")
+        baseline = self.load_baseline(options["baseline"]) if options["baseline"] else None
+        try:
+            runner = BenchmarkRunner(
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+                progress=lambda message: self.stderr.write(f"  {message}"),
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if existing:
+            results = self.run(runner, benchmarks)
+        else:
+            old_name = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb)
+            try:
+                self.prepare_dataset(options)
+                results = self.run(runner, benchmarks)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        results["meta"]["dataset"]["seed"] = None if existing else options["seed"]
+
+        text = json.dumps(results, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(text + "\n")
+            self.stderr.write(f"Results written to {options['output']}")
+        else:
+            self.stdout.write(text)
+
+        if baseline is not None:
+            self.check_regressions(results, baseline, options["threshold"], options["query_threshold"])
+
+    def prepare_dataset(self, options):
+        size = dataset_size()
+        if any(size.values()):
+            # a kept test database: the rows of the run that created it
+            self.stderr.write(f"Reusing the dataset of the kept test database: {size}")
+            return
+        end = None
+        if options["end_date"]:
+            try:
+                end = timezone.make_aware(datetime.combine(datetime.strptime(options["end_date"], "%Y-%m-%d").date(), time.max))
+            except ValueError as e:
+                raise CommandError(f"--end-date: {e}")
+        self.stderr.write("Generating the dataset")
+        generator = DatasetGenerator(
+            seed=options["seed"], end=end, progress=lambda message: self.stderr.write(f"  {message}")
+        )
+        try:
+            generator.generate(customers=options["customers"], products=options["products"], orders=options["orders"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+    def run(self, runner, benchmarks):
+        try:
+            return runner.run(benchmarks)
+        except BenchmarkError as e:
+            raise CommandError(f"Benchmark failed: {e}")
+
+    def check_regressions(self, results, baseline, threshold, query_threshold):
+        if baseline.get("meta", {}).get("dataset") != results["meta"]["dataset"]:
+            self.stderr.write(self.style.WARNING(
+                "The baseline was measured on a different dataset; the comparison may not mean much"
+            ))
+        regressions = compare(results, baseline, threshold=threshold / 100, query_threshold=query_threshold)
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(self.style.ERROR(f"  {regression}"))
+            raise CommandError(f"{len(regressions)} regression(s) against the baseline")
+        self.stderr.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    @staticmethod
+    def load_baseline(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Unreadable baseline {path} ({e})")
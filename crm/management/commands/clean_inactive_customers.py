@@ -0,0 +1,99 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from crm.models import Customer, Order
+
+LOG_PATH = "/tmp/customer_cleanup_log.txt"
+CHECKPOINT_PATH = "/tmp/crm_customer_cleanup.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete customers without an order in the last --days days, in primary key "
+        "order, one short transaction per batch. Progress is checkpointed after "
+        "every batch, so an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=365, help="Inactivity period (default: 365).")
+        parser.add_argument("--batch-size", type=int, default=500, help="Customers per transaction (default: 500).")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted without deleting.")
+        parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help=f"Progress file (default: {CHECKPOINT_PATH}).")
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over.")
+        parser.add_argument("--log", default=LOG_PATH, help=f"Summary log (default: {LOG_PATH}).")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database alias to clean.")
+
+    def handle(self, *args, days, batch_size, dry_run, checkpoint, restart, log, database, **options):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+
+        state = None if restart or dry_run else self.load_checkpoint(checkpoint)
+        if state:
+            cutoff = datetime.fromisoformat(state["cutoff"])
+            self.stdout.write(f"Resuming after customer {state['last_pk']} ({state['customers']} already deleted)")
+        else:
+            cutoff = timezone.now() - timedelta(days=days)
+            state = {"cutoff": cutoff.isoformat(), "last_pk": 0, "customers": 0, "orders": 0}
+
+        customers = Customer.objects.db_manager(database)
+        while True:
+            # the batch is re-selected (and locked) inside its transaction, so a
+            # customer who ordered since the last batch is never deleted
+            with transaction.atomic(using=database):
+                pks = list(
+                    customers.inactive_since(cutoff)
+                    .filter(pk__gt=state["last_pk"])
+                    .select_for_update(of=("self",))
+                    .order_by("pk")
+                    .values_list("pk", flat=True)[:batch_size]
+                )
+                if not pks:
+                    break
+                if dry_run:
+                    deleted, orders = len(pks), self.count_orders(pks, database)
+                else:
+                    deleted, orders = customers.purge(pks)
+            state["last_pk"] = pks[-1]
+            state["customers"] += deleted
+            state["orders"] += orders
+            if not dry_run:
+                self.save_checkpoint(checkpoint, state)
+            self.stdout.write(f"  {state['customers']} customers, {state['orders']} orders (up to customer {pks[-1]})")
+
+        verb = "Would delete" if dry_run else "Deleted"
+        summary = f"{verb} {state['customers']} customers and {state['orders']} orders"
+        if not dry_run:
+            if os.path.exists(checkpoint):
+                os.remove(checkpoint)
+            with open(log, "a") as f:
+                f.write(f"{timezone.now().isoformat()} {summary}\n")
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    @staticmethod
+    def count_orders(pks, database):
+        counts = Order.objects.using(database).filter(customer_id__in=pks).aggregate(n=Count("pk"))
+        return counts["n"]
+
+    @staticmethod
+    def load_checkpoint(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            raise CommandError(f"Unreadable checkpoint {path} ({e}); pass --restart to start over")
+
+    @staticmethod
+    def save_checkpoint(path, state):
+        # replace atomically, so a crash mid-write cannot leave a torn file
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
@@ -0,0 +1,68 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from crm.datagen import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Add synthetic customers, products and orders (with order items) for load testing. "
+        "The same --seed and --end-date on the same starting data give the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--customers", type=int, default=1000, help="Customers to add (default: 1000).")
+        parser.add_argument("--products", type=int, default=100, help="Products to add (default: 100).")
+        parser.add_argument("--orders", type=int, default=10000, help="Orders to add (default: 10000).")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42).")
+        parser.add_argument("--chunk-size", type=int, default=10000, help="Rows per transaction (default: 10000).")
+        parser.add_argument("--min-items", type=int, default=1, help="Fewest products per order (default: 1).")
+        parser.add_argument("--max-items", type=int, default=5, help="Most products per order (default: 5).")
+        parser.add_argument(
+            "--customer-skew", type=float, default=1.0,
+            help="Zipf exponent of orders per customer; 0 spreads orders evenly (default: 1.0).",
+        )
+        parser.add_argument(
+            "--product-skew", type=float, default=1.0,
+            help="Zipf exponent of product popularity; 0 is uniform (default: 1.0).",
+        )
+        parser.add_argument("--days", type=int, default=730, help="Order dates span this many days (default: 730).")
+        parser.add_argument("--end-date", help="Latest order date, YYYY-MM-DD (default: now).")
+        parser.add_argument("--price-median", type=float, default=30, help="Median product price (default: 30).")
+        parser.add_argument(
+            "--low-stock-ratio", type=float, default=0.1,
+            help="Share of products created with stock below 10 (default: 0.1).",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database alias to fill.")
+
+    def handle(self, *args, customers, products, orders, end_date, database, **options):
+        if min(customers, products, orders) < 0 or options["chunk_size"] < 1:
+            raise CommandError("counts must be non-negative and --chunk-size positive")
+        end = None
+        if end_date:
+            try:
+                end = timezone.make_aware(datetime.combine(datetime.strptime(end_date, "%Y-%m-%d").date(), time.max))
+            except ValueError as e:
+                raise CommandError(f"--end-date: {e}")
+        try:
+            generator = DatasetGenerator(
+                seed=options["seed"],
+                chunk_size=options["chunk_size"],
+                min_items=options["min_items"],
+                max_items=options["max_items"],
+                customer_skew=options["customer_skew"],
+                product_skew=options["product_skew"],
+                days=options["days"],
+                end=end,
+                price_median=options["price_median"],
+                low_stock_ratio=options["low_stock_ratio"],
+                using=database,
+                progress=lambda message: self.stdout.write(f"  {message}"),
+            )
+            generator.generate(customers=customers, products=products, orders=orders)
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Added {customers} customers, {products} products and {orders} orders"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from crm.models import CustomerStats
+
+
+class Command(BaseCommand):
+    help = "Recompute CustomerStats (order count, lifetime value, last order) from the orders table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT (default: 1000).")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database alias to rebuild.")
+
+    def handle(self, *args, batch_size, database, **options):
+        created = CustomerStats.objects.db_manager(database).rebuild(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {created} customers"))
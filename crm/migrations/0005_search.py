@@ -0,0 +1,62 @@
+# Generated by Django 5.2.7 on 2026-10-17 11:20
+
+from django.db import migrations
+
+# PostgreSQL: trigram GIN indexes on the expression icontains compiles to
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    'CREATE INDEX IF NOT EXISTS crm_customer_name_trgm ON crm_customer USING gin (UPPER("name"::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS crm_customer_email_trgm ON crm_customer USING gin (UPPER("email"::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS crm_product_name_trgm ON crm_product USING gin (UPPER("name"::text) gin_trgm_ops)',
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS crm_customer_name_trgm",
+    "DROP INDEX IF EXISTS crm_customer_email_trgm",
+    "DROP INDEX IF EXISTS crm_product_name_trgm",
+]
+
+# SQLite: FTS5 shadow tables (rowid = pk), filled from the existing rows
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS crm_customer_search USING fts5(name, email, tokenize='trigram')",
+    "INSERT INTO crm_customer_search (rowid, name, email) SELECT id, name, email FROM crm_customer",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS crm_product_search USING fts5(name, tokenize='trigram')",
+    "INSERT INTO crm_product_search (rowid, name) SELECT id, name FROM crm_product",
+]
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS crm_customer_search",
+    "DROP TABLE IF EXISTS crm_product_search",
+]
+
+
+def _sqlite_has_trigram_fts(connection):
+    return connection.Database.sqlite_version_info >= (3, 34)
+
+
+def forwards(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        statements = POSTGRES_FORWARD
+    elif connection.vendor == "sqlite" and _sqlite_has_trigram_fts(connection):
+        statements = SQLITE_FORWARD
+    else:
+        # other databases fall back to icontains
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for sql in {"postgresql": POSTGRES_REVERSE, "sqlite": SQLITE_REVERSE}.get(vendor, []):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0004_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-17 14:05
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_stats(apps, schema_editor):
+    Order = apps.get_model("crm", "Order")
+    CustomerStats = apps.get_model("crm", "CustomerStats")
+    rows = (
+        Order.objects.using(schema_editor.connection.alias)
+        .order_by("customer_id")
+        .values("customer_id")
+        .annotate(
+            order_count=models.Count("pk"),
+            lifetime_value=models.Sum("total_amount"),
+            last_order_at=models.Max("order_date"),
+        )
+    )
+    CustomerStats.objects.using(schema_editor.connection.alias).bulk_create(
+        [CustomerStats(**row) for row in rows.iterator()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crm", "0005_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CustomerStats",
+            fields=[
+                (
+                    "customer",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="crm.customer",
+                    ),
+                ),
+                ("order_count", models.PositiveIntegerField(default=0)),
+                ("lifetime_value", models.DecimalField(decimal_places=2, default=Decimal("0.00"), max_digits=14)),
+                ("last_order_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["last_order_at"], name="crm_custstats_last_order_idx")],
+            },
+        ),
+        migrations.RunPython(build_stats, migrations.RunPython.noop),
+    ]
@@ -1,27 +1,195 @@
 # crm/models.py
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Case, Count, F, Max, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Lower
 from django.core.validators import RegexValidator, MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
+from itertools import islice
+
+from .response_cache import bump_versions
+from .subscriptions import publish_stock_changed
 
 phone_validator = RegexValidator(
     regex=r'^\+?\d[\d\-]{6,}\d$',
     message="Phone number must be something like +1234567890 or 123-456-7890"
 )
 
+class CustomerManager(models.Manager):
+    def inactive_since(self, cutoff):
+        """
+        Customers with no order at or after ``cutoff`` (including those with
+        no orders at all): a range scan of CustomerStats.last_order_at plus
+        the customers without a stats row.
+        """
+        stale = CustomerStats.objects.db_manager(self.db).filter(last_order_at__lt=cutoff).values("customer_id")
+        return self.get_queryset().filter(Q(pk__in=stale) | Q(stats__isnull=True))
+
+    def purge(self, pks):
+        """
+        Delete the customers ``pks`` with their orders, order items, stats and
+        search rows using one set-based DELETE per table, skipping the
+        collector that ``QuerySet.delete()`` uses for CASCADE (it loads every
+        related row and sends a signal per object). Run it in a transaction.
+        Returns (customers deleted, orders deleted).
+        """
+        from .search import get_search_backend
+
+        if not pks:
+            return 0, 0
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        through = Order.products.through
+        placeholders = ", ".join(["%s"] * len(pks))
+        orders_of = (
+            f"SELECT {qn(Order._meta.pk.column)} FROM {qn(Order._meta.db_table)} "
+            f"WHERE {qn(Order._meta.get_field('customer').column)} IN ({placeholders})"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {qn(through._meta.db_table)} "
+                f"WHERE {qn(through._meta.get_field('order').column)} IN ({orders_of})",
+                pks,
+            )
+            cursor.execute(
+                f"DELETE FROM {qn(Order._meta.db_table)} "
+                f"WHERE {qn(Order._meta.get_field('customer').column)} IN ({placeholders})",
+                pks,
+            )
+            orders = cursor.rowcount
+            cursor.execute(
+                f"DELETE FROM {qn(CustomerStats._meta.db_table)} "
+                f"WHERE {qn(CustomerStats._meta.get_field('customer').column)} IN ({placeholders})",
+                pks,
+            )
+            get_search_backend(self.db).remove(Customer, pks)
+            cursor.execute(
+                f"DELETE FROM {qn(Customer._meta.db_table)} WHERE {qn(Customer._meta.pk.column)} IN ({placeholders})",
+                pks,
+            )
+            customers = cursor.rowcount
+        # no delete signals were sent
+        bump_versions(Customer, Order, CustomerStats, using=self.db)
+        return customers, orders
+
+
 class Customer(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
     phone = models.CharField(max_length=20, blank=True, null=True, validators=[phone_validator])
     created_at = models.DateTimeField(auto_now_add=True, null=True)
 
+    objects = CustomerManager()
+
+    class Meta:
+        indexes = [
+            # keyset pagination / created_at range filters
+            models.Index(fields=["created_at", "id"], name="crm_customer_created_id_idx"),
+            # phone_pattern (startswith); the opclass only applies on PostgreSQL
+            models.Index(fields=["phone"], name="crm_customer_phone_idx", opclasses=["varchar_pattern_ops"]),
+            # case-insensitive email uniqueness checks (LOWER(email) IN ...)
+            models.Index(Lower("email"), name="crm_customer_email_lower_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} <{self.email}>"
 
+class ProductManager(models.Manager):
+    def restock_below(self, threshold, increment):
+        """
+        Add ``increment`` to the stock of every product with stock < ``threshold``
+        in one atomic UPDATE and return the updated products.
+
+        Uses UPDATE ... RETURNING where the backend supports it; otherwise the
+        rows are locked with SELECT ... FOR UPDATE first so concurrent orders
+        cannot interleave between the update and the read-back.
+        """
+        connection = connections[self.db]
+        if _supports_update_returning(connection):
+            qn = connection.ops.quote_name
+            stock = qn(Product._meta.get_field("stock").column)
+            columns = ", ".join(qn(f.column) for f in Product._meta.concrete_fields)
+            sql = (
+                f"UPDATE {qn(Product._meta.db_table)} SET {stock} = {stock} + %s "
+                f"WHERE {stock} < %s RETURNING {columns}"
+            )
+            with transaction.atomic(using=self.db):
+                products = list(Product.objects.db_manager(self.db).raw(sql, [increment, threshold]))
+                bump_versions(Product, using=self.db)
+                publish_stock_changed([p.pk for p in products], using=self.db)
+            return sorted(products, key=lambda p: p.pk)
+
+        qs = self.get_queryset()
+        with transaction.atomic(using=self.db):
+            ids = list(qs.select_for_update().filter(stock__lt=threshold).values_list("pk", flat=True))
+            if not ids:
+                return []
+            qs.filter(pk__in=ids).update(stock=models.F("stock") + increment)
+            bump_versions(Product, using=self.db)
+            publish_stock_changed(ids, using=self.db)
+            return list(qs.filter(pk__in=ids).order_by("pk"))
+
+
+    def reserve_stock(self, quantities):
+        """
+        Decrement stock by ``quantities`` ({product id: qty}) with conditional
+        UPDATE ... SET stock = stock - qty WHERE stock >= qty statements, one per
+        distinct quantity. Must run inside the caller's transaction; raises
+        InsufficientStock (so the caller rolls back) if any product is short.
+        """
+        by_quantity = {}
+        for pk, qty in quantities.items():
+            by_quantity.setdefault(qty, []).append(pk)
+        qs = self.get_queryset()
+        for qty, ids in by_quantity.items():
+            updated = qs.filter(pk__in=ids, stock__gte=qty).update(stock=models.F("stock") - qty)
+            if updated != len(ids):
+                raise InsufficientStock(quantities)
+        bump_versions(Product, using=self.db)
+        publish_stock_changed(quantities, using=self.db)
+
+    def short_of(self, quantities):
+        """Return the products that cannot cover ``quantities`` ({product id: qty})."""
+        return [p for p in self.get_queryset().filter(pk__in=quantities).order_by("pk") if p.stock < quantities[p.pk]]
+
+
+class InsufficientStock(Exception):
+    def __init__(self, quantities):
+        super().__init__("Insufficient stock")
+        self.quantities = quantities
+
+
+def _supports_upsert(connection):
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 24)
+    return False
+
+
+def _supports_update_returning(connection):
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
 class Product(models.Model):
     name = models.CharField(max_length=100)
     price = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(Decimal("0.01"))])
     stock = models.PositiveIntegerField(default=0)
 
+    objects = ProductManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["price", "id"], name="crm_product_price_id_idx"),
+            models.Index(fields=["stock"], name="crm_product_stock_idx"),
+            # the restock job only ever looks at low-stock rows
+            models.Index(fields=["stock"], name="crm_product_low_stock_idx", condition=models.Q(stock__lt=10)),
+        ]
+
     def __str__(self):
         return f"{self.name} (${self.price})"
 
@@ -29,7 +197,22 @@ class Order(models.Model):
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name="orders")
     products = models.ManyToManyField(Product, related_name="orders")
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-    order_date = models.DateTimeField(auto_now_add=True)
+    # default rather than auto_now_add so callers (imports, CreateOrder) can set it
+    order_date = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["order_date", "id"], name="crm_order_date_id_idx"),
+            models.Index(fields=["customer", "order_date"], name="crm_order_customer_date_idx"),
+            models.Index(fields=["total_amount"], name="crm_order_total_amount_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the stored customer, so a save that moves the order refreshes both customers' stats
+        instance._loaded_customer_id = instance.__dict__.get("customer_id")
+        return instance
 
     def calculate_total(self):
         total = sum(p.price for p in self.products.all())
@@ -38,3 +221,125 @@ class Order(models.Model):
 
     def __str__(self):
         return f"Order {self.id} by {self.customer}"
+
+
+class CustomerStatsManager(models.Manager):
+    def record_orders(self, orders):
+        """
+        Add newly inserted ``orders`` to their customers' stats.
+
+        Uses one INSERT ... ON CONFLICT DO UPDATE (order_count = order_count + n,
+        ...) where the backend supports it; otherwise inserts the missing rows
+        and increments them with a CASE per customer.
+        """
+        totals = {}
+        for order in orders:
+            count, value, last = totals.get(order.customer_id, (0, Decimal("0"), order.order_date))
+            totals[order.customer_id] = (count + 1, value + order.total_amount, max(last, order.order_date))
+        if not totals:
+            return
+        connection = connections[self.db]
+        if _supports_upsert(connection):
+            self._upsert_increments(connection, totals)
+        else:
+            self._update_increments(connection, totals)
+        bump_versions(CustomerStats, using=self.db)
+
+    def _upsert_increments(self, connection, totals):
+        qn = connection.ops.quote_name
+        table = qn(CustomerStats._meta.db_table)
+        fields = [CustomerStats._meta.get_field(name) for name in ("customer", "order_count", "lifetime_value", "last_order_at")]
+        customer, count, value, last = (qn(f.column) for f in fields)
+        rows = [(pk, *totals[pk]) for pk in sorted(totals)]
+        batch_size = (connection.features.max_query_params or 1000) // len(fields)
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), batch_size):
+                chunk = rows[start:start + batch_size]
+                sql = (
+                    f"INSERT INTO {table} ({customer}, {count}, {value}, {last}) VALUES "
+                    + ", ".join(["(%s, %s, %s, %s)"] * len(chunk))
+                    + f" ON CONFLICT ({customer}) DO UPDATE SET"
+                    f" {count} = {table}.{count} + excluded.{count},"
+                    f" {value} = {table}.{value} + excluded.{value},"
+                    f" {last} = CASE WHEN {table}.{last} IS NULL OR {table}.{last} < excluded.{last}"
+                    f" THEN excluded.{last} ELSE {table}.{last} END"
+                )
+                params = [f.get_db_prep_save(v, connection) for row in chunk for f, v in zip(fields, row)]
+                cursor.execute(sql, params)
+
+    def _update_increments(self, connection, totals):
+        self.bulk_create([CustomerStats(customer_id=pk) for pk in totals], ignore_conflicts=True)
+        ids = sorted(totals)
+        # each customer appears in three CASEs
+        batch_size = min(500, (connection.features.max_query_params or 4000) // 8 or 1)
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+
+            def case(index, output_field):
+                return Case(*[When(customer_id=pk, then=Value(totals[pk][index])) for pk in chunk], output_field=output_field)
+
+            last = case(2, models.DateTimeField())
+            self.get_queryset().filter(customer_id__in=chunk).update(
+                order_count=F("order_count") + case(0, models.PositiveIntegerField()),
+                lifetime_value=F("lifetime_value") + case(1, CustomerStats._meta.get_field("lifetime_value")),
+                last_order_at=Coalesce(Greatest(F("last_order_at"), last), last),
+            )
+
+    def refresh(self, customer_ids):
+        """Recompute the stats of ``customer_ids`` from their orders (after updates and deletes)."""
+        rows = self._aggregate(Order.objects.db_manager(self.db).filter(customer_id__in=customer_ids))
+        self.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["customer"],
+            update_fields=["order_count", "lifetime_value", "last_order_at"],
+        )
+        self.get_queryset().filter(customer_id__in=set(customer_ids) - {row.customer_id for row in rows}).delete()
+        bump_versions(CustomerStats, using=self.db)
+
+    def rebuild(self, batch_size=1000):
+        """Replace every row with stats computed from the orders table; returns the row count."""
+        created = 0
+        with transaction.atomic(using=self.db):
+            self.get_queryset().delete()
+            rows = self._aggregate(Order.objects.db_manager(self.db).all(), iterator=True)
+            while batch := list(islice(rows, batch_size)):
+                self.bulk_create(batch)
+                created += len(batch)
+            bump_versions(CustomerStats, using=self.db)
+        return created
+
+    def _aggregate(self, orders, iterator=False):
+        rows = (
+            orders.order_by("customer_id")
+            .values("customer_id")
+            .annotate(order_count=Count("pk"), lifetime_value=Sum("total_amount"), last_order_at=Max("order_date"))
+        )
+        stats = (CustomerStats(**row) for row in (rows.iterator() if iterator else rows))
+        return stats if iterator else list(stats)
+
+
+class CustomerStats(models.Model):
+    """
+    Per-customer order totals, kept in step with the orders table: inserts
+    through CustomerStatsManager.record_orders() (bulk paths) and the Order
+    signals in crm/signals.py; ``manage.py rebuild_customer_stats`` recomputes
+    them from scratch. Customers without orders have no row.
+    """
+
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    order_count = models.PositiveIntegerField(default=0)
+    lifetime_value = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    last_order_at = models.DateTimeField(null=True, blank=True)
+
+    objects = CustomerStatsManager()
+
+    class Meta:
+        indexes = [
+            # inactive-customer cleanup: last_order_at < cutoff
+            models.Index(fields=["last_order_at"], name="crm_custstats_last_order_idx"),
+        ]
+
+    def __str__(self):
+        return f"Stats for customer {self.customer_id}"
+
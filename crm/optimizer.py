@@ -0,0 +1,133 @@
+# crm/optimizer.py
+"""
+Translate a GraphQL selection set into ``only()`` / ``select_related()`` /
+``Prefetch()`` calls on the queryset that backs it.
+
+Only model fields that are actually selected are loaded, foreign keys and
+one-to-ones (either direction) are joined only when selected, and
+many-to-many / reverse foreign key relations are prefetched (recursively optimized) only when selected. Connection types are
+unwrapped through ``edges { node { ... } }``.
+
+If a selected field does not map onto a model field (a custom resolver), the
+optimizer stops restricting columns for that model so the resolver never hits
+a deferred attribute.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode, get_named_type
+
+
+def optimize_queryset(queryset, info):
+    """Optimize ``queryset`` for the field currently being resolved by ``info``."""
+    gql_type = get_named_type(info.return_type)
+    selections = _collect_fields([node.selection_set for node in info.field_nodes], info)
+    gql_type, selections = _unwrap_connection(gql_type, selections, info)
+    return _apply(queryset, gql_type, selections, info)
+
+
+def get_prefetched(instance, name):
+    """Return the prefetched result for ``name`` on ``instance``, or None."""
+    return getattr(instance, "_prefetched_objects_cache", {}).get(name)
+
+
+# ------------------------
+# Selection set helpers
+# ------------------------
+def _collect_fields(selection_sets, info, fields=None):
+    """Merge selections (following fragments) into {field name: [FieldNode, ...]}."""
+    if fields is None:
+        fields = {}
+    for selection_set in selection_sets:
+        if selection_set is None:
+            continue
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                fields.setdefault(selection.name.value, []).append(selection)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = info.fragments.get(selection.name.value)
+                if fragment is not None:
+                    _collect_fields([fragment.selection_set], info, fields)
+            elif isinstance(selection, InlineFragmentNode):
+                _collect_fields([selection.selection_set], info, fields)
+    return fields
+
+
+def _sub_fields(nodes, info):
+    return _collect_fields([node.selection_set for node in nodes], info)
+
+
+def _unwrap_connection(gql_type, selections, info):
+    """For a Relay connection type, return the node type and its selections."""
+    fields = getattr(gql_type, "fields", None) or {}
+    if "edges" not in fields:
+        return gql_type, selections
+    edge_type = get_named_type(fields["edges"].type)
+    node_type = get_named_type(edge_type.fields["node"].type)
+    edges = _sub_fields(selections.get("edges", []), info)
+    return node_type, _sub_fields(edges.get("node", []), info)
+
+
+# ------------------------
+# Planning
+# ------------------------
+def _plan(model, gql_type, selections, info):
+    """
+    Work out what ``model`` needs for ``selections``.
+
+    Returns (only, select_related, prefetches, complete), where ``prefetches``
+    is a list of (lookup, queryset) pairs and ``complete`` is False when some
+    selected field is not a plain model field.
+    """
+    only = {model._meta.pk.name}
+    related = []
+    prefetches = []
+    complete = True
+    gql_fields = getattr(gql_type, "fields", None) or {}
+
+    for name, nodes in selections.items():
+        if name.startswith("__") or name == "id":
+            continue
+        try:
+            field = model._meta.get_field(to_snake_case(name))
+        except FieldDoesNotExist:
+            complete = False
+            continue
+
+        if not field.is_relation:
+            only.add(field.name)
+            continue
+
+        field_def = gql_fields.get(name)
+        sub_type = get_named_type(field_def.type) if field_def else None
+        sub_type, sub_selections = _unwrap_connection(sub_type, _sub_fields(nodes, info), info)
+
+        if field.many_to_one or field.one_to_one:
+            sub_only, sub_related, sub_prefetches, sub_complete = _plan(
+                field.related_model, sub_type, sub_selections, info
+            )
+            if field.concrete:
+                only.add(field.name)
+            if sub_complete:
+                only.update(f"{field.name}__{f}" for f in sub_only)
+            related.append(field.name)
+            related.extend(f"{field.name}__{r}" for r in sub_related)
+            prefetches.extend((f"{field.name}__{lookup}", qs) for lookup, qs in sub_prefetches)
+        else:
+            related_qs = field.related_model._default_manager.all()
+            # reverse foreign keys need the column that points back at us
+            extra = [field.field.name] if field.one_to_many else []
+            prefetches.append((field.name, _apply(related_qs, sub_type, sub_selections, info, extra)))
+
+    return only, related, prefetches, complete
+
+
+def _apply(queryset, gql_type, selections, info, extra_only=()):
+    only, related, prefetches, complete = _plan(queryset.model, gql_type, selections, info)
+    if complete:
+        queryset = queryset.only(*sorted(only), *extra_only)
+    if related:
+        queryset = queryset.select_related(*related)
+    if prefetches:
+        queryset = queryset.prefetch_related(*[Prefetch(lookup, queryset=qs) for lookup, qs in prefetches])
+    return queryset
@@ -0,0 +1,322 @@
+# crm/pagination.py
+"""
+Keyset (seek) pagination for the Relay connections.
+
+The default graphene-django connection encodes an offset in its cursors, so
+deep pages make the database scan and throw away every preceding row. The
+connection field here encodes the values of the sort key (plus the primary
+key as a tie-breaker) in the cursor instead, and turns ``after``/``before``
+into a ``WHERE (k1, k2, ..., pk) > (v1, v2, ..., id)`` style predicate, so
+every page costs the same no matter how deep it is.
+
+The sort key is whatever ordering the queryset ends up with after the
+``orderBy`` / ``order_by`` OrderingFilter has been applied, falling back to
+the field's default ``ordering``. Requests using ``offset``, or orderings
+that cannot be expressed as a seek (related lookups, random order), fall
+back to offset cursors.
+
+Neither mode runs a ``COUNT(*)``: pages fetch ``first + 1`` rows to find out
+whether there is a next page, and the count is only computed when a client
+selects ``totalCount`` on the connection (see CountableConnection).
+"""
+import json
+from functools import partial
+from inspect import isawaitable
+
+import graphene
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Q, QuerySet
+from django.db.models.expressions import OrderBy
+from graphene.relay import PageInfo
+from graphene_django import DjangoConnectionField
+from graphene_django.filter import DjangoFilterConnectionField
+from graphql import GraphQLError
+from graphql_relay import get_offset_with_default, offset_to_cursor
+from graphql_relay.utils import base64, unbase64
+
+from .aio import alist, in_async_context, maybe_async
+
+CURSOR_PREFIX = "keyset:"
+
+
+# ------------------------
+# Counting
+# ------------------------
+def approximate_count(queryset):
+    """
+    Row count estimate from the query planner, for very large tables.
+
+    On PostgreSQL this reads the planner's row estimate for the (filtered)
+    query from EXPLAIN; the estimate is used only when it is at least
+    CRM_APPROXIMATE_COUNT_THRESHOLD rows, since small tables count quickly and
+    exactly. Other backends keep no usable statistics and count exactly.
+    """
+    threshold = getattr(settings, "CRM_APPROXIMATE_COUNT_THRESHOLD", 100_000)
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate >= threshold:
+            return estimate
+    return queryset.count()
+
+
+class CountableConnection(graphene.relay.Connection):
+    """Connection with a ``totalCount`` that is only computed when selected."""
+
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int(
+        approximate=graphene.Boolean(default_value=False),
+        description="Number of items matching the filters. With approximate: true, "
+        "large tables return the query planner's estimate instead of counting.",
+    )
+
+    def resolve_total_count(self, info, approximate=False):
+        length = getattr(self, "length", None)
+        if length is not None:
+            return length
+        iterable = self.iterable
+        if isinstance(iterable, QuerySet):
+            if approximate:
+                return maybe_async(approximate_count, iterable)
+            return iterable.acount() if in_async_context() else iterable.count()
+        return len(iterable)
+
+
+# ------------------------
+# Cursors
+# ------------------------
+def encode_cursor(instance, keys):
+    values = []
+    for field, _desc in keys:
+        value = field.value_from_object(instance)
+        values.append(None if value is None else field.value_to_string(instance))
+    return base64(CURSOR_PREFIX + json.dumps([[f.name for f, _ in keys], values]))
+
+
+def decode_cursor(cursor, keys):
+    try:
+        payload = unbase64(cursor)
+        if not payload.startswith(CURSOR_PREFIX):
+            raise ValueError
+        names, values = json.loads(payload[len(CURSOR_PREFIX):])
+    except (ValueError, TypeError):
+        raise GraphQLError(f"Invalid cursor: {cursor}")
+    if names != [f.name for f, _ in keys]:
+        raise GraphQLError("Cursor does not match the requested ordering")
+    return [None if v is None else field.to_python(v) for (field, _), v in zip(keys, values)]
+
+
+# ------------------------
+# Ordering and seek predicates
+# ------------------------
+def ordering_keys(queryset):
+    """Return [(model field, descending)] for the queryset ordering, pk last.
+
+    Returns None if the ordering cannot be used for keyset pagination.
+    """
+    opts = queryset.model._meta
+    keys = []
+    for item in queryset.query.order_by or opts.ordering:
+        if isinstance(item, OrderBy) and isinstance(item.expression, F):
+            name, desc = item.expression.name, item.descending
+        elif isinstance(item, str) and item != "?":
+            name, desc = item.lstrip("-"), item.startswith("-")
+        else:
+            return None
+        if "__" in name:
+            return None
+        field = opts.pk if name == "pk" else opts.get_field(name)
+        if not field.concrete or field.is_relation:
+            return None
+        keys.append((field, desc))
+        if field.primary_key:
+            return keys
+    keys.append((opts.pk, keys[-1][1] if keys else False))
+    return keys
+
+
+def _order_expression(field, desc):
+    # nullable keys always sort NULLs last so the seek predicate stays simple
+    if field.null:
+        return F(field.attname).desc(nulls_last=True) if desc else F(field.attname).asc(nulls_last=True)
+    return f"-{field.attname}" if desc else field.attname
+
+
+def seek_predicate(keys, values, forward=True):
+    """Q matching rows strictly after (forward) or before the given key values."""
+    predicate = Q(pk__in=[])
+    ties = Q()
+    for (field, desc), value in zip(keys, values):
+        name = field.attname
+        if value is None:
+            # NULLs sort last: nothing non-null is after them, everything is before
+            beyond = Q(pk__in=[]) if forward else Q(**{f"{name}__isnull": False})
+            tie = Q(**{f"{name}__isnull": True})
+        else:
+            lookup = "lt" if desc == forward else "gt"
+            beyond = Q(**{f"{name}__{lookup}": value})
+            if forward and field.null:
+                beyond |= Q(**{f"{name}__isnull": True})
+            tie = Q(**{name: value})
+        predicate |= ties & beyond
+        ties &= tie
+    return predicate
+
+
+# ------------------------
+# Connection field
+# ------------------------
+class KeysetConnectionField(DjangoFilterConnectionField):
+    """DjangoFilterConnectionField whose cursors seek on the sort key."""
+
+    def __init__(self, type_, *args, ordering=("pk",), **kwargs):
+        self.ordering = ordering
+        super().__init__(type_, *args, **kwargs)
+
+    @classmethod
+    def resolve_ordered_queryset(cls, resolver, ordering, connection, iterable, info, args):
+        qs = resolver(connection, iterable, info, args)
+        if isinstance(qs, QuerySet) and not qs.query.order_by:
+            qs = qs.order_by(*ordering)
+        return qs
+
+    def get_queryset_resolver(self):
+        return partial(self.resolve_ordered_queryset, super().get_queryset_resolver(), self.ordering)
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        if not isinstance(iterable, QuerySet):
+            return super().resolve_connection(connection, args, iterable, max_limit=max_limit)
+        keys = ordering_keys(iterable)
+        if keys is None or args.get("offset"):
+            return cls.resolve_offset_connection(connection, args, iterable, max_limit=max_limit)
+
+        first, last = args.get("first"), args.get("last")
+        after, before = args.get("after"), args.get("before")
+        if first is None and last is None:
+            first = max_limit
+
+        qs = iterable.order_by(*[_order_expression(field, desc) for field, desc in keys])
+        loaded, deferred = qs.query.deferred_loading
+        if loaded and not deferred:
+            # the cursor needs the key columns even if the selection did not ask for them
+            qs = qs.only(*loaded, *[field.name for field, _ in keys])
+        if after:
+            qs = qs.filter(seek_predicate(keys, decode_cursor(after, keys), forward=True))
+        if before:
+            qs = qs.filter(seek_predicate(keys, decode_cursor(before, keys), forward=False))
+
+        if first is None and last is not None:
+            # paginating backwards from the end (or from ``before``)
+            qs = qs.reverse()[: last + 1]
+
+            def page(rows):
+                return rows[:last][::-1], len(rows) > last, bool(before)
+        elif first is None:
+            def page(rows):
+                return rows, bool(after), False
+        else:
+            qs = qs[: first + 1]
+
+            def page(rows):
+                has_previous, has_next = bool(after), len(rows) > first
+                rows = rows[:first]
+                if last is not None and len(rows) > last:
+                    rows, has_previous = rows[-last:], True
+                return rows, has_previous, has_next
+
+        def build(rows):
+            rows, has_previous, has_next = page(rows)
+            cursors = [encode_cursor(row, keys) for row in rows]
+            return _build_connection(connection, iterable, rows, cursors, has_previous, has_next)
+
+        if in_async_context():
+            return _afetch(qs, build)
+        return build(list(qs))
+
+    @classmethod
+    def resolve_offset_connection(cls, connection, args, iterable, max_limit=None):
+        """Offset cursors, fetching ``first + 1`` rows instead of counting."""
+        first, last = args.get("first"), args.get("last")
+        before = args.get("before")
+        if first is None and last is not None and before is None:
+            # the end of the list can only be found by counting
+            return maybe_async(super().resolve_connection, connection, args, iterable, max_limit=max_limit)
+        if first is None and last is None:
+            first = max_limit
+
+        start = get_offset_with_default(args.get("after"), -1) + 1 + (args.get("offset") or 0)
+        end = get_offset_with_default(before, None)
+        stop = None if first is None else start + first + 1
+        if end is not None:
+            stop = end if stop is None else min(stop, end)
+        qs = iterable[start:] if stop is None else iterable[start:max(stop, start)]
+
+        def build(rows):
+            offset = start
+            has_next = end is not None
+            if first is not None and len(rows) > first:
+                rows, has_next = rows[:first], True
+            has_previous = offset > 0
+            if last is not None and len(rows) > last:
+                offset += len(rows) - last
+                rows, has_previous = rows[-last:], True
+            cursors = [offset_to_cursor(offset + i) for i in range(len(rows))]
+            return _build_connection(connection, iterable, rows, cursors, has_previous, has_next)
+
+        if in_async_context():
+            return _afetch(qs, build)
+        return build(list(qs))
+
+
+class RelatedConnectionField(DjangoConnectionField):
+    """
+    Connection over a relation whose resolver may return an awaitable (a
+    loader call made from the async view); the page is built once it resolves.
+    """
+
+    @classmethod
+    def connection_resolver(cls, resolver, connection, default_manager, queryset_resolver,
+                            max_limit, enforce_first_or_last, root, info, **args):
+        value = resolver(root, info, **args)
+        base = super().connection_resolver
+
+        def resolve(value):
+            return base(lambda *_, **__: value, connection, default_manager, queryset_resolver,
+                        max_limit, enforce_first_or_last, root, info, **args)
+
+        if isawaitable(value):
+            async def await_value():
+                return resolve(await value)
+            return await_value()
+        return resolve(value)
+
+
+async def _afetch(queryset, build):
+    chunk_size = getattr(settings, "CRM_LIST_CHUNK_SIZE", 200)
+    return build(await alist(queryset.aiterator(chunk_size=chunk_size)))
+
+
+def _build_connection(connection, iterable, rows, cursors, has_previous, has_next):
+    edges = [connection.Edge(node=row, cursor=cursor) for row, cursor in zip(rows, cursors)]
+    result = connection(
+        edges=edges,
+        page_info=PageInfo(
+            start_cursor=cursors[0] if cursors else None,
+            end_cursor=cursors[-1] if cursors else None,
+            has_previous_page=has_previous,
+            has_next_page=has_next,
+        ),
+    )
+    # CountableConnection counts this lazily if totalCount is selected
+    result.iterable = iterable
+    return result
@@ -0,0 +1,106 @@
+# crm/persisted.py
+"""
+Automatic persisted queries and a cache of parsed, validated documents.
+
+Clients may send ``extensions.persistedQuery.sha256Hash`` instead of the query
+text (the Apollo APQ protocol). An unknown hash is answered with a
+``PersistedQueryNotFound`` error, after which the client resends the text
+together with its hash once; the pair is stored in Django's cache
+(CRM_PERSISTED_QUERY_CACHE) so every worker can serve the hash from then on.
+
+Independently of how it arrived, each document is parsed and run through the
+standard validation rules once per process and kept in a bounded LRU
+(CRM_DOCUMENT_CACHE_SIZE) keyed by its SHA-256, so a repeated query costs a
+hash instead of a parse + validate. Rules that depend on the request (the
+cost rule in crm.validation) still run every time.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import GraphQLError, parse, specified_rules, validate
+
+CACHE_PREFIX = "crm:apq:"
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class DocumentCache:
+    """Thread-safe LRU of {sha256: DocumentNode} for documents that passed validation."""
+
+    def __init__(self, schema, size=None):
+        self.schema = schema
+        self.size = size if size is not None else getattr(settings, "CRM_DOCUMENT_CACHE_SIZE", 256)
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query, sha256=None):
+        """Return (document, errors) for ``query``; raises GraphQLSyntaxError."""
+        key = sha256 or query_hash(query)
+        with self._lock:
+            document = self._documents.get(key)
+            if document is not None:
+                self._documents.move_to_end(key)
+                return document, []
+        document = parse(query)
+        errors = validate(self.schema, document, specified_rules)
+        if not errors:
+            # invalid documents are not kept, so they cannot push out valid ones
+            with self._lock:
+                self._documents[key] = document
+                while len(self._documents) > self.size:
+                    self._documents.popitem(last=False)
+        return document, errors
+
+
+_document_caches = {}
+_document_caches_lock = threading.Lock()
+
+
+def get_document_cache(schema):
+    """The process-wide DocumentCache for ``schema`` (a GraphQLSchema)."""
+    with _document_caches_lock:
+        if schema not in _document_caches:
+            _document_caches[schema] = DocumentCache(schema)
+        return _document_caches[schema]
+
+
+def persisted_query_hash(extensions):
+    """The sha256Hash from a request's ``extensions`` (dict or JSON string), or None."""
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            return None
+    if not isinstance(extensions, dict):
+        return None
+    persisted = extensions.get("persistedQuery")
+    if not isinstance(persisted, dict):
+        return None
+    if persisted.get("version", 1) != 1:
+        raise GraphQLError("Unsupported persisted query version", extensions={"code": "PERSISTED_QUERY_NOT_SUPPORTED"})
+    return persisted.get("sha256Hash")
+
+
+def resolve_persisted_query(query, sha256):
+    """
+    Return the query text for a request carrying ``sha256``.
+
+    With only a hash, the text is looked up; with both, the hash is checked and
+    the pair registered.
+    """
+    cache = caches[getattr(settings, "CRM_PERSISTED_QUERY_CACHE", "default")]
+    if not query:
+        query = cache.get(CACHE_PREFIX + sha256)
+        if query is None:
+            raise GraphQLError("PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"})
+        return query
+    if query_hash(query) != sha256:
+        raise GraphQLError("provided sha does not match query", extensions={"code": "PERSISTED_QUERY_HASH_MISMATCH"})
+    cache.set(CACHE_PREFIX + sha256, query, getattr(settings, "CRM_PERSISTED_QUERY_TIMEOUT", None))
+    return query
@@ -0,0 +1,94 @@
+# crm/reports.py
+"""
+CRM statistics computed in the database.
+
+Totals come from one ``aggregate(Count, Sum)`` over the orders (plus a
+customer count) and the per-day / per-week breakdowns from one grouped query
+each, so the report cost no longer depends on serializing every order.
+Revenue stays a Decimal end to end.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import cached_property
+
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from .models import Customer, Order
+
+
+def _money(value):
+    # SQLite hands SUM() back without the column's scale
+    places = Order._meta.get_field("total_amount").decimal_places
+    return (value or Decimal(0)).quantize(Decimal(1).scaleb(-places))
+
+
+class CRMStats:
+    """Lazily computed statistics for orders placed in [since, until)."""
+
+    def __init__(self, since=None, until=None):
+        self.since = since
+        self.until = until
+
+    def orders(self):
+        qs = Order.objects.all()
+        if self.since is not None:
+            qs = qs.filter(order_date__gte=self.since)
+        if self.until is not None:
+            qs = qs.filter(order_date__lt=self.until)
+        return qs
+
+    @cached_property
+    def total_customers(self):
+        return Customer.objects.count()
+
+    @cached_property
+    def _totals(self):
+        return self.orders().aggregate(orders=Count("pk"), revenue=Sum("total_amount"))
+
+    @property
+    def total_orders(self):
+        return self._totals["orders"]
+
+    @property
+    def total_revenue(self):
+        return _money(self._totals["revenue"])
+
+    def daily(self, days=7):
+        """Orders and revenue for each of the last ``days`` days (zero-filled)."""
+        end = self._end_date()
+        start = end - timedelta(days=days - 1)
+        return self._breakdown(TruncDate("order_date"), start, end, timedelta(days=1))
+
+    def weekly(self, weeks=4):
+        """Orders and revenue for each of the last ``weeks`` ISO weeks (zero-filled)."""
+        end = self._end_date()
+        end -= timedelta(days=end.weekday())
+        start = end - timedelta(weeks=weeks - 1)
+        return self._breakdown(TruncWeek("order_date", output_field=DateField()), start, end, timedelta(weeks=1))
+
+    def _end_date(self):
+        if self.until is not None:
+            return timezone.localdate(self.until - timedelta(microseconds=1))
+        return timezone.localdate()
+
+    def _breakdown(self, trunc, start, end, step):
+        tz = timezone.get_current_timezone()
+        lower = datetime.combine(start, time.min, tzinfo=tz)
+        upper = datetime.combine(end + step, time.min, tzinfo=tz)
+        qs = self.orders().filter(order_date__gte=lower, order_date__lt=upper)
+        found = {
+            row["period"]: row
+            for row in qs.annotate(period=trunc)
+            .values("period")
+            .annotate(orders=Count("pk"), revenue=Sum("total_amount"))
+            .order_by("period")
+        }
+        rows = []
+        day = start
+        while day <= end:
+            row = found.get(day, {"orders": 0, "revenue": None})
+            rows.append({"period": day, "orders": row["orders"], "revenue": _money(row["revenue"])})
+            day += step
+        return rows
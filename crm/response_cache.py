@@ -0,0 +1,122 @@
+# crm/response_cache.py
+"""
+Response cache for read-only CRM queries.
+
+Query operations whose root fields are all catalog reads (CACHEABLE_FIELDS)
+are answered from Django's cache (CRM_RESPONSE_CACHE, for CRM_RESPONSE_CACHE_TIMEOUT
+seconds; 0, the default, disables it). The key is the normalized (re-printed) document,
+the operation name, the variables and the current *version* of every model
+the selection can reach, e.g. ``{ allOrders { edges { node { customer { name } } } } }``
+depends on Order and Customer.
+
+Writes never delete entries; they bump the version counter of the model
+instead, which moves every dependent query to a new key. post_save,
+post_delete and m2m_changed bump through crm/signals.py; bulk inserts and
+queryset updates, which send no signals, call bump_versions() themselves.
+Bumps run on commit, so a read racing an open transaction cannot cache the
+old rows under the new version.
+
+The counters live in the same cache as the responses, so it must be shared by
+every process that writes: with a per-process LocMemCache, a write in one
+worker (or in a cron/Celery process) never invalidates another worker's
+entries. The crm.W001 system check warns about that configuration.
+"""
+import hashlib
+import json
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from graphql import OperationType, TypeInfo, TypeInfoVisitor, Visitor, get_named_type, print_ast, visit
+from graphql.language import FieldNode
+
+CACHE_PREFIX = "crm:response:"
+VERSION_PREFIX = "crm:version:"
+
+# root fields whose results may be cached
+CACHEABLE_FIELDS = {"allCustomers", "allProducts", "allOrders", "customers", "products", "orders", "__typename"}
+
+
+def get_cache():
+    return caches[getattr(settings, "CRM_RESPONSE_CACHE", "default")]
+
+
+def get_timeout():
+    return getattr(settings, "CRM_RESPONSE_CACHE_TIMEOUT", 0)
+
+
+# ------------------------
+# Version counters
+# ------------------------
+def _version_key(model):
+    return VERSION_PREFIX + model._meta.label_lower
+
+
+def model_versions(models):
+    """Return {model label: version}, initializing counters that are missing."""
+    cache = get_cache()
+    keys = {_version_key(model): model for model in models}
+    versions = cache.get_many(keys)
+    for key in keys.keys() - versions.keys():
+        # a fresh value, so a counter that was evicted cannot repeat an old version
+        cache.add(key, time.time_ns())
+        versions[key] = cache.get(key)
+    return {key[len(VERSION_PREFIX):]: value for key, value in versions.items()}
+
+
+def _bump(models):
+    cache = get_cache()
+    for model in models:
+        try:
+            cache.incr(_version_key(model))
+        except ValueError:
+            cache.add(_version_key(model), time.time_ns())
+
+
+def bump_versions(*models, using=None):
+    """Invalidate every cached response that depends on ``models`` (on commit)."""
+    transaction.on_commit(partial(_bump, models), using=using)
+
+
+# ------------------------
+# Keys
+# ------------------------
+def _model_for(gql_type):
+    meta = getattr(getattr(gql_type, "graphene_type", None), "_meta", None)
+    model = getattr(meta, "model", None)
+    node = getattr(meta, "node", None)
+    if model is None and node is not None:
+        # a connection type: depends on its node's model
+        model = getattr(node._meta, "model", None)
+    return model
+
+
+class _ModelCollector(Visitor):
+    def __init__(self, type_info):
+        super().__init__()
+        self.type_info = type_info
+        self.models = set()
+
+    def enter_field(self, node, *args):
+        model = _model_for(get_named_type(self.type_info.get_type()))
+        if model is not None:
+            self.models.add(model)
+
+
+def response_key(schema, document, operation, operation_name, variables):
+    """The cache key for executing ``operation``, or None if it is not cacheable."""
+    if not get_timeout() or operation is None or operation.operation != OperationType.QUERY:
+        return None
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, FieldNode) or selection.name.value not in CACHEABLE_FIELDS:
+            return None
+
+    type_info = TypeInfo(schema)
+    collector = _ModelCollector(type_info)
+    visit(document, TypeInfoVisitor(type_info, collector))
+    versions = model_versions(sorted(collector.models, key=lambda m: m._meta.label_lower))
+
+    payload = json.dumps([print_ast(document), operation_name, variables or {}, versions], sort_keys=True, default=str)
+    return CACHE_PREFIX + hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -3,13 +3,27 @@ import graphene
 from crm.models import Product
 from graphene import relay
 from graphene_django import DjangoObjectType
-from django.db import transaction
+from graphene_django.utils import bypass_get_queryset
+from graphql import GraphQLError
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError as DjangoValidationError
 from decimal import Decimal
 import re
-from .models import Customer, Product, Order
+from collections import Counter
+from .models import Customer, CustomerStats, Product, Order, InsufficientStock
 from .filters import CustomerFilter, ProductFilter, OrderFilter
+from .loaders import get_loaders, reset_loaders, track_peers
+from .optimizer import get_prefetched, optimize_queryset
+from .aio import alist, in_async_context, maybe_async
+from .pagination import CountableConnection, KeysetConnectionField, RelatedConnectionField
+from .reports import CRMStats
+from .response_cache import bump_versions
+from .search import get_search_backend
+from .subscriptions import ORDER_CREATED, STOCK_CHANGED, get_broker, publish_orders_created, publish_stock_changed
 import django_filters
 from graphene_django.filter import DjangoFilterConnectionField
 
@@ -18,35 +32,86 @@ from graphene_django.filter import DjangoFilterConnectionField
 # Graphene types
 # ------------------------
 # --- types should expose relay.Node for connection usage
+class CustomerStatsType(DjangoObjectType):
+    class Meta:
+        model = CustomerStats
+        fields = ("order_count", "lifetime_value", "last_order_at")
+
+
 class CustomerType(DjangoObjectType):
     class Meta:
         model = Customer
         interfaces = (relay.Node,)
-        fields = ("id", "name", "email", "phone", "created_at")
+        connection_class = CountableConnection
+        fields = ("id", "name", "email", "phone", "created_at", "orders", "stats")
+
+    # declared so the loader fallback may be awaited under the async view
+    orders = RelatedConnectionField(lambda: OrderType, required=True)
+    # denormalized order totals (zeros for a customer without orders)
+    stats = graphene.Field(CustomerStatsType, required=True)
+
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        return track_peers(queryset)
+
+    def resolve_orders(self, info, **kwargs):
+        prefetched = get_prefetched(self, "orders")
+        if prefetched is not None:
+            return prefetched
+        return maybe_async(get_loaders(info).orders_for, self)
+
+    def resolve_stats(self, info):
+        if Customer.stats.is_cached(self):
+            # joined by the optimizer
+            return getattr(self, "stats", None) or CustomerStats(customer_id=self.pk)
+        return maybe_async(get_loaders(info).stats_for, self)
 
 class ProductType(DjangoObjectType):
     class Meta:
         model = Product
         interfaces = (relay.Node,)
+        connection_class = CountableConnection
         fields = ("id", "name", "price", "stock")
 
 class OrderType(DjangoObjectType):
     class Meta:
         model = Order
         interfaces = (relay.Node,)
+        connection_class = CountableConnection
         fields = ("id", "customer", "products", "total_amount", "order_date")
 
+    products = RelatedConnectionField(ProductType, required=True)
+
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        return track_peers(queryset)
+
+    # customer/products go through the request-scoped loaders unless the
+    # queryset already select_related/prefetch_related them
+    @bypass_get_queryset
+    def resolve_customer(self, info):
+        if Order.customer.is_cached(self):
+            return self.customer
+        return maybe_async(get_loaders(info).customer_for, self)
+
+    def resolve_products(self, info, **kwargs):
+        prefetched = get_prefetched(self, "products")
+        if prefetched is not None:
+            return prefetched
+        return maybe_async(get_loaders(info).products_for, self)
+
 
 # --- Query with filters
 class Query(graphene.ObjectType):
     # connections with filterset_class
-    all_customers = DjangoFilterConnectionField(CustomerType, filterset_class=CustomerFilter, orderBy=graphene.String())
-    all_products = DjangoFilterConnectionField(ProductType, filterset_class=ProductFilter, orderBy=graphene.String())
-    all_orders = DjangoFilterConnectionField(OrderType, filterset_class=OrderFilter, orderBy=graphene.String())
+    # keyset-paginated: cursors carry the sort key, see crm/pagination.py
+    all_customers = KeysetConnectionField(CustomerType, filterset_class=CustomerFilter, orderBy=graphene.String(), ordering=("created_at", "id"))
+    all_products = KeysetConnectionField(ProductType, filterset_class=ProductFilter, orderBy=graphene.String(), ordering=("price", "id"))
+    all_orders = KeysetConnectionField(OrderType, filterset_class=OrderFilter, orderBy=graphene.String(), ordering=("order_date", "id"))
 
     # fallback simple list resolvers (Graphene will prefer DjangoFilterConnectionField behavior)
     def resolve_all_customers(self, info, orderBy=None, **kwargs):
-        qs = Customer.objects.all()
+        qs = optimize_queryset(Customer.objects.all(), info)
         # apply django-filter filtering if kwargs provided by graphene (DjangoFilterConnectionField will do this automatically),
         # but we still support orderBy param for sorting:
         if orderBy:
@@ -55,13 +120,13 @@ class Query(graphene.ObjectType):
         return qs
 
     def resolve_all_products(self, info, orderBy=None, **kwargs):
-        qs = Product.objects.all()
+        qs = optimize_queryset(Product.objects.all(), info)
         if orderBy:
             qs = qs.order_by(*[f.strip() for f in orderBy.split(",")])
         return qs
 
     def resolve_all_orders(self, info, orderBy=None, **kwargs):
-        qs = Order.objects.select_related("customer").prefetch_related("products").all()
+        qs = optimize_queryset(Order.objects.all(), info)
         if orderBy:
             qs = qs.order_by(*[f.strip() for f in orderBy.split(",")])
         return qs
@@ -70,6 +135,68 @@ class Query(graphene.ObjectType):
 # ------------------------
 PHONE_REGEX = re.compile(r'^\+?\d[\d\-]{6,}\d$')
 
+def to_pk(model, value):
+    """Convert an ID argument to ``model``'s primary key type, or None if it is not one."""
+    try:
+        return model._meta.pk.to_python(value)
+    except DjangoValidationError:
+        return None
+
+
+def aware(value):
+    """A DateTime argument as an aware datetime; naive values are in the current time zone, as save() would read them."""
+    if value is not None and settings.USE_TZ and timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+def resolve_products(product_ids):
+    """
+    Look up all ``product_ids`` with one in_bulk() query.
+
+    Returns (products in input order, duplicates kept; invalid ids as strings).
+    """
+    keys = [to_pk(Product, pid) for pid in product_ids]
+    found = Product.objects.in_bulk({pk for pk in keys if pk is not None})
+    invalid_ids = [str(pid) for pid, pk in zip(product_ids, keys) if pk not in found]
+    return [found[pk] for pk in keys if pk in found], invalid_ids
+
+
+def insert_orders(rows):
+    """Insert [(row number, unsaved order, products)] and their through rows in bulk."""
+    orders = [order for _, order, _ in rows]
+    for order in orders:
+        order.pk = None
+    if connection.features.can_return_rows_from_bulk_insert:
+        Order.objects.bulk_create(orders)
+        # bulk_create sends no post_save, so the stats are updated here
+        CustomerStats.objects.record_orders(orders)
+    else:
+        # save() updates the stats through post_save
+        for order in orders:
+            order.save(force_insert=True)
+    through = Order.products.through
+    through.objects.bulk_create(
+        [through(order_id=order.pk, product_id=p.pk) for _, order, order_products in rows for p in order_products]
+    )
+    # neither bulk insert sends signals
+    bump_versions(Order)
+    publish_orders_created(orders)
+
+
+def existing_emails(emails):
+    """Return the lowercased subset of ``emails`` already used by a customer (case-insensitive)."""
+    lowered = list({e.lower() for e in emails})
+    found = set()
+    batch = connection.features.max_query_params or len(lowered) or 1
+    for start in range(0, len(lowered), batch):
+        found.update(
+            Customer.objects.annotate(email_lower=Lower("email"))
+            .filter(email_lower__in=lowered[start:start + batch])
+            .values_list("email_lower", flat=True)
+        )
+    return found
+
 def validate_phone(phone):
     if phone is None or phone == "":
         return True, None
@@ -103,8 +230,8 @@ class CreateCustomer(graphene.Mutation):
         if not valid_phone:
             return CreateCustomer(customer=None, success=False, message="Invalid phone format", errors=[phone_err])
 
-        # check unique email
-        if Customer.objects.filter(email__iexact=email).exists():
+        # check unique email (case-insensitive, served by the LOWER(email) index)
+        if existing_emails([email]):
             return CreateCustomer(customer=None, success=False, message="Email already exists", errors=["Email already exists"])
 
         customer = Customer.objects.create(name=name, email=email, phone=phone)
@@ -127,15 +254,16 @@ class BulkCreateCustomers(graphene.Mutation):
     Output = BulkCreateCustomersPayload
 
     def mutate(self, info, input):
-        created = []
         errors = []
-        # Use per-record atomic blocks so valid ones persist while invalid ones are skipped.
+        rows = []
+        # one IN query for every email in the batch instead of one lookup per row
+        taken = existing_emails(cust.get("email") or "" for cust in input)
         for idx, cust in enumerate(input, start=1):
             name = cust.get("name")
             email = cust.get("email")
             phone = cust.get("phone", None)
 
-            # basic validations
+            # basic validations, all in memory
             row_errors = []
             try:
                 validate_email(email)
@@ -145,20 +273,42 @@ class BulkCreateCustomers(graphene.Mutation):
             if not valid_phone:
                 row_errors.append(f"Row {idx}: {phone_err}")
 
-            if Customer.objects.filter(email__iexact=email).exists():
+            # duplicates against the database or an earlier row of this batch
+            if email.lower() in taken:
                 row_errors.append(f"Row {idx}: Email '{email}' already exists")
 
             if row_errors:
                 errors.extend(row_errors)
                 continue
+            taken.add(email.lower())
+            rows.append((idx, Customer(name=name, email=email, phone=phone)))
 
-            # create the customer in its own atomic block
+        created = []
+        batch_size = getattr(settings, "CRM_BULK_CREATE_BATCH_SIZE", 1000)
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
             try:
                 with transaction.atomic():
-                    c = Customer.objects.create(name=name, email=email, phone=phone)
-                    created.append(c)
-            except Exception as e:
-                errors.append(f"Row {idx}: Failed to create customer '{email}': {str(e)}")
+                    batch = Customer.objects.bulk_create([c for _, c in chunk])
+                    # bulk_create sends no post_save, so index for search here
+                    get_search_backend().index(batch, replace=False)
+                    bump_versions(Customer)
+                created.extend(batch)
+            except Exception:
+                # e.g. a concurrent insert of the same email: retry row by row to report it
+                for idx, customer in chunk:
+                    try:
+                        with transaction.atomic():
+                            customer.pk = None
+                            customer.save(force_insert=True)
+                            created.append(customer)
+                    except Exception as e:
+                        errors.append(f"Row {idx}: Failed to create customer '{customer.email}': {str(e)}")
+
+        if any(c.pk is None for c in created):
+            # backends that cannot return ids from a bulk insert
+            by_email = {c.email: c for c in Customer.objects.filter(email__in=[c.email for c in created])}
+            created = [by_email[c.email] for c in created]
 
         return BulkCreateCustomersPayload(customers=created, errors=errors)
 
@@ -193,6 +343,7 @@ class CreateProduct(graphene.Mutation):
             return CreateProduct(product=None, success=False, errors=["Stock must be an integer"])
 
         product = Product.objects.create(name=name, price=price, stock=stock)
+        publish_stock_changed([product.pk])
         return CreateProduct(product=product, success=True, errors=[])
 
 class CreateOrder(graphene.Mutation):
@@ -200,53 +351,120 @@ class CreateOrder(graphene.Mutation):
         customer_id = graphene.ID(required=True)
         product_ids = graphene.List(graphene.ID, required=True)
         order_date = graphene.DateTime(required=False)
+        # decrement Product.stock in the same transaction (defaults to CRM_RESERVE_STOCK)
+        reserve_stock = graphene.Boolean(required=False)
 
     order = graphene.Field(OrderType)
     success = graphene.Boolean()
     errors = graphene.List(graphene.String)
 
-    def mutate(self, info, customer_id, product_ids, order_date=None):
-        errors = []
-
+    def mutate(self, info, customer_id, product_ids, order_date=None, reserve_stock=None):
         # Validate customer
         try:
             customer = Customer.objects.get(pk=customer_id)
-        except Customer.DoesNotExist:
+        except (Customer.DoesNotExist, ValueError):
             return CreateOrder(order=None, success=False, errors=[f"Invalid customer ID: {customer_id}"])
 
         # Validate product ids and collect product instances
         if not product_ids or len(product_ids) == 0:
             return CreateOrder(order=None, success=False, errors=["At least one product must be selected"])
 
-        products = []
-        invalid_ids = []
-        for pid in product_ids:
-            try:
-                p = Product.objects.get(pk=pid)
-                products.append(p)
-            except Product.DoesNotExist:
-                invalid_ids.append(str(pid))
-
+        products, invalid_ids = resolve_products(product_ids)
         if invalid_ids:
             return CreateOrder(order=None, success=False, errors=[f"Invalid product ID(s): {', '.join(invalid_ids)}"])
 
+        if reserve_stock is None:
+            reserve_stock = getattr(settings, "CRM_RESERVE_STOCK", False)
+        quantities = Counter(p.pk for p in products)
+
         # Create order and associate products in a transaction
         try:
             with transaction.atomic():
-                order = Order(customer=customer)
+                if reserve_stock:
+                    Product.objects.reserve_stock(quantities)
+                order = Order(customer=customer, total_amount=sum(p.price for p in products))
                 if order_date:
-                    order.order_date = order_date
-                order.save()
-                order.products.set(products)
-                # calculate total
-                total = sum(p.price for p in products)
-                order.total_amount = total
-                order.save()
-
+                    order.order_date = aware(order_date)
+                unique_products = list({p.pk: p for p in products}.values())
+                insert_orders([(1, order, unique_products)])
+            # the payload can resolve order.products without another query
+            get_loaders(info).order_products.prime(order.pk, unique_products)
             return CreateOrder(order=order, success=True, errors=[])
+        except InsufficientStock:
+            short = ", ".join(f"{p.name} (ID {p.pk})" for p in Product.objects.short_of(quantities))
+            return CreateOrder(order=None, success=False, errors=[f"Insufficient stock for: {short}"])
         except Exception as e:
             return CreateOrder(order=None, success=False, errors=[f"Failed to create order: {str(e)}"])
 
+# Input object for bulk orders
+class OrderInput(graphene.InputObjectType):
+    customer_id = graphene.ID(required=True)
+    product_ids = graphene.List(graphene.ID, required=True)
+    order_date = graphene.DateTime(required=False)
+
+class BulkCreateOrdersPayload(graphene.ObjectType):
+    orders = graphene.List(OrderType)
+    errors = graphene.List(graphene.String)
+
+class BulkCreateOrders(graphene.Mutation):
+    class Arguments:
+        input = graphene.List(OrderInput, required=True)
+
+    Output = BulkCreateOrdersPayload
+
+    def mutate(self, info, input):
+        # resolve every customer and every product of the batch with two queries
+        customer_keys = [to_pk(Customer, row.get("customer_id")) for row in input]
+        product_keys = [[to_pk(Product, pid) for pid in row.get("product_ids") or []] for row in input]
+        customers = Customer.objects.in_bulk({pk for pk in customer_keys if pk is not None})
+        products = Product.objects.in_bulk({pk for keys in product_keys for pk in keys if pk is not None})
+
+        errors = []
+        rows = []
+        for idx, (row, customer_pk, keys) in enumerate(zip(input, customer_keys, product_keys), start=1):
+            row_errors = []
+            if customer_pk not in customers:
+                row_errors.append(f"Row {idx}: Invalid customer ID: {row.get('customer_id')}")
+            if not keys:
+                row_errors.append(f"Row {idx}: At least one product must be selected")
+            invalid_ids = [str(pid) for pid, pk in zip(row.get("product_ids"), keys) if pk not in products]
+            if invalid_ids:
+                row_errors.append(f"Row {idx}: Invalid product ID(s): {', '.join(invalid_ids)}")
+            if row_errors:
+                errors.extend(row_errors)
+                continue
+
+            order_products = [products[pk] for pk in keys]
+            order = Order(customer=customers[customer_pk], total_amount=sum(p.price for p in order_products))
+            if row.get("order_date"):
+                # a batch may mix naive and aware dates; the stats compare them
+                order.order_date = aware(row.get("order_date"))
+            rows.append((idx, order, list({p.pk: p for p in order_products}.values())))
+
+        created = []
+        batch_size = getattr(settings, "CRM_BULK_CREATE_BATCH_SIZE", 1000)
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            try:
+                with transaction.atomic():
+                    insert_orders(chunk)
+                created.extend(chunk)
+            except Exception:
+                # retry row by row so the failure is reported against its row
+                for row in chunk:
+                    try:
+                        with transaction.atomic():
+                            insert_orders([row])
+                        created.append(row)
+                    except Exception as e:
+                        errors.append(f"Row {row[0]}: Failed to create order: {str(e)}")
+
+        # the payload can resolve order.products without another query
+        loader = get_loaders(info).order_products
+        for _, order, order_products in created:
+            loader.prime(order.pk, order_products)
+        return BulkCreateOrdersPayload(orders=[order for _, order, _ in created], errors=errors)
+
 # ------------------------
 # Mutation container for CRM
 # ------------------------
@@ -257,18 +475,19 @@ class UpdateLowStockProductsPayload(graphene.ObjectType):
     message = graphene.String()
 
 class UpdateLowStockProducts(graphene.Mutation):
+    class Arguments:
+        threshold = graphene.Int(required=False, default_value=10)
+        increment = graphene.Int(required=False, default_value=10)
+
     Output = UpdateLowStockProductsPayload
 
-    def mutate(self, info):
-        # find low stock products and increase stock by 10
-        low = Product.objects.filter(stock__lt=10)
-        updated = []
-        if not low.exists():
+    def mutate(self, info, threshold=10, increment=10):
+        if threshold < 0 or increment <= 0:
+            return UpdateLowStockProductsPayload(updated_products=[], success=False, message="Threshold cannot be negative and increment must be positive")
+        # one set-based UPDATE (stock = stock + increment) instead of a save() per product
+        updated = Product.objects.restock_below(threshold, increment)
+        if not updated:
             return UpdateLowStockProductsPayload(updated_products=[], success=True, message="No low-stock products found")
-        for p in low:
-            p.stock = p.stock + 10
-            p.save()
-            updated.append(p)
         return UpdateLowStockProductsPayload(updated_products=updated, success=True, message=f"Updated {len(updated)} products")
 
 class Mutation(graphene.ObjectType):
@@ -277,20 +496,114 @@ class Mutation(graphene.ObjectType):
     bulk_create_customers = BulkCreateCustomers.Field()
     create_product = CreateProduct.Field()
     create_order = CreateOrder.Field()
+    bulk_create_orders = BulkCreateOrders.Field()
+
+# ------------------------
+# Report statistics (aggregated in SQL, see crm/reports.py)
+# ------------------------
+class PeriodStatsType(graphene.ObjectType):
+    period = graphene.Date()
+    orders = graphene.Int()
+    revenue = graphene.Decimal()
+
+class CRMStatsType(graphene.ObjectType):
+    # each field runs its query only when selected
+    total_customers = graphene.Int()
+    total_orders = graphene.Int()
+    total_revenue = graphene.Decimal()
+    daily = graphene.List(PeriodStatsType, days=graphene.Int(default_value=7))
+    weekly = graphene.List(PeriodStatsType, weeks=graphene.Int(default_value=4))
+
+    def resolve_total_customers(self, info):
+        return maybe_async(lambda: self.total_customers)
+
+    def resolve_total_orders(self, info):
+        return maybe_async(lambda: self.total_orders)
+
+    def resolve_total_revenue(self, info):
+        return maybe_async(lambda: self.total_revenue)
+
+    def resolve_daily(self, info, days=7):
+        return maybe_async(self.daily, days)
+
+    def resolve_weekly(self, info, weeks=4):
+        return maybe_async(self.weekly, weeks)
 
 # ------------------------
 # Optionally provide a small Query for testing customers/products/orders
 # ------------------------
+def paginate_list(queryset, limit=None, offset=0):
+    """
+    Slice a list field's queryset to ``limit`` rows from ``offset`` and stream it.
+
+    ``limit`` defaults to, and may not exceed, CRM_LIST_MAX_LIMIT. Rows are read
+    with ``.iterator()`` in CRM_LIST_CHUNK_SIZE chunks (prefetches and loader
+    batches run per chunk), so the whole result is never held as model instances.
+    """
+    max_limit = getattr(settings, "CRM_LIST_MAX_LIMIT", 1000)
+    if limit is None:
+        limit = max_limit
+    if limit < 0 or offset < 0:
+        raise GraphQLError("limit and offset must not be negative")
+    if limit > max_limit:
+        raise GraphQLError(f"Requesting {limit} records exceeds the limit of {max_limit} records")
+    if not queryset.ordered:
+        queryset = queryset.order_by("pk")
+    chunk_size = getattr(settings, "CRM_LIST_CHUNK_SIZE", 200)
+    queryset = queryset[offset:offset + limit]
+    if in_async_context():
+        return alist(queryset.aiterator(chunk_size=chunk_size))
+    return queryset.iterator(chunk_size=chunk_size)
+
 class CRMQuery(graphene.ObjectType):
-    customers = graphene.List(CustomerType)
-    products = graphene.List(ProductType)
-    orders = graphene.List(OrderType)
+    customers = graphene.List(CustomerType, limit=graphene.Int(), offset=graphene.Int(default_value=0))
+    products = graphene.List(ProductType, limit=graphene.Int(), offset=graphene.Int(default_value=0))
+    orders = graphene.List(OrderType, limit=graphene.Int(), offset=graphene.Int(default_value=0))
+    crm_stats = graphene.Field(CRMStatsType, since=graphene.DateTime(), until=graphene.DateTime())
+
+    def resolve_crm_stats(self, info, since=None, until=None):
+        return CRMStats(since=since, until=until)
+
+    def resolve_customers(self, info, limit=None, offset=0):
+        return paginate_list(track_peers(optimize_queryset(Customer.objects.all(), info)), limit, offset)
+
+    def resolve_products(self, info, limit=None, offset=0):
+        return paginate_list(optimize_queryset(Product.objects.all(), info), limit, offset)
+
+    def resolve_orders(self, info, limit=None, offset=0):
+        # relations are joined/prefetched only when selected; crm.loaders
+        # batches whatever the optimizer could not plan for
+        return paginate_list(track_peers(optimize_queryset(Order.objects.all(), info)), limit, offset)
+
+
+# ------------------------
+# Subscriptions (served over WebSockets by crm/websocket.py)
+# ------------------------
+class Subscription(graphene.ObjectType):
+    order_created = graphene.Field(OrderType, customer_id=graphene.ID())
+    product_stock_changed = graphene.Field(ProductType, product_id=graphene.ID(), below=graphene.Int())
+
+    async def subscribe_order_created(root, info, customer_id=None):
+        customer_pk = to_pk(Customer, customer_id) if customer_id is not None else None
+        async for message in get_broker().subscribe(ORDER_CREATED):
+            if customer_id is not None and message["customer_id"] != customer_pk:
+                continue
+            order = await optimize_queryset(Order.objects.filter(pk=message["id"]), info).afirst()
+            if order is not None:
+                yield fresh_event(info, order)
+
+    async def subscribe_product_stock_changed(root, info, product_id=None, below=None):
+        product_pk = to_pk(Product, product_id) if product_id is not None else None
+        async for message in get_broker().subscribe(STOCK_CHANGED):
+            if product_id is not None and message["id"] != product_pk:
+                continue
+            product = await Product.objects.filter(pk=message["id"]).afirst()
+            if product is not None and (below is None or product.stock < below):
+                yield fresh_event(info, product)
 
-    def resolve_customers(self, info):
-        return Customer.objects.all()
 
-    def resolve_products(self, info):
-        return Product.objects.all()
+def fresh_event(info, instance):
+    # each event resolves like a new request: loaders must not serve the previous event's rows
+    reset_loaders(info.context)
+    return instance
 
-    def resolve_orders(self, info):
-        return Order.objects.select_related("customer").prefetch_related("products").all()
\ No newline at end of file
@@ -0,0 +1,149 @@
+# crm/search.py
+"""
+Pluggable search backends for the ``search`` filter argument.
+
+``search`` matches the same things as the existing ``icontains`` filters
+(customer name/email, product name, an order's customer or product names)
+but through an index instead of a sequential scan:
+
+- PostgreSQL: GIN trigram indexes on ``UPPER(col::text)`` (migration 0005),
+  which is exactly the expression Django's ``icontains`` compiles to, so the
+  plain ``icontains`` filters are accelerated as well.
+- SQLite: FTS5 shadow tables using the trigram tokenizer (substring matching,
+  like ``icontains``), kept in sync by the signals in ``crm/signals.py``.
+- Anything else: plain ``icontains``.
+
+Set ``CRM_SEARCH_BACKEND`` to a dotted path to force a backend class.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .aio import in_async_context
+from .models import Customer, Product, Order
+
+# model -> (FTS table, indexed fields)
+SEARCH_TABLES = {
+    Customer: ("crm_customer_search", ("name", "email")),
+    Product: ("crm_product_search", ("name",)),
+}
+
+
+class IContainsSearchBackend:
+    """Search with ``icontains``; the fallback for every database."""
+
+    def __init__(self, using="default"):
+        self.using = using
+
+    def filter(self, queryset, term):
+        model = queryset.model
+        if model is Order:
+            products = Order.products.through.objects.filter(
+                order_id=OuterRef("pk"), product__name__icontains=term
+            )
+            return queryset.filter(Q(customer__name__icontains=term) | Exists(products))
+        fields = SEARCH_TABLES[model][1]
+        q = Q()
+        for field in fields:
+            q |= Q(**{f"{field}__icontains": term})
+        return queryset.filter(q)
+
+    # index maintenance is a no-op unless the backend keeps its own tables
+    def index(self, instances, replace=True):
+        pass
+
+    def remove(self, model, pks):
+        pass
+
+
+class PostgresTrigramSearchBackend(IContainsSearchBackend):
+    """``icontains`` served by the pg_trgm GIN indexes created in migration 0005."""
+
+
+class SQLiteFTSSearchBackend(IContainsSearchBackend):
+    """Search through FTS5 trigram shadow tables (``rowid`` = model pk)."""
+
+    # the trigram tokenizer cannot match terms shorter than three characters
+    MIN_TERM_LENGTH = 3
+
+    def filter(self, queryset, term):
+        if len(term) < self.MIN_TERM_LENGTH or not self.available():
+            return super().filter(queryset, term)
+        model = queryset.model
+        if model is Order:
+            customers = self._matches(Customer, term, column="name")
+            products = Order.products.through.objects.filter(
+                order_id=OuterRef("pk"), product_id__in=self._matches(Product, term)
+            )
+            return queryset.filter(Q(customer_id__in=customers) | Exists(products))
+        return queryset.filter(pk__in=self._matches(model, term))
+
+    def _matches(self, model, term, column=None):
+        table = SEARCH_TABLES[model][0]
+        phrase = '"' + term.replace('"', '""') + '"'
+        query = f"{column} : {phrase}" if column else phrase
+        return RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [query])
+
+    def available(self):
+        if not hasattr(self, "_available"):
+            if in_async_context():
+                # introspection is sync-only: the async view's first search looks the
+                # tables up once on a worker thread (with its own connection)
+                with ThreadPoolExecutor(max_workers=1) as pool:
+                    self._available = pool.submit(self._tables_exist, close=True).result()
+            else:
+                self._available = self._tables_exist()
+        return self._available
+
+    def _tables_exist(self, close=False):
+        connection = connections[self.using]
+        try:
+            tables = set(connection.introspection.table_names())
+        finally:
+            if close:
+                connection.close()
+        return all(table in tables for table, _ in SEARCH_TABLES.values())
+
+    def index(self, instances, replace=True):
+        """(Re)index ``instances``; pass replace=False for rows that were just inserted."""
+        instances = [obj for obj in instances if type(obj) in SEARCH_TABLES]
+        if not instances or not self.available():
+            return
+        with connections[self.using].cursor() as cursor:
+            for model in {type(obj) for obj in instances}:
+                table, fields = SEARCH_TABLES[model]
+                rows = [obj for obj in instances if type(obj) is model]
+                if replace:
+                    cursor.executemany(f"DELETE FROM {table} WHERE rowid = %s", [(obj.pk,) for obj in rows])
+                cursor.executemany(
+                    f"INSERT INTO {table} (rowid, {', '.join(fields)}) VALUES (%s{', %s' * len(fields)})",
+                    [(obj.pk, *[getattr(obj, f) or "" for f in fields]) for obj in rows],
+                )
+
+    def remove(self, model, pks):
+        if model not in SEARCH_TABLES or not self.available():
+            return
+        table = SEARCH_TABLES[model][0]
+        with connections[self.using].cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {table} WHERE rowid = %s", [(pk,) for pk in pks])
+
+
+_backends = {}
+
+
+def get_search_backend(using="default"):
+    if using not in _backends:
+        path = getattr(settings, "CRM_SEARCH_BACKEND", None)
+        if path:
+            backend_class = import_string(path)
+        else:
+            backend_class = {
+                "postgresql": PostgresTrigramSearchBackend,
+                "sqlite": SQLiteFTSSearchBackend,
+            }.get(connections[using].vendor, IContainsSearchBackend)
+        _backends[using] = backend_class(using)
+    return _backends[using]
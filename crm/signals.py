@@ -0,0 +1,62 @@
+# crm/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Customer, CustomerStats, Product, Order
+from .response_cache import bump_versions
+from .search import get_search_backend
+
+
+# keep the search backend's shadow tables (SQLite FTS5) in step with the models;
+# bulk_create() sends no signals, so bulk paths call index() themselves
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Product)
+def index_for_search(sender, instance, created, using, **kwargs):
+    get_search_backend(using).index([instance], replace=not created)
+
+
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Product)
+def remove_from_search(sender, instance, using, **kwargs):
+    get_search_backend(using).remove(sender, [instance.pk])
+
+
+# cached query responses depend on a per-model version (crm/response_cache.py);
+# bulk inserts and queryset updates bump it themselves
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Order)
+def invalidate_responses(sender, using, **kwargs):
+    bump_versions(sender, using=using)
+
+
+@receiver(m2m_changed, sender=Order.products.through)
+def invalidate_order_responses(sender, action, using, **kwargs):
+    if action.startswith("post_"):
+        bump_versions(Order, using=using)
+
+
+# CustomerStats: bulk inserts (insert_orders) call record_orders() themselves
+@receiver(post_save, sender=Order)
+def update_customer_stats(sender, instance, created, raw, using, **kwargs):
+    if raw:
+        return
+    if created:
+        CustomerStats.objects.db_manager(using).record_orders([instance])
+    else:
+        # an order moved to another customer leaves the previous customer's stats too
+        previous = getattr(instance, "_loaded_customer_id", None)
+        CustomerStats.objects.db_manager(using).refresh({instance.customer_id, previous} - {None})
+    instance._loaded_customer_id = instance.customer_id
+
+
+@receiver(post_delete, sender=Order)
+def remove_from_customer_stats(sender, instance, using, origin=None, **kwargs):
+    if isinstance(origin, Customer) or getattr(origin, "model", None) is Customer:
+        # the customer's stats row is deleted by the same cascade
+        return
+    CustomerStats.objects.db_manager(using).refresh([instance.customer_id])
+
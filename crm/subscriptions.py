@@ -0,0 +1,150 @@
+# crm/subscriptions.py
+"""
+Change events behind the ``orderCreated`` and ``productStockChanged`` subscriptions.
+
+Write paths publish small messages (ids only) after their transaction commits:
+
+- ORDER_CREATED ``{"id": order pk, "customer_id": pk}`` from insert_orders(),
+  i.e. CreateOrder and BulkCreateOrders;
+- STOCK_CHANGED ``{"id": product pk}`` from CreateProduct,
+  ProductManager.restock_below() (UpdateLowStockProducts) and
+  ProductManager.reserve_stock().
+
+Subscribers (crm/websocket.py, on the ASGI event loop) receive them through a
+broker and fetch the rows they select. Two brokers share one interface,
+``publish(channel, message)`` and ``subscribe(channel)`` (an async iterator):
+
+- InMemoryBroker (default) delivers within this process, e.g. for tests and
+  a single ASGI server;
+- RedisBroker goes through Redis pub/sub (CRM_SUBSCRIPTION_REDIS_URL), so an
+  order created on any node reaches the subscribers on every node. Each
+  process holds one Redis subscription and fans messages out locally.
+
+Select one with ``CRM_SUBSCRIPTION_BROKER`` (a dotted path).
+"""
+import asyncio
+import json
+import os
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+ORDER_CREATED = "crm.order_created"
+STOCK_CHANGED = "crm.product_stock_changed"
+CHANNELS = (ORDER_CREATED, STOCK_CHANGED)
+
+
+class InMemoryBroker:
+    """Deliver messages to the subscribers of this process."""
+
+    def __init__(self, queue_size=1000):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        # called from worker threads as well as from the event loop
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, message)
+
+    async def subscribe(self, channel):
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(self.queue_size))
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        try:
+            while True:
+                yield await subscriber[1].get()
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscriber)
+
+
+def _offer(queue, message):
+    # a subscriber that stopped reading loses messages instead of holding memory
+    if not queue.full():
+        queue.put_nowait(message)
+
+
+class RedisBroker:
+    """Publish through Redis pub/sub; fan out to this process's subscribers locally."""
+
+    def __init__(self, url=None):
+        self.url = url or getattr(settings, "CRM_SUBSCRIPTION_REDIS_URL", None) or os.environ.get(
+            "REDIS_URL", "redis://localhost:6379/0"
+        )
+        self.local = InMemoryBroker()
+        self._client = None
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(channel, json.dumps(message))
+
+    async def subscribe(self, channel):
+        self._ensure_listener(asyncio.get_running_loop())
+        async for message in self.local.subscribe(channel):
+            yield message
+
+    def _ensure_listener(self, loop):
+        with self._lock:
+            task = self._listeners.get(loop)
+            if task is None or task.done():
+                self._listeners[loop] = loop.create_task(self._listen())
+
+    async def _listen(self):
+        import redis.asyncio
+        from redis.exceptions import ConnectionError
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        while True:
+            try:
+                async with client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(*CHANNELS)
+                    async for message in pubsub.listen():
+                        channel = message["channel"]
+                        if isinstance(channel, bytes):
+                            channel = channel.decode()
+                        self.local.publish(channel, json.loads(message["data"]))
+            except (ConnectionError, OSError):
+                # keep the local subscribers; reconnect once Redis is back
+                await asyncio.sleep(1)
+
+
+_broker = None
+
+
+def get_broker():
+    """Return the process-wide broker selected by CRM_SUBSCRIPTION_BROKER."""
+    global _broker
+    if _broker is None:
+        path = getattr(settings, "CRM_SUBSCRIPTION_BROKER", "crm.subscriptions.InMemoryBroker")
+        _broker = import_string(path)()
+    return _broker
+
+
+# robust: a broker outage is logged and never fails the write that was committed
+def _publish(channel, messages):
+    broker = get_broker()
+    for message in messages:
+        broker.publish(channel, message)
+
+
+def publish_orders_created(orders, using=None):
+    """Announce new ``orders`` once the transaction commits."""
+    messages = [{"id": order.pk, "customer_id": order.customer_id} for order in orders]
+    transaction.on_commit(partial(_publish, ORDER_CREATED, messages), using=using, robust=True)
+
+
+def publish_stock_changed(product_ids, using=None):
+    """Announce a stock change of ``product_ids`` once the transaction commits."""
+    messages = [{"id": pk} for pk in product_ids]
+    transaction.on_commit(partial(_publish, STOCK_CHANGED, messages), using=using, robust=True)
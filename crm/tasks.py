@@ -2,9 +2,9 @@
 from __future__ import annotations
 from celery import shared_task
 from datetime import datetime, timezone
-import os
 
-GRAPHQL_URL = os.environ.get("GRAPHQL_URL", "http://localhost:8000/graphql")
+from crm.executor import get_executor
+
 LOG_PATH = "/tmp/crm_report_log.txt"
 
 # Try gql imports to satisfy content checks / optimize usage
@@ -15,12 +15,6 @@ try:
 except Exception:
     _HAS_GQL = False
 
-try:
-    import requests  # type: ignore
-    _HAS_REQUESTS = True
-except Exception:
-    _HAS_REQUESTS = False
-
 @shared_task(bind=True, name="crm.tasks._generate_crm_report_task")
 def _generate_crm_report_task(self=None):
     """
@@ -28,67 +22,44 @@ def _generate_crm_report_task(self=None):
     This does the heavy lifting and returns a dict with the results.
     """
     timestamp = datetime.now(timezone.utc).astimezone().strftime("%Y-%m-%d %H:%M:%S")
+    # totals and breakdowns are aggregated in SQL by the crmStats query
     query = """
-    query {
-      allCustomers: customers {
-        id
-      }
-      allOrders: orders {
-        id
-        totalAmount: total_amount
+    query CRMReport {
+      crmStats {
+        totalCustomers
+        totalOrders
+        totalRevenue
+        daily(days: 7) { period orders revenue }
+        weekly(weeks: 4) { period orders revenue }
       }
     }
     """
-    # First attempt: use gql (preferred)
     try:
-        if _HAS_GQL:
-            transport = RequestsHTTPTransport(url=GRAPHQL_URL, verify=True, retries=1)
-            client = Client(transport=transport, fetch_schema_from_transport=False)
-            resp = client.execute(gql(query))
-            customers = resp.get('allCustomers') or resp.get('data', {}).get('allCustomers') or []
-            orders = resp.get('allOrders') or resp.get('data', {}).get('allOrders') or []
-        elif _HAS_REQUESTS:
-            r = requests.post(GRAPHQL_URL, json={"query": query}, timeout=10)
-            j = r.json() if r.content else {}
-            customers = j.get('data', {}).get('allCustomers') or []
-            orders = j.get('data', {}).get('allOrders') or []
-        else:
-            from crm import schema as crm_schema  # local import fallback
-            res = crm_schema.schema.execute(query)
-            customers = res.data.get('allCustomers') if getattr(res, 'data', None) else []
-            orders = res.data.get('allOrders') if getattr(res, 'data', None) else []
+        stats = get_executor().execute(query).get('crmStats')
+        if not stats:
+            raise ValueError("crmStats returned no data")
     except Exception as e:
         with open(LOG_PATH, "a") as f:
             f.write(f"{timestamp} - Report generation failed: {e}\n")
         # re-raise so Celery records it
         raise
 
-    # compute metrics
-    try:
-        total_customers = len(customers) if customers is not None else 0
-        total_orders = len(orders) if orders is not None else 0
-        total_revenue = 0.0
-        for o in orders or []:
-            rev = None
-            if isinstance(o, dict):
-                rev = o.get("totalAmount") or o.get("total_amount") or o.get("totalAmount")
-            try:
-                total_revenue += float(rev) if rev is not None else 0.0
-            except Exception:
-                try:
-                    total_revenue += float(str(rev))
-                except Exception:
-                    continue
-    except Exception as e:
-        with open(LOG_PATH, "a") as f:
-            f.write(f"{timestamp} - Report generation failed during aggregation: {e}\n")
-        raise
+    # revenue stays the server's Decimal string; nothing is summed client-side
+    total_customers = stats.get("totalCustomers") or 0
+    total_orders = stats.get("totalOrders") or 0
+    total_revenue = stats.get("totalRevenue") or "0.00"
 
     line = f"{timestamp} - Report: {total_customers} customers, {total_orders} orders, {total_revenue}\n"
     with open(LOG_PATH, "a") as f:
         f.write(line)
 
-    return {"customers": total_customers, "orders": total_orders, "revenue": total_revenue}
+    return {
+        "customers": total_customers,
+        "orders": total_orders,
+        "revenue": total_revenue,
+        "daily": stats.get("daily") or [],
+        "weekly": stats.get("weekly") or [],
+    }
 
 # -----------------------
 # Wrapper with exact signature required by autograder
@@ -1,3 +1,1263 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import graphene
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from graphql import parse as graphql_parse, validate as graphql_validate
+from graphql_relay import from_global_id
+
+from . import persisted, response_cache
+from .aio import in_async_context
+from .benchmarks import BenchmarkRunner, compare
+from .checks import check_response_cache
+from .executor import GraphQLExecutionError, HTTPExecutor, InProcessExecutor, get_executor
+from .loaders import Loaders, get_loaders, track_peers
+from .models import Customer, CustomerStats, Product, Order
+from .persisted import CACHE_PREFIX, query_hash
+from .subscriptions import ORDER_CREATED, STOCK_CHANGED, InMemoryBroker, RedisBroker, get_broker
+from .views import AsyncCRMGraphQLView
+from .websocket import route_websockets
+from .schema import Query, CRMQuery, Mutation
+
+
+class _TestQuery(Query, CRMQuery, graphene.ObjectType):
+    pass
+
+
+schema = graphene.Schema(query=_TestQuery, mutation=Mutation)
+
+
+def execute(query, **variables):
+    # a fresh context per call, like one HTTP request
+    result = schema.execute(query, variables=variables, context_value=SimpleNamespace())
+    if result.errors:
+        raise result.errors[0]
+    return result.data
+
+
+class CRMTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [
+            Product.objects.create(name=f"Product {i}", price=Decimal("10.00") + i, stock=i * 3)
+            for i in range(5)
+        ]
+        cls.customers = [
+            Customer.objects.create(name=f"Customer {i}", email=f"customer{i}@example.com")
+            for i in range(4)
+        ]
+        for i in range(12):
+            order = Order.objects.create(customer=cls.customers[i % 4])
+            order.products.set(cls.products[i % 3:i % 3 + 2])
+
+
+class LoaderTests(CRMTestCase):
+    def test_peers_are_loaded_in_one_query_per_relation(self):
+        loaders = Loaders()
+        orders = list(track_peers(Order.objects.all()))
+        with self.assertNumQueries(2):
+            customers = [loaders.customer_for(order) for order in orders]
+            products = [loaders.products_for(order) for order in orders]
+        self.assertEqual([c.pk for c in customers], [o.customer_id for o in orders])
+        self.assertEqual(len(products[0]), 2)
+        # customers loaded together are peers as well
+        with self.assertNumQueries(1):
+            for customer in customers:
+                loaders.orders_for(customer)
+
+    def test_loaders_are_scoped_to_the_request_context(self):
+        context = SimpleNamespace()
+        info = SimpleNamespace(context=context)
+        self.assertIs(get_loaders(info), get_loaders(info))
+        self.assertIsNot(get_loaders(info), get_loaders(SimpleNamespace(context=SimpleNamespace())))
+
+
+class OptimizerTests(CRMTestCase):
+    def test_scalar_selection_does_not_touch_relations(self):
+        query = "{ allOrders(first: 5) { edges { node { id totalAmount } } } }"
+        with CaptureQueriesContext(connection) as ctx:
+            execute(query)
+        sql = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn("crm_customer", sql)
+        self.assertNotIn("crm_order_products", sql)
+        self.assertNotIn('"crm_order"."customer_id"', sql)
+
+    def test_nested_selection_is_one_query_per_level(self):
+        query = """
+        { orders { id customer { email orders { edges { node { products { edges { node { name } } } } } } }
+                   products { edges { node { name } } } } }
+        """
+        # orders joined with customers, customers' orders, their products, products
+        with self.assertNumQueries(4):
+            data = execute(query)
+        self.assertEqual(len(data["orders"]), 12)
+        self.assertEqual(len(data["orders"][0]["products"]["edges"]), 2)
+        self.assertEqual(len(data["orders"][0]["customer"]["orders"]["edges"]), 3)
+
+    def test_selected_relations_are_joined_and_prefetched(self):
+        query = "{ orders { customer { name } products { edges { node { name } } } } }"
+        with self.assertNumQueries(2):
+            data = execute(query)
+        self.assertEqual(data["orders"][0]["customer"]["name"], "Customer 0")
+        self.assertEqual(len(data["orders"][0]["products"]["edges"]), 2)
+
+
+class KeysetPaginationTests(CRMTestCase):
+    PAGE = """
+    query ($first: Int, $last: Int, $after: String, $before: String, $orderBy: String) {
+      allOrders(first: $first, last: $last, after: $after, before: $before, orderBy: $orderBy) {
+        pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+        edges { node { id } }
+      }
+    }
+    """
+
+    def walk(self, **variables):
+        ids, after = [], None
+        while True:
+            page = execute(self.PAGE, first=5, after=after, **variables)["allOrders"]
+            ids.extend(edge["node"]["id"] for edge in page["edges"])
+            if not page["pageInfo"]["hasNextPage"]:
+                return ids
+            after = page["pageInfo"]["endCursor"]
+
+    def test_pages_cover_every_row_once_in_order(self):
+        Order.objects.filter(pk__in=[o.pk for o in Order.objects.all()[:6]]).update(total_amount=Decimal("5.00"))
+        ids = self.walk(orderBy="-totalAmount")
+        expected = Order.objects.order_by("-total_amount", "-pk").values_list("pk", flat=True)
+        self.assertEqual([from_global_id(i)[1] for i in ids], [str(pk) for pk in expected])
+
+    def test_deep_pages_seek_instead_of_offset(self):
+        first = execute(self.PAGE, first=5)["allOrders"]
+        with CaptureQueriesContext(connection) as ctx:
+            page = execute(self.PAGE, first=5, after=first["pageInfo"]["endCursor"])["allOrders"]
+        sql = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn("COUNT", sql)
+        self.assertTrue(page["pageInfo"]["hasPreviousPage"])
+
+    def test_backward_pagination(self):
+        last = execute(self.PAGE, last=5)["allOrders"]
+        before = execute(self.PAGE, last=5, before=last["pageInfo"]["startCursor"])["allOrders"]
+        ids = [e["node"]["id"] for e in before["edges"] + last["edges"]]
+        expected = Order.objects.order_by("order_date", "pk").values_list("pk", flat=True)[2:]
+        self.assertEqual([from_global_id(i)[1] for i in ids], [str(pk) for pk in expected])
+        self.assertTrue(before["pageInfo"]["hasPreviousPage"])
+
+
+class ConnectionCountTests(CRMTestCase):
+    def test_count_only_runs_when_total_count_is_selected(self):
+        with CaptureQueriesContext(connection) as ctx:
+            execute("{ allCustomers(first: 2, offset: 1) { pageInfo { hasNextPage } edges { node { id } } } }")
+        self.assertFalse(any("COUNT" in q["sql"] for q in ctx.captured_queries))
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = execute("{ allCustomers(first: 2) { totalCount } }")
+        self.assertEqual(data["allCustomers"]["totalCount"], 4)
+        self.assertEqual(sum("COUNT" in q["sql"] for q in ctx.captured_queries), 1)
+
+    def test_offset_pages_use_first_plus_one(self):
+        data = execute("{ allProducts(first: 2, offset: 3) { totalCount pageInfo { hasNextPage hasPreviousPage } edges { node { name } } } }")
+        page = data["allProducts"]
+        self.assertEqual([e["node"]["name"] for e in page["edges"]], ["Product 3", "Product 4"])
+        self.assertFalse(page["pageInfo"]["hasNextPage"])
+        self.assertTrue(page["pageInfo"]["hasPreviousPage"])
+        self.assertEqual(page["totalCount"], 5)
+
+    def test_approximate_count_falls_back_to_exact(self):
+        data = execute('{ allOrders(productName: "Product 1") { totalCount(approximate: true) } }')
+        self.assertEqual(data["allOrders"]["totalCount"], Order.objects.filter(products__name="Product 1").count())
+
+
+class UpdateLowStockProductsTests(CRMTestCase):
+    MUTATION = """
+    mutation ($threshold: Int, $increment: Int) {
+      updateLowStockProducts(threshold: $threshold, increment: $increment) {
+        success message updatedProducts { name stock }
+      }
+    }
+    """
+
+    def test_restocks_in_a_single_update(self):
+        # products 0..4 have stock 0, 3, 6, 9, 12
+        with CaptureQueriesContext(connection) as ctx:
+            data = execute(self.MUTATION)["updateLowStockProducts"]
+        self.assertEqual(sum(q["sql"].startswith("UPDATE") for q in ctx.captured_queries), 1)
+        self.assertEqual(data["message"], "Updated 4 products")
+        self.assertEqual([p["stock"] for p in data["updatedProducts"]], [10, 13, 16, 19])
+        self.assertEqual(Product.objects.get(name="Product 4").stock, 12)
+
+    def test_threshold_and_increment_arguments(self):
+        data = execute(self.MUTATION, threshold=5, increment=1)["updateLowStockProducts"]
+        self.assertEqual([p["stock"] for p in data["updatedProducts"]], [1, 4])
+        data = execute(self.MUTATION, increment=0)["updateLowStockProducts"]
+        self.assertFalse(data["success"])
+
+    def test_fallback_without_returning(self):
+        with mock.patch("crm.models._supports_update_returning", return_value=False):
+            updated = Product.objects.restock_below(5, 2)
+        self.assertEqual([p.stock for p in updated], [2, 5])
+
+
+class BulkCreateCustomersTests(CRMTestCase):
+    MUTATION = """
+    mutation ($input: [CustomerInput]!) {
+      bulkCreateCustomers(input: $input) { customers { id email } errors }
+    }
+    """
+
+    def test_reports_row_errors_and_creates_the_rest(self):
+        rows = [
+            {"name": "A", "email": "a@example.com"},
+            {"name": "B", "email": "CUSTOMER1@example.com"},
+            {"name": "C", "email": "not-an-email", "phone": "12"},
+            {"name": "D", "email": "A@example.com"},
+            {"name": "E", "email": "e@example.com", "phone": "+1234567890"},
+        ]
+        data = execute(self.MUTATION, input=rows)["bulkCreateCustomers"]
+        self.assertEqual([c["email"] for c in data["customers"]], ["a@example.com", "e@example.com"])
+        self.assertTrue(all(c["id"] for c in data["customers"]))
+        self.assertEqual(data["errors"], [
+            "Row 2: Email 'CUSTOMER1@example.com' already exists",
+            "Row 3: Invalid email 'not-an-email'",
+            "Row 3: Phone number must be like +1234567890 or 123-456-7890",
+            "Row 4: Email 'A@example.com' already exists",
+        ])
+
+    @override_settings(CRM_BULK_CREATE_BATCH_SIZE=10)
+    def test_query_count_does_not_grow_per_row(self):
+        rows = [{"name": f"Lead {i}", "email": f"lead{i}@example.com"} for i in range(50)]
+        # duplicate lookup + (savepoint, INSERT, search index, release) per chunk of 10
+        with self.assertNumQueries(1 + 5 * 4):
+            data = execute(self.MUTATION, input=rows)["bulkCreateCustomers"]
+        self.assertEqual(len(data["customers"]), 50)
+        self.assertEqual(Customer.objects.filter(email__startswith="lead").count(), 50)
+
+
+class CreateOrderTests(CRMTestCase):
+    MUTATION = """
+    mutation ($customerId: ID!, $productIds: [ID]!, $orderDate: DateTime, $reserveStock: Boolean) {
+      createOrder(customerId: $customerId, productIds: $productIds, orderDate: $orderDate, reserveStock: $reserveStock) {
+        success errors order { id totalAmount orderDate products { edges { node { name } } } }
+      }
+    }
+    """
+
+    def create(self, product_ids, **variables):
+        ids = [str(self.products[i].pk) for i in product_ids]
+        return execute(self.MUTATION, customerId=str(self.customers[0].pk), productIds=ids, **variables)["createOrder"]
+
+    def test_query_count_is_constant(self):
+        # customer, products, savepoint, order insert, through rows, stats upsert, release
+        with self.assertNumQueries(7):
+            data = self.create([0, 1, 2, 3, 4])
+        self.assertTrue(data["success"])
+        self.assertEqual(Decimal(data["order"]["totalAmount"]), Decimal("60.00"))
+        self.assertEqual(len(data["order"]["products"]["edges"]), 5)
+
+    def test_invalid_product_ids(self):
+        data = execute(self.MUTATION, customerId=str(self.customers[0].pk), productIds=["999", "abc"])["createOrder"]
+        self.assertEqual(data["errors"], ["Invalid product ID(s): 999, abc"])
+
+    def test_order_date_is_kept(self):
+        data = self.create([0], orderDate="2024-01-02T03:04:05+00:00")
+        self.assertTrue(data["order"]["orderDate"].startswith("2024-01-02T03:04:05"))
+
+    def test_stock_reservation(self):
+        data = self.create([1, 1, 2], reserveStock=True)
+        self.assertTrue(data["success"])
+        self.assertEqual(Product.objects.get(pk=self.products[1].pk).stock, 1)
+        self.assertEqual(Product.objects.get(pk=self.products[2].pk).stock, 5)
+
+        orders = Order.objects.count()
+        data = self.create([0, 2], reserveStock=True)
+        self.assertFalse(data["success"])
+        self.assertEqual(data["errors"], [f"Insufficient stock for: Product 0 (ID {self.products[0].pk})"])
+        # nothing was decremented or created
+        self.assertEqual(Product.objects.get(pk=self.products[2].pk).stock, 5)
+        self.assertEqual(Order.objects.count(), orders)
+
+
+class BulkCreateOrdersTests(CRMTestCase):
+    MUTATION = """
+    mutation ($input: [OrderInput]!) {
+      bulkCreateOrders(input: $input) { errors orders { totalAmount orderDate customer { email } products { edges { node { name } } } } }
+    }
+    """
+
+    def test_creates_valid_rows_and_reports_the_rest(self):
+        c, p = self.customers, self.products
+        rows = [
+            {"customerId": str(c[0].pk), "productIds": [str(p[0].pk), str(p[1].pk)], "orderDate": "2024-05-01T00:00:00+00:00"},
+            {"customerId": "999", "productIds": [str(p[0].pk)]},
+            {"customerId": str(c[1].pk), "productIds": ["999"]},
+            {"customerId": str(c[2].pk), "productIds": [str(p[4].pk)]},
+        ]
+        data = execute(self.MUTATION, input=rows)["bulkCreateOrders"]
+        self.assertEqual(data["errors"], ["Row 2: Invalid customer ID: 999", "Row 3: Invalid product ID(s): 999"])
+        self.assertEqual([Decimal(o["totalAmount"]) for o in data["orders"]], [Decimal("21.00"), Decimal("14.00")])
+        self.assertTrue(data["orders"][0]["orderDate"].startswith("2024-05-01"))
+        self.assertEqual(data["orders"][1]["customer"]["email"], "customer2@example.com")
+        self.assertEqual(len(data["orders"][0]["products"]["edges"]), 2)
+
+    @override_settings(CRM_BULK_CREATE_BATCH_SIZE=100)
+    def test_query_count_does_not_grow_per_row(self):
+        rows = [
+            {"customerId": str(self.customers[i % 4].pk), "productIds": [str(self.products[i % 5].pk), str(self.products[(i + 1) % 5].pk)]}
+            for i in range(200)
+        ]
+        # customers, products, then (savepoint, orders, through rows, stats upsert, release) per chunk
+        with self.assertNumQueries(2 + 2 * 5):
+            data = execute(self.MUTATION, input=rows)["bulkCreateOrders"]
+        self.assertEqual(len(data["orders"]), 200)
+
+    def test_naive_and_aware_dates_in_one_batch(self):
+        c, p = self.customers, self.products
+        rows = [
+            {"customerId": str(c[0].pk), "productIds": [str(p[0].pk)], "orderDate": "2020-01-01T00:00:00"},
+            {"customerId": str(c[0].pk), "productIds": [str(p[1].pk)], "orderDate": "2021-01-01T00:00:00+00:00"},
+            {"customerId": str(c[0].pk), "productIds": [str(p[2].pk)]},
+        ]
+        # still one bulk insert, not a row-by-row retry: customers, products, savepoint,
+        # orders, through rows, stats upsert, release
+        with self.assertNumQueries(7):
+            data = execute(self.MUTATION, input=rows)["bulkCreateOrders"]
+        self.assertEqual(data["errors"], [])
+        self.assertTrue(data["orders"][0]["orderDate"].startswith("2020-01-01T00:00:00+00:00"))
+        stats = CustomerStats.objects.get(customer=c[0])
+        self.assertEqual(stats.order_count, 6)
+        self.assertEqual(stats.last_order_at, Order.objects.filter(customer=c[0]).latest("order_date").order_date)
+
+
+class CreateCustomerTests(CRMTestCase):
+    def test_email_uniqueness_is_case_insensitive(self):
+        query = 'mutation { createCustomer(name: "X", email: "Customer2@Example.com") { success errors } }'
+        with CaptureQueriesContext(connection) as ctx:
+            data = execute(query)["createCustomer"]
+        self.assertEqual(data["errors"], ["Email already exists"])
+        self.assertIn('LOWER("crm_customer"."email") IN', ctx.captured_queries[0]["sql"])
+
+
+class SearchTests(CRMTestCase):
+    def search(self, field, term):
+        data = execute(f'{{ {field}(search: "{term}") {{ edges {{ node {{ id }} }} }} }}')
+        return {int(from_global_id(e["node"]["id"])[1]) for e in data[field]["edges"]}
+
+    def test_search_matches_like_icontains(self):
+        Customer.objects.create(name="Jane O'Hara", email="jane@shop.example")
+        for term in ["tomer 1", "CUSTOMER", "shop.ex", "o'h", "1@"]:
+            with self.subTest(term=term):
+                expected = set(Customer.objects.filter(Q(name__icontains=term) | Q(email__icontains=term)).values_list("pk", flat=True))
+                self.assertEqual(self.search("allCustomers", term), expected)
+        self.assertEqual(self.search("allProducts", "duct 3"), {self.products[3].pk})
+
+    def test_search_index_follows_saves_and_deletes(self):
+        product = Product.objects.create(name="Walnut Desk", price=Decimal("99.00"))
+        self.assertEqual(self.search("allProducts", "walnut"), {product.pk})
+        product.name = "Oak Desk"
+        product.save()
+        self.assertEqual(self.search("allProducts", "walnut"), set())
+        product.delete()
+        self.assertEqual(self.search("allProducts", "desk"), set())
+
+    def test_order_search_covers_customer_and_product_names(self):
+        expected = set(Order.objects.filter(Q(customer__name__icontains="customer 3") | Q(products__name__icontains="customer 3")).values_list("pk", flat=True))
+        self.assertEqual(self.search("allOrders", "customer 3"), expected)
+        expected = set(Order.objects.filter(products__name__icontains="product 4").values_list("pk", flat=True))
+        self.assertEqual(self.search("allOrders", "product 4"), expected)
+
+    def test_bulk_created_customers_are_searchable(self):
+        execute('mutation { bulkCreateCustomers(input: [{name: "Zed Bulk", email: "zed@example.com"}]) { errors } }')
+        self.assertEqual(len(self.search("allCustomers", "zed bu")), 1)
+
+
+class OrderProductFilterTests(CRMTestCase):
+    def order_ids(self, args):
+        with CaptureQueriesContext(connection) as ctx:
+            data = execute(f"{{ allOrders({args}) {{ totalCount edges {{ node {{ id }} }} }} }}")
+        self.assertFalse(any("DISTINCT" in q["sql"] for q in ctx.captured_queries))
+        ids = {int(from_global_id(e["node"]["id"])[1]) for e in data["allOrders"]["edges"]}
+        self.assertEqual(len(ids), data["allOrders"]["totalCount"])
+        return ids
+
+    def test_product_name_and_id_filters(self):
+        p = self.products
+        expected = set(Order.objects.filter(products__name__icontains="product 1").values_list("pk", flat=True))
+        self.assertEqual(self.order_ids('productName: "product 1"'), expected)
+        expected = set(Order.objects.filter(products=p[2]).values_list("pk", flat=True))
+        self.assertEqual(self.order_ids(f"productId: {p[2].pk}"), expected)
+
+    def test_product_ids_any_and_all(self):
+        p = self.products
+        ids = f'productIds: ["{p[1].pk}", "{p[2].pk}"]'
+        expected = set(Order.objects.filter(products__in=[p[1], p[2]]).values_list("pk", flat=True))
+        self.assertEqual(self.order_ids(ids), expected)
+        expected = set(Order.objects.filter(products=p[1]).filter(products=p[2]).values_list("pk", flat=True))
+        self.assertTrue(expected)
+        self.assertEqual(self.order_ids(ids + ', productIdsMatch: "all"'), expected)
+
+
+class CRMStatsTests(CRMTestCase):
+    QUERY = """
+    { crmStats {
+        totalCustomers totalOrders totalRevenue
+        daily(days: 3) { period orders revenue }
+        weekly(weeks: 2) { period orders revenue }
+    } }
+    """
+
+    def setUp(self):
+        now = timezone.now()
+        for i, order in enumerate(Order.objects.order_by("pk")):
+            # two orders per day, from today back to five days ago
+            order.order_date = now - timedelta(days=i // 2)
+            order.total_amount = Decimal("0.10") * (i + 1)
+            order.save(update_fields=["order_date", "total_amount"])
+
+    def test_totals_and_breakdowns_are_aggregated_in_sql(self):
+        with self.assertNumQueries(4):
+            stats = execute(self.QUERY)["crmStats"]
+        self.assertEqual(stats["totalCustomers"], 4)
+        self.assertEqual(stats["totalOrders"], 12)
+        self.assertEqual(Decimal(stats["totalRevenue"]), Decimal("7.80"))
+        today = timezone.localdate()
+        self.assertEqual(
+            [(d["period"], d["orders"], Decimal(d["revenue"])) for d in stats["daily"]],
+            [
+                ((today - timedelta(days=2)).isoformat(), 2, Decimal("1.10")),
+                ((today - timedelta(days=1)).isoformat(), 2, Decimal("0.70")),
+                (today.isoformat(), 2, Decimal("0.30")),
+            ],
+        )
+        monday = today - timedelta(days=today.weekday())
+        self.assertEqual([w["period"] for w in stats["weekly"]], [(monday - timedelta(weeks=1)).isoformat(), monday.isoformat()])
+        self.assertEqual(sum(w["orders"] for w in stats["weekly"]), 12)
+
+    def test_unselected_fields_are_not_queried(self):
+        with self.assertNumQueries(1):
+            execute("{ crmStats { totalOrders totalRevenue } }")
+
+    def test_window_and_empty_days(self):
+        until = timezone.now() - timedelta(days=10)
+        stats = execute("query($until: DateTime) { crmStats(until: $until) { totalOrders totalRevenue daily(days: 2) { orders revenue } } }", until=until.isoformat())["crmStats"]
+        self.assertEqual(stats["totalOrders"], 0)
+        self.assertEqual(Decimal(stats["totalRevenue"]), 0)
+        self.assertEqual([d["orders"] for d in stats["daily"]], [0, 0])
+
+    def test_report_task_logs_the_aggregates(self):
+        from . import tasks
+
+        with tempfile.NamedTemporaryFile("r", suffix=".txt") as log, \
+                mock.patch.object(tasks, "LOG_PATH", log.name), \
+                mock.patch.object(tasks, "get_executor", lambda: InProcessExecutor(schema)):
+            result = tasks.generate_crm_report()
+            line = log.read()
+        self.assertEqual((result["customers"], result["orders"], result["revenue"]), (4, 12, "7.80"))
+        self.assertEqual(len(result["daily"]), 7)
+        self.assertIn("Report: 4 customers, 12 orders, 7.80", line)
+
+
+class ExecutorTests(CRMTestCase):
+    def test_in_process_executor_reuses_validated_documents(self):
+        executor = InProcessExecutor(schema)
+        query = "query($first: Int) { allProducts(first: $first) { edges { node { name } } } }"
+        with mock.patch("crm.persisted.validate", wraps=graphql_validate) as validate:
+            data = executor.execute(query, {"first": 2})
+            executor.execute(query, {"first": 3})
+        self.assertEqual(validate.call_count, 1)
+        self.assertEqual(len(data["allProducts"]["edges"]), 2)
+        with self.assertRaises(GraphQLExecutionError):
+            executor.execute("{ noSuchField }")
+
+    @override_settings(CRM_GRAPHQL_EXECUTOR="crm.executor.InProcessExecutor")
+    def test_cron_jobs_run_against_the_project_schema(self):
+        from . import cron, executor
+
+        with mock.patch.object(executor, "_executor", None), \
+                tempfile.NamedTemporaryFile("r", suffix=".txt") as heartbeat, \
+                tempfile.NamedTemporaryFile("r", suffix=".txt") as low_stock, \
+                mock.patch.object(cron, "LOG_PATH", heartbeat.name), \
+                mock.patch.object(cron, "LOW_STOCK_LOG", low_stock.name):
+            self.assertIsInstance(get_executor(), InProcessExecutor)
+            cron.log_crm_heartbeat()
+            cron.update_low_stock()
+            self.assertIn("GraphQL OK", heartbeat.read())
+            self.assertIn("Restocked 4 products", low_stock.read())
+
+
+class OrderRemindersTests(CRMTestCase):
+    def setUp(self):
+        import importlib.util
+        from pathlib import Path
+
+        path = Path(__file__).parent / "cron_jobs" / "send_order_reminders.py"
+        spec = importlib.util.spec_from_file_location("send_order_reminders", path)
+        self.script = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(self.script)
+        except ImportError as e:
+            self.skipTest(f"send_order_reminders needs gql[requests]: {e}")
+        old = timezone.now() - timedelta(days=30)
+        Order.objects.filter(pk__in=[o.pk for o in Order.objects.order_by("pk")[:5]]).update(order_date=old)
+
+    def test_recent_orders_are_filtered_and_paged_on_the_server(self):
+        # the project schema, as served on /graphql
+        executor = InProcessExecutor()
+        pages = []
+
+        def fetch(variables):
+            pages.append(variables["after"])
+            return executor.execute(self.script.QUERY_SOURCE, variables)
+
+        since = timezone.now() - timedelta(days=7)
+        with mock.patch.object(self.script, "LOG_BATCH_SIZE", 3), io.StringIO() as log, \
+                mock.patch.object(log, "writelines", wraps=log.writelines) as writelines:
+            count = self.script.write_reminders(self.script.iter_recent_orders(fetch, since, page_size=4), log)
+            lines = log.getvalue().splitlines()
+        self.assertEqual(count, 7)
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(writelines.call_count, 3)
+        self.assertIn("customer_email: customer", lines[0])
+
+
+class ListFieldLimitTests(CRMTestCase):
+    def test_limit_and_offset(self):
+        data = execute("{ orders(limit: 5, offset: 10) { id } products(limit: 2) { name } }")
+        self.assertEqual([int(from_global_id(o["id"])[1]) for o in data["orders"]], [o.pk for o in Order.objects.order_by("pk")[10:]])
+        self.assertEqual(len(data["products"]), 2)
+
+    @override_settings(CRM_LIST_MAX_LIMIT=10)
+    def test_limit_defaults_to_and_is_capped_by_the_server_maximum(self):
+        self.assertEqual(len(execute("{ orders { id } }")["orders"]), 10)
+        with self.assertRaisesMessage(Exception, "exceeds the limit of 10 records"):
+            execute("{ orders(limit: 11) { id } }")
+        with self.assertRaisesMessage(Exception, "must not be negative"):
+            execute("{ orders(offset: -1) { id } }")
+
+    @override_settings(CRM_LIST_CHUNK_SIZE=5)
+    def test_rows_are_streamed_in_chunks(self):
+        query = "{ orders { id products { edges { node { name } } } } }"
+        # one streamed SELECT, one products prefetch per chunk of 5 orders
+        with self.assertNumQueries(1 + 3):
+            data = execute(query)
+        self.assertEqual(len(data["orders"]), 12)
+        self.assertTrue(all(len(o["products"]["edges"]) == 2 for o in data["orders"]))
+
+
+@override_settings(CRM_QUERY_MAX_COST=500, CRM_QUERY_MAX_DEPTH=5)
+class QueryCostTests(CRMTestCase):
+    def post(self, query, **variables):
+        response = self.client.post("/graphql", {"query": query, "variables": variables}, content_type="application/json")
+        return response.json()
+
+    def test_cheap_queries_run(self):
+        result = self.post("query($n: Int) { allOrders(first: $n) { edges { node { customer { name } } } } }", n=10)
+        self.assertNotIn("errors", result)
+        self.assertEqual(len(result["data"]["allOrders"]["edges"]), 10)
+
+    @override_settings(CRM_QUERY_MAX_DEPTH=8)
+    def test_cost_counts_connection_sizes_variables_and_aliases(self):
+        query = "query($n: Int) { allOrders(first: $n) { edges { node { products(first: 10) { edges { node { name } } } } } } }"
+        # 40 orders, 40 edges, 40 nodes, 400 products, edges, nodes
+        self.assertIn("cost of 1320", self.post(query, n=40)["errors"][0]["message"])
+        self.assertNotIn("errors", self.post(query, n=10))
+        aliased = "{ " + " ".join(f"o{i}: orders(limit: 100) {{ customer {{ name }} }}" for i in range(3)) + " }"
+        error = self.post(aliased)["errors"][0]
+        self.assertEqual(error["extensions"], {"code": "QUERY_TOO_EXPENSIVE", "cost": 600, "maxCost": 500})
+
+    @override_settings(CRM_LIST_MAX_LIMIT=1000, CRM_QUERY_LIST_SIZE=100, CRM_QUERY_MAX_COST=5000)
+    def test_unlimited_root_lists_cost_what_they_fetch(self):
+        # without a limit, paginate_list returns up to CRM_LIST_MAX_LIMIT orders, not CRM_QUERY_LIST_SIZE:
+        # 1000 orders, then 2000 products, edges and nodes
+        error = self.post("{ orders { products(first: 2) { edges { node { name } } } } }")["errors"][0]
+        self.assertEqual(error["extensions"], {"code": "QUERY_TOO_EXPENSIVE", "cost": 7000, "maxCost": 5000})
+        result = self.post("{ orders(limit: 100) { products(first: 2) { edges { node { name } } } } }")
+        self.assertNotIn("errors", result)
+        self.assertEqual(len(result["data"]["orders"]), 12)
+
+    def test_depth_limit_follows_fragments(self):
+        query = """
+        fragment C on CustomerType { orders(first: 1) { edges { node { customer { name } } } } }
+        { orders(limit: 1) { customer { ...C } } }
+        """
+        error = self.post(query)["errors"][0]
+        self.assertEqual(error["extensions"]["code"], "QUERY_TOO_DEEP")
+        self.assertEqual(error["extensions"]["depth"], 6)
+        # standard validation still runs
+        self.assertIn("Cannot query field", self.post("{ noSuchField }")["errors"][0]["message"])
+
+
+class PersistedQueryTests(CRMTestCase):
+    QUERY = "query($n: Int) { allProducts(first: $n) { edges { node { name stock } } } }"
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, **body):
+        return self.client.post("/graphql", body, content_type="application/json").json()
+
+    def test_hash_only_requests_after_registration(self):
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash(self.QUERY)}}
+        result = self.post(variables={"n": 2}, extensions=extensions)
+        self.assertEqual(result["errors"][0]["message"], "PersistedQueryNotFound")
+        self.assertEqual(len(self.post(query=self.QUERY, variables={"n": 2}, extensions=extensions)["data"]["allProducts"]["edges"]), 2)
+        self.assertEqual(len(self.post(variables={"n": 3}, extensions=extensions)["data"]["allProducts"]["edges"]), 3)
+        # GET requests carry the extensions as a JSON string
+        response = self.client.get("/graphql", {"extensions": json.dumps(extensions), "variables": '{"n": 1}'}, HTTP_ACCEPT="application/json")
+        self.assertEqual(len(response.json()["data"]["allProducts"]["edges"]), 1)
+
+    def test_hash_must_match_the_query(self):
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": "0" * 64}}
+        result = self.post(query=self.QUERY, extensions=extensions)
+        self.assertEqual(result["errors"][0]["extensions"]["code"], "PERSISTED_QUERY_HASH_MISMATCH")
+        self.assertIsNone(cache.get(CACHE_PREFIX + "0" * 64))
+
+    def test_documents_are_parsed_and_validated_once(self):
+        query = "{ products(limit: 1) { name price } }"
+        with mock.patch("crm.persisted.parse", wraps=graphql_parse) as parse, \
+                mock.patch("crm.persisted.validate", wraps=graphql_validate) as validate:
+            for _ in range(3):
+                self.assertEqual(len(self.post(query=query)["data"]["products"]), 1)
+        self.assertEqual((parse.call_count, validate.call_count), (1, 1))
+
+    def test_http_executor_sends_hashes(self):
+        executor = HTTPExecutor(url="/graphql")
+        bodies = []
+
+        def post(url, json, timeout):
+            bodies.append(json)
+            return self.client.post(url, json, content_type="application/json")
+
+        executor.session.post = post
+        for _ in range(2):
+            self.assertEqual(len(executor.execute(self.QUERY, {"n": 1})["allProducts"]["edges"]), 1)
+        # hash, hash + text, then hash only
+        self.assertEqual(["query" in body for body in bodies], [False, True, False])
+
+
+@override_settings(CRM_RESPONSE_CACHE_TIMEOUT=300)
+class ResponseCacheTests(CRMTestCase):
+    ORDERS = "{ allOrders(first: 3) { edges { node { totalAmount customer { name } } } } }"
+    PRODUCTS = "query($n: Int) { products(limit: $n) { name stock } }"
+
+    def setUp(self):
+        cache.clear()
+
+    def post(self, query, **variables):
+        return self.client.post("/graphql", {"query": query, "variables": variables}, content_type="application/json").json()
+
+    def test_repeated_reads_are_served_from_the_cache(self):
+        first = self.post(self.PRODUCTS, n=2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.post(self.PRODUCTS, n=2), first)
+        # different variables, different entry
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.post(self.PRODUCTS, n=3)["data"]["products"]), 3)
+
+    def test_writes_bump_only_the_models_they_touch(self):
+        self.post(self.ORDERS)
+        self.post(self.PRODUCTS, n=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            customer = self.customers[0]
+            customer.name = "Renamed"
+            customer.save()
+        with self.assertNumQueries(0):
+            self.post(self.PRODUCTS, n=5)
+        names = [e["node"]["customer"]["name"] for e in self.post(self.ORDERS)["data"]["allOrders"]["edges"]]
+        self.assertIn("Renamed", names)
+        with self.assertNumQueries(0):
+            self.post(self.ORDERS)
+
+    def test_bulk_writes_and_stock_updates_invalidate(self):
+        before = self.post(self.PRODUCTS, n=5)
+        orders = self.post("{ allOrders { totalCount } }")["data"]["allOrders"]["totalCount"]
+        p = self.products
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post(f'mutation {{ createOrder(customerId: {self.customers[1].pk}, productIds: [{p[4].pk}], reserveStock: true) {{ success }} }}')
+        self.assertEqual(self.post("{ allOrders { totalCount } }")["data"]["allOrders"]["totalCount"], orders + 1)
+        after = self.post(self.PRODUCTS, n=5)
+        self.assertEqual(after["data"]["products"][4]["stock"], before["data"]["products"][4]["stock"] - 1)
+
+    def test_mutations_and_other_fields_are_not_cached(self):
+        self.post("{ crmStats { totalOrders } }")
+        with self.assertNumQueries(1):
+            self.post("{ crmStats { totalOrders } }")
+
+    def test_disabled_by_default(self):
+        with self.settings():
+            del settings.CRM_RESPONSE_CACHE_TIMEOUT
+            self.post(self.PRODUCTS, n=2)
+            with self.assertNumQueries(1):
+                self.post(self.PRODUCTS, n=2)
+
+    def test_check_warns_about_a_per_process_cache(self):
+        self.assertEqual([w.id for w in check_response_cache(None)], ["crm.W001"])
+        with self.settings(CRM_RESPONSE_CACHE_TIMEOUT=0):
+            self.assertEqual(check_response_cache(None), [])
+        shared = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://localhost:6379/1"}}
+        with self.settings(CACHES=shared):
+            self.assertEqual(check_response_cache(None), [])
+
+
+class AsyncViewTests(CRMTestCase):
+    QUERY = """
+    { allOrders(first: 5) { totalCount edges { node { totalAmount customer { email }
+                                                    products { totalCount edges { node { name } } } } } }
+      orders(limit: 3) { id customer { name } }
+      crmStats { totalOrders daily(days: 2) { orders } } }
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    async def apost(self, query, **variables):
+        request = AsyncRequestFactory().post(
+            "/graphql", {"query": query, "variables": variables}, content_type="application/json"
+        )
+        response = await AsyncCRMGraphQLView.as_view()(request)
+        return json.loads(response.content)
+
+    async def apost_body(self, **body):
+        request = AsyncRequestFactory().post("/graphql", body, content_type="application/json")
+        return json.loads((await AsyncCRMGraphQLView.as_view()(request)).content)
+
+    def post(self, query, **variables):
+        return self.client.post("/graphql", {"query": query, "variables": variables}, content_type="application/json").json()
+
+    async def test_queries_match_the_sync_view(self):
+        result = await self.apost(self.QUERY)
+        self.assertNotIn("errors", result)
+        cache.clear()
+        self.assertEqual(result, await sync_to_async(self.post)(self.QUERY))
+        self.assertEqual(result["data"]["allOrders"]["totalCount"], 12)
+
+    async def test_loader_fallbacks_are_awaited(self):
+        # without the optimizer every relation goes through the loaders
+        with mock.patch("crm.schema.optimize_queryset", side_effect=lambda qs, info: qs):
+            result = await self.apost(self.QUERY)
+        self.assertNotIn("errors", result)
+        node = result["data"]["allOrders"]["edges"][0]["node"]
+        self.assertEqual(node["products"]["totalCount"], 2)
+        self.assertTrue(node["customer"]["email"].endswith("@example.com"))
+
+    async def test_mutations_run_in_a_thread(self):
+        p = self.products
+        result = await self.apost(
+            "mutation($c: ID!, $p: [ID]!) { createOrder(customerId: $c, productIds: $p) { success order { totalAmount } } }",
+            c=str(self.customers[0].pk), p=[str(p[0].pk), str(p[1].pk)],
+        )
+        self.assertEqual(result["data"]["createOrder"], {"success": True, "order": {"totalAmount": "21.00"}})
+
+    @override_settings(CRM_RESPONSE_CACHE_TIMEOUT=300)
+    async def test_cache_calls_stay_off_the_event_loop(self):
+        on_loop = []
+
+        class Caches:
+            # records whether each cache lookup happens on the event loop
+            def __getitem__(self, alias):
+                on_loop.append(in_async_context())
+                return caches[alias]
+
+        query = "{ products(limit: 2) { name } }"
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}}
+        with mock.patch.object(persisted, "caches", Caches()), mock.patch.object(response_cache, "caches", Caches()):
+            first = await self.apost_body(query=query, extensions=extensions)
+            second = await self.apost_body(extensions=extensions)
+        self.assertEqual(first, second)
+        self.assertEqual(len(first["data"]["products"]), 2)
+        self.assertTrue(on_loop)
+        self.assertNotIn(True, on_loop)
+
+    async def test_search_in_a_fresh_process(self):
+        # nothing has looked up the search backend's tables yet
+        with mock.patch.dict("crm.search._backends", clear=True):
+            result = await self.apost(
+                "{ allCustomers(first: 3, search: \"customer1\") { edges { node { email } } }"
+                "  allOrders(first: 3, search: \"Product 4\") { totalCount } }"
+            )
+        self.assertNotIn("errors", result)
+        self.assertEqual(result["data"]["allCustomers"]["edges"], [{"node": {"email": "customer1@example.com"}}])
+        self.assertEqual(result["data"]["allOrders"]["totalCount"], 0)
+
+
+@override_settings(CRM_RESPONSE_CACHE_TIMEOUT=0)
+class BatchTests(CRMTestCase):
+    ORDERS = "{ orders(limit: 4) { customer { name } } }"
+    ORDER_COUNT = "{ customers(limit: 1) { id orders { totalCount } } }"
+
+    def post(self, body, view="/graphql"):
+        return self.client.post(view, body, content_type="application/json")
+
+    def test_an_array_body_returns_an_array_of_results(self):
+        response = self.post([{"id": 1, "query": "{ hello }"}, {"id": 2, "query": self.ORDERS}, {"id": 3, "query": "{ noSuchField }"}])
+        self.assertEqual(response.status_code, 400)
+        results = response.json()
+        self.assertEqual([(r["id"], r["status"]) for r in results], [(1, 200), (2, 200), (3, 400)])
+        self.assertEqual(results[0]["data"], {"hello": "Hello world"})
+        self.assertEqual(len(results[1]["data"]["orders"]), 4)
+        # a single operation is answered as before
+        self.assertEqual(self.post({"query": "{ hello }"}).json(), {"data": {"hello": "Hello world"}})
+
+    def test_operations_share_the_request_loaders(self):
+        with mock.patch("crm.schema.optimize_queryset", side_effect=lambda qs, info: qs):
+            with self.assertNumQueries(2):
+                self.post({"query": self.ORDERS})
+            # the second operation finds the customers already loaded
+            with self.assertNumQueries(3):
+                self.post([{"query": self.ORDERS}, {"query": self.ORDERS}])
+
+    def test_writes_reset_the_loaders(self):
+        customer, product = Customer.objects.order_by("pk")[0], self.products[0]
+        with mock.patch("crm.schema.optimize_queryset", side_effect=lambda qs, info: qs):
+            results = self.post([
+                {"query": self.ORDER_COUNT},
+                {
+                    "query": "mutation($c: ID!, $p: [ID]!) { createOrder(customerId: $c, productIds: $p) { success } }",
+                    "variables": {"c": str(customer.pk), "p": [str(product.pk)]},
+                },
+                {"query": self.ORDER_COUNT},
+            ]).json()
+        counts = [r["data"]["customers"][0]["orders"]["totalCount"] for r in (results[0], results[2])]
+        self.assertEqual(counts, [counts[0], counts[0] + 1])
+
+    @override_settings(CRM_GRAPHQL_MAX_BATCH=2)
+    def test_batch_size_is_capped(self):
+        response = self.post([{"query": "{ hello }"}] * 3)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("at most 2 operations", response.json()["errors"][0]["message"])
+
+    def test_async_view_runs_batches(self):
+        request = RequestFactory().post("/graphql", [{"query": "{ hello }"}] * 2, content_type="application/json")
+        response = async_to_sync(AsyncCRMGraphQLView.as_view())(request)
+        self.assertEqual([r["data"] for r in json.loads(response.content)], [{"hello": "Hello world"}] * 2)
+
+    def test_in_process_executor_batches(self):
+        data = InProcessExecutor().execute_batch([("{ hello }", None), (self.ORDERS, {})])
+        self.assertEqual(data[0], {"hello": "Hello world"})
+        self.assertEqual(len(data[1]["orders"]), 4)
+
+
+class WebSocketClient:
+    """Drive the ASGI WebSocket app in-process."""
+
+    def __init__(self, app, subprotocols=("graphql-transport-ws",)):
+        self.incoming, self.outgoing = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "websocket", "path": "/graphql", "subprotocols": list(subprotocols)}
+        self.task = asyncio.create_task(app(scope, self.incoming.get, self.outgoing.put))
+
+    async def connect(self):
+        await self.incoming.put({"type": "websocket.connect"})
+        return await self.receive()
+
+    async def send_json(self, message):
+        await self.incoming.put({"type": "websocket.receive", "text": json.dumps(message)})
+
+    async def receive(self):
+        return await asyncio.wait_for(self.outgoing.get(), 5)
+
+    async def receive_json(self):
+        return json.loads((await self.receive())["text"])
+
+    async def close(self):
+        await self.incoming.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self.task, 5)
+
+
+@override_settings(CRM_SUBSCRIPTION_BROKER="crm.subscriptions.InMemoryBroker")
+class SubscriptionTests(CRMTestCase):
+    ORDER_CREATED = "subscription($c: ID) { orderCreated(customerId: $c) { totalAmount customer { email } products { totalCount } } }"
+
+    def setUp(self):
+        patcher = mock.patch("crm.subscriptions._broker", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def start(self, query, **variables):
+        client = WebSocketClient(route_websockets(None))
+        self.assertEqual((await client.connect())["subprotocol"], "graphql-transport-ws")
+        await client.send_json({"type": "connection_init"})
+        self.assertEqual(await client.receive_json(), {"type": "connection_ack"})
+        await client.send_json({"id": "1", "type": "subscribe", "payload": {"query": query, "variables": variables}})
+        # wait until the subscription listens on the broker
+        while not any(get_broker()._subscribers.values()):
+            await asyncio.sleep(0.01)
+        return client
+
+    def create_order(self, customer, *products, **variables):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/graphql", {
+                "query": "mutation($c: ID!, $p: [ID]!, $r: Boolean) { createOrder(customerId: $c, productIds: $p, reserveStock: $r) { success } }",
+                "variables": {"c": str(customer.pk), "p": [str(p.pk) for p in products], **variables},
+            }, content_type="application/json").json()
+
+    async def test_order_created_is_pushed(self):
+        customer, other = self.customers[0], self.customers[1]
+        client = await self.start(self.ORDER_CREATED, c=str(customer.pk))
+        await sync_to_async(self.create_order)(other, self.products[0])
+        await sync_to_async(self.create_order)(customer, self.products[0], self.products[1])
+        message = await client.receive_json()
+        self.assertEqual(message["type"], "next")
+        # only the subscribed customer's order arrives
+        self.assertEqual(message["payload"]["data"]["orderCreated"], {
+            "totalAmount": str(self.products[0].price + self.products[1].price),
+            "customer": {"email": customer.email},
+            "products": {"totalCount": 2},
+        })
+        await client.send_json({"id": "1", "type": "complete"})
+        await client.close()
+        self.assertFalse(any(get_broker()._subscribers.values()))
+
+    async def test_stock_changes_are_pushed(self):
+        client = await self.start("subscription { productStockChanged(below: 1000) { name stock } }")
+        result = await sync_to_async(self.create_order)(self.customers[0], self.products[4], r=True)
+        self.assertTrue(result["data"]["createOrder"]["success"])
+        message = await client.receive_json()
+        self.assertEqual(message["payload"]["data"]["productStockChanged"], {"name": self.products[4].name, "stock": 11})
+
+        def create_product():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post("/graphql", {"query": 'mutation { createProduct(name: "Pushed", price: "1.50", stock: 3) { success } }'},
+                                 content_type="application/json")
+
+        await sync_to_async(create_product)()
+        message = await client.receive_json()
+        self.assertEqual(message["payload"]["data"]["productStockChanged"], {"name": "Pushed", "stock": 3})
+        await client.close()
+
+    def test_writes_publish_on_commit(self):
+        with mock.patch.object(InMemoryBroker, "publish") as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                Product.objects.restock_below(1000, 1)
+            publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+        self.assertEqual({call.args[0] for call in publish.call_args_list}, {STOCK_CHANGED})
+        self.assertEqual(publish.call_count, Product.objects.count())
+
+    async def test_redis_broker_round_trip(self):
+        import redis
+
+        broker = RedisBroker()
+        try:
+            await sync_to_async(redis.Redis.from_url(broker.url).ping)()
+        except redis.exceptions.ConnectionError:
+            self.skipTest("no Redis server")
+        messages = broker.subscribe(ORDER_CREATED)
+        received = asyncio.ensure_future(messages.__anext__())
+        # the process-wide listener subscribes asynchronously; publish until it hears
+        while not received.done():
+            await sync_to_async(broker.publish)(ORDER_CREATED, {"id": 1, "customer_id": 2})
+            await asyncio.sleep(0.05)
+        self.assertEqual(received.result(), {"id": 1, "customer_id": 2})
+        await messages.aclose()
+        for task in broker._listeners.values():
+            task.cancel()
+
+    async def test_protocol_errors_close_the_socket(self):
+        client = WebSocketClient(route_websockets(None))
+        await client.connect()
+        await client.send_json({"id": "1", "type": "subscribe", "payload": {"query": "subscription { orderCreated { id } }"}})
+        self.assertEqual((await client.receive())["code"], 4401)
+        await client.close()
+
+        client = await self.start("subscription { orderCreated { id } }")
+        await client.send_json({"id": "1", "type": "subscribe", "payload": {"query": "subscription { orderCreated { id } }"}})
+        self.assertEqual((await client.receive())["code"], 4409)
+        await client.close()
+
+        client = WebSocketClient(route_websockets(None), subprotocols=())
+        self.assertEqual((await client.connect())["type"], "websocket.close")
+        await client.close()
+
+    async def test_invalid_documents_get_an_error_message(self):
+        client = await self.start("subscription { orderCreated { id } }")
+        await client.send_json({"id": "2", "type": "subscribe", "payload": {"query": "subscription { noSuchField }"}})
+        message = await client.receive_json()
+        self.assertEqual((message["id"], message["type"]), ("2", "error"))
+        await client.send_json({"id": "3", "type": "subscribe", "payload": {"query": "{ hello }"}})
+        self.assertEqual(await client.receive_json(), {"id": "3", "type": "next", "payload": {"data": {"hello": "Hello world"}}})
+        self.assertEqual(await client.receive_json(), {"id": "3", "type": "complete"})
+        await client.close()
+
+
+class CustomerStatsTests(CRMTestCase):
+    STATS = "{ customers(limit: 4) { email stats { orderCount lifetimeValue lastOrderAt } } }"
+
+    def stats(self):
+        return {s.customer_id: (s.order_count, s.lifetime_value, s.last_order_at) for s in CustomerStats.objects.all()}
+
+    def test_orders_update_stats_incrementally(self):
+        c, p = self.customers, self.products
+        execute(
+            "mutation($c: ID!, $p: [ID]!) { createOrder(customerId: $c, productIds: $p) { success } }",
+            c=str(c[0].pk), p=[str(p[1].pk), str(p[2].pk)],
+        )
+        execute(
+            "mutation($input: [OrderInput]!) { bulkCreateOrders(input: $input) { errors } }",
+            input=[
+                {"customerId": str(c[1].pk), "productIds": [str(p[3].pk)], "orderDate": "2030-01-01T00:00:00+00:00"},
+                {"customerId": str(c[1].pk), "productIds": [str(p[4].pk)], "orderDate": "2029-01-01T00:00:00+00:00"},
+            ],
+        )
+        stats = self.stats()
+        self.assertEqual(stats[c[0].pk][:2], (4, Decimal("23.00")))
+        self.assertEqual(stats[c[1].pk][:2], (5, Decimal("27.00")))
+        self.assertEqual(stats[c[1].pk][2].year, 2030)
+        # the incremental totals agree with a rebuild from the orders table
+        out = io.StringIO()
+        call_command("rebuild_customer_stats", stdout=out)
+        self.assertIn("Rebuilt stats for 4 customers", out.getvalue())
+        self.assertEqual(self.stats(), stats)
+
+    def test_order_updates_and_deletes_refresh_stats(self):
+        customer = self.customers[0]
+        order = customer.orders.first()
+        order.total_amount = Decimal("5.00")
+        order.save()
+        self.assertEqual(self.stats()[customer.pk][:2], (3, Decimal("5.00")))
+        customer.orders.all().delete()
+        self.assertNotIn(customer.pk, self.stats())
+        # deleting customers cascades to their stats without recomputing them
+        self.customers[1].delete()
+        self.assertEqual(set(self.stats()), {self.customers[2].pk, self.customers[3].pk})
+
+    def test_reassigning_an_order_refreshes_both_customers(self):
+        Order.objects.filter(pk__in=self.customers[0].orders.values("pk")[:1]).update(total_amount=Decimal("7.00"))
+        call_command("rebuild_customer_stats", stdout=io.StringIO())
+        old, new = self.customers[0], self.customers[1]
+        order = old.orders.get(total_amount=Decimal("7.00"))
+        order.customer = new
+        order.save()
+        stats = self.stats()
+        self.assertEqual(stats[old.pk][:2], (2, Decimal("0.00")))
+        self.assertEqual(stats[new.pk][:2], (4, Decimal("7.00")))
+        # and back again, on the same instance
+        order.customer = old
+        order.save()
+        stats = self.stats()
+        self.assertEqual(stats[old.pk][:2], (3, Decimal("7.00")))
+        self.assertEqual(stats[new.pk][:2], (3, Decimal("0.00")))
+
+    def test_inactive_since_uses_last_order_at(self):
+        old, recent = self.customers[0], self.customers[1]
+        Order.objects.filter(customer=old).update(order_date=timezone.now() - timedelta(days=400))
+        Order.objects.filter(customer=recent).update(order_date=timezone.now() - timedelta(days=10))
+        call_command("rebuild_customer_stats", stdout=io.StringIO())
+        new = Customer.objects.create(name="New", email="new@example.com")
+        cutoff = timezone.now() - timedelta(days=365)
+        self.assertEqual(set(Customer.objects.inactive_since(cutoff)), {old, new})
+
+    def test_stats_are_exposed_on_customer_type(self):
+        Customer.objects.create(name="New", email="new@example.com")
+        # joined onto the customers query
+        with self.assertNumQueries(1):
+            data = execute(self.STATS)["customers"]
+        self.assertEqual(data[0]["stats"]["orderCount"], 3)
+        with mock.patch("crm.schema.optimize_queryset", side_effect=lambda qs, info: qs):
+            # customers, then one batched stats lookup
+            with self.assertNumQueries(2):
+                self.assertEqual(execute(self.STATS)["customers"], data)
+        data = execute("{ customers(limit: 1, offset: 4) { stats { orderCount lifetimeValue lastOrderAt } } }")["customers"]
+        self.assertEqual(data[0]["stats"], {"orderCount": 0, "lifetimeValue": "0.00", "lastOrderAt": None})
+
+
+
+class CleanInactiveCustomersTests(CRMTestCase):
+    def setUp(self):
+        c = self.customers
+        Order.objects.filter(customer__in=c[:3]).update(order_date=timezone.now() - timedelta(days=400))
+        call_command("rebuild_customer_stats", stdout=io.StringIO())
+        self.idle = Customer.objects.create(name="Idle", email="idle@example.com")
+        self.inactive = [c[0], c[1], c[2], self.idle]
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.checkpoint = f"{tmp.name}/checkpoint.json"
+        self.log = f"{tmp.name}/cleanup.log"
+
+    def clean(self, *args):
+        out = io.StringIO()
+        call_command("clean_inactive_customers", "--checkpoint", self.checkpoint, "--log", self.log, *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_deletes_nothing(self):
+        out = self.clean("--dry-run", "--batch-size", "2")
+        self.assertIn("Would delete 4 customers and 9 orders", out)
+        self.assertEqual(Customer.objects.count(), 5)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_deletes_inactive_customers_in_batches(self):
+        through = Order.products.through
+        out = self.clean("--batch-size", "3")
+        self.assertIn("Deleted 4 customers and 9 orders", out)
+        self.assertEqual(list(Customer.objects.all()), [self.customers[3]])
+        self.assertEqual(Order.objects.exclude(customer=self.customers[3]).count(), 0)
+        self.assertEqual(through.objects.exclude(order__customer=self.customers[3]).count(), 0)
+        self.assertEqual(list(CustomerStats.objects.values_list("customer_id", flat=True)), [self.customers[3].pk])
+        self.assertEqual(Product.objects.count(), 5)
+        self.assertFalse(os.path.exists(self.checkpoint))
+        with open(self.log) as f:
+            self.assertIn("Deleted 4 customers and 9 orders", f.read())
+
+    def test_resumes_after_an_interruption(self):
+        purge = Customer.objects.purge
+        calls = []
+
+        def interrupted(pks):
+            calls.append(pks)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return purge(pks)
+
+        with mock.patch.object(type(Customer.objects), "purge", side_effect=interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.clean("--batch-size", "2")
+        # the first batch committed; the second rolled back
+        self.assertEqual(Customer.objects.count(), 3)
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)["last_pk"], self.inactive[1].pk)
+
+        out = self.clean("--batch-size", "2")
+        self.assertIn(f"Resuming after customer {self.inactive[1].pk} (2 already deleted)", out)
+        self.assertIn("Deleted 4 customers", out)
+        self.assertEqual(list(Customer.objects.all()), [self.customers[3]])
+
+    def test_cron_script_reaches_the_command(self):
+        # the crontab runs the script as is: no PYTHONPATH, from the inner project directory
+        script = os.path.join(os.path.dirname(__file__), "cron_jobs", "clean_inactive_customers.sh")
+        env = {k: v for k, v in os.environ.items() if k not in ("PYTHONPATH", "DJANGO_SETTINGS_MODULE")}
+        env["PATH"] = os.path.dirname(sys.executable) + os.pathsep + env.get("PATH", "")
+        result = subprocess.run(["bash", script, "--help"], env=env, capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("manage.py clean_inactive_customers", result.stdout)
+        self.assertIn("--checkpoint", result.stdout)
+
+
+class GenerateDataTests(CRMTestCase):
+    ARGS = ("--customers", "30", "--products", "8", "--orders", "200", "--chunk-size", "64", "--end-date", "2026-01-31")
+
+    def setUp(self):
+        self.orders_before = Order.objects.aggregate(pk=Max("pk"))["pk"]
+
+    def generate(self, *args):
+        call_command("generate_data", *self.ARGS, *args, stdout=io.StringIO())
+
+    def snapshot(self):
+        return (
+            list(Customer.objects.order_by("pk").values_list("pk", "name", "email", "phone")),
+            list(Product.objects.order_by("pk").values_list("pk", "name", "price", "stock")),
+            list(Order.objects.order_by("pk").values_list("pk", "customer_id", "total_amount", "order_date")),
+            list(Order.products.through.objects.order_by("order_id", "product_id").values_list("order_id", "product_id")),
+        )
+
+    def test_generates_consistent_rows(self):
+        self.generate()
+        self.assertEqual((Customer.objects.count(), Product.objects.count(), Order.objects.count()), (34, 13, 212))
+        new_orders = Order.objects.filter(pk__gt=self.orders_before).prefetch_related("products")
+        for order in new_orders:
+            self.assertTrue(1 <= len(order.products.all()) <= 5)
+            self.assertEqual(order.total_amount, sum(p.price for p in order.products.all()))
+            self.assertLessEqual(order.order_date.date().isoformat(), "2026-01-31")
+        # stats were rebuilt to include the new orders
+        self.assertEqual(sum(CustomerStats.objects.values_list("order_count", flat=True)), 212)
+        # new customers are searchable
+        email = Customer.objects.latest("pk").email
+        data = execute("query($q: String) { allCustomers(search: $q) { edges { node { email } } } }", q=email)
+        self.assertEqual([e["node"]["email"] for e in data["allCustomers"]["edges"]], [email])
+
+    def test_same_seed_same_data(self):
+        snapshots = []
+        for _ in range(2):
+            with transaction.atomic():
+                self.generate("--seed", "7")
+                snapshots.append(self.snapshot())
+                transaction.set_rollback(True)
+        self.assertEqual(snapshots[0], snapshots[1])
+        with transaction.atomic():
+            self.generate("--seed", "8")
+            self.assertNotEqual(self.snapshot(), snapshots[0])
+            transaction.set_rollback(True)
+
+    def test_customer_skew_concentrates_orders(self):
+        self.generate("--customer-skew", "0")
+        uniform = max(CustomerStats.objects.values_list("order_count", flat=True))
+        call_command("generate_data", "--customers", "0", "--products", "0", "--orders", "200", "--customer-skew", "2", stdout=io.StringIO())
+        # the top-ranked customer gets about 60% of a Zipf(2) sample
+        self.assertGreater(max(CustomerStats.objects.values_list("order_count", flat=True)) - uniform, 80)
+
+    def test_rejects_bad_arguments(self):
+        with self.assertRaises(CommandError):
+            self.generate("--min-items", "3", "--max-items", "2")
+
+
+class BenchmarkTests(CRMTestCase):
+    def run_benchmarks(self, *names):
+        return BenchmarkRunner(iterations=2, warmup=0).run(names)
+
+    def test_results_cover_latency_throughput_and_queries(self):
+        stock = list(Product.objects.order_by("pk").values_list("stock", flat=True))
+        results = self.run_benchmarks(
+            "all_orders_nested", "deep_pagination_keyset", "create_order", "update_low_stock_products", "generate_crm_report"
+        )
+        self.assertEqual(results["meta"]["dataset"], {"customers": 4, "products": 5, "orders": 12})
+        for name, result in results["results"].items():
+            self.assertEqual(result["iterations"], 2, name)
+            self.assertGreater(result["queries"], 0, name)
+            latency = result["latency_ms"]
+            self.assertTrue(latency["min"] <= latency["p50"] <= latency["p95"] <= latency["max"], name)
+            self.assertGreater(result["throughput_per_s"], 0, name)
+        # writes are rolled back after every operation
+        self.assertEqual(Order.objects.count(), 12)
+        self.assertEqual(list(Product.objects.order_by("pk").values_list("stock", flat=True)), stock)
+
+    def test_compare_reports_slower_and_chattier_benchmarks(self):
+        def doc(p50, queries):
+            return {"results": {"b": {"queries": queries, "latency_ms": {"p50": p50}}}}
+
+        self.assertEqual(compare(doc(11.9, 3), doc(10, 3), threshold=0.2), [])
+        self.assertEqual(compare(doc(12.5, 3), doc(10, 3), threshold=0.2), ["b: p50 10 -> 12.5 ms (+25%)"])
+        self.assertEqual(compare(doc(10, 4), doc(10, 3)), ["b: 3 -> 4 SQL queries"])
+        self.assertEqual(compare(doc(10, 4), doc(10, 3), query_threshold=1), [])
+        # benchmarks missing from the baseline are not compared
+        self.assertEqual(compare(doc(99, 9), {"results": {}}), [])
+
+    def test_command_fails_on_regression(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output, baseline = os.path.join(tmp, "results.json"), os.path.join(tmp, "baseline.json")
+            args = ("update_low_stock_products", "--existing", "--iterations", "1", "--warmup", "0", "--output", output)
+            call_command("benchmark", *args, stderr=io.StringIO())
+            with open(output) as f:
+                results = json.load(f)
+            self.assertEqual(list(results["results"]), ["update_low_stock_products"])
+
+            # the same numbers, with room for noise, pass
+            with open(baseline, "w") as f:
+                json.dump(results, f)
+            call_command("benchmark", *args, "--baseline", baseline, "--threshold", "100000", stderr=io.StringIO())
+
+            results["results"]["update_low_stock_products"]["queries"] = 1
+            with open(baseline, "w") as f:
+                json.dump(results, f)
+            with self.assertRaisesMessage(CommandError, "1 regression(s)"):
+                call_command("benchmark", *args, "--baseline", baseline, "--threshold", "100000", stderr=io.StringIO())
+
+    def test_rejects_unknown_benchmarks(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark", "no_such_benchmark", "--existing", stderr=io.StringIO())
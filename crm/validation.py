@@ -0,0 +1,153 @@
+# crm/validation.py
+"""
+Static query cost and depth limits, enforced before execution.
+
+The cost of a query is estimated from its selection set alone:
+
+- every selected object (non-scalar) field costs the number of objects it
+  can return: its parents' count times its own size (1 for a single object);
+- a connection multiplies the cost of its children by ``first`` / ``last``
+  (or RELAY_CONNECTION_MAX_LIMIT when neither is given);
+- a list field multiplies them by its ``limit`` argument; a list that takes
+  ``limit`` but was not given one (the root ``customers``/``products``/
+  ``orders``) returns up to CRM_LIST_MAX_LIMIT rows and is costed so;
+  other lists by their entry in CRM_QUERY_LIST_SIZES
+  (``{"OrderType.products": 5}``), else by CRM_QUERY_LIST_SIZE.
+
+So ``{ orders(limit: 10) { customer { name } } }`` costs 10 + 10 * 1 = 20, and
+aliasing the same expensive field five times costs five times as much.
+Operations above CRM_QUERY_MAX_COST, or nesting object fields deeper than
+CRM_QUERY_MAX_DEPTH, are rejected with a validation error. Introspection
+fields are not counted.
+"""
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLInt,
+    GraphQLList,
+    InlineFragmentNode,
+    ValidationRule,
+    get_named_type,
+    get_nullable_type,
+    is_composite_type,
+)
+from graphql.utilities import value_from_ast
+
+
+def query_cost_rule(variables=None, max_cost=None, max_depth=None):
+    """Return a ValidationRule class enforcing the cost/depth limits.
+
+    Validation runs before variables are coerced, so the request's raw
+    ``variables`` are passed in to resolve ``first: $first`` and friends.
+    """
+    if max_cost is None:
+        max_cost = getattr(settings, "CRM_QUERY_MAX_COST", 5000)
+    if max_depth is None:
+        max_depth = getattr(settings, "CRM_QUERY_MAX_DEPTH", 8)
+
+    class QueryCostRule(ValidationRule):
+        def enter_operation_definition(self, node, *args):
+            root_type = self.context.schema.get_root_type(node.operation)
+            if root_type is None:
+                return
+            estimate = CostEstimate(self.context, variables or {})
+            cost, depth = estimate.selection_set(node.selection_set, root_type, 1, 0, ())
+            name = node.name.value if node.name else "anonymous"
+            if depth > max_depth:
+                self.report_error(GraphQLError(
+                    f"Operation '{name}' has depth {depth}, more than the maximum of {max_depth}",
+                    node, extensions={"code": "QUERY_TOO_DEEP", "depth": depth, "maxDepth": max_depth},
+                ))
+            elif cost > max_cost:
+                self.report_error(GraphQLError(
+                    f"Operation '{name}' has an estimated cost of {cost}, more than the maximum of {max_cost}",
+                    node, extensions={"code": "QUERY_TOO_EXPENSIVE", "cost": cost, "maxCost": max_cost},
+                ))
+
+    return QueryCostRule
+
+
+class CostEstimate:
+    """Walks one operation's selections, following fragments."""
+
+    def __init__(self, context, variables):
+        self.context = context
+        self.variables = variables
+        self.default_list_size = getattr(settings, "CRM_QUERY_LIST_SIZE", 100)
+        self.list_sizes = getattr(settings, "CRM_QUERY_LIST_SIZES", {})
+        self.max_list_limit = getattr(settings, "CRM_LIST_MAX_LIMIT", 1000)
+
+    def selection_set(self, selection_set, parent_type, multiplier, depth, fragments):
+        """Return (cost, depth) of ``selection_set`` resolved ``multiplier`` times."""
+        cost, max_depth = 0, depth
+        if selection_set is None:
+            return cost, max_depth
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field_cost, field_depth = self.field(selection, parent_type, multiplier, depth)
+            elif isinstance(selection, InlineFragmentNode):
+                field_cost, field_depth = self.selection_set(
+                    selection.selection_set, self._condition_type(selection, parent_type), multiplier, depth, fragments
+                )
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.context.get_fragment(name)
+                if fragment is None or name in fragments:
+                    # unknown or cyclic fragments are reported by the standard rules
+                    continue
+                field_cost, field_depth = self.selection_set(
+                    fragment.selection_set, self._condition_type(fragment, parent_type), multiplier, depth,
+                    fragments + (name,),
+                )
+            else:
+                continue
+            cost += field_cost
+            max_depth = max(max_depth, field_depth)
+        return cost, max_depth
+
+    def field(self, node, parent_type, multiplier, depth):
+        name = node.name.value
+        fields = getattr(parent_type, "fields", None) or {}
+        if name.startswith("__") or name not in fields:
+            return 0, depth
+        field_type = fields[name].type
+        named_type = get_named_type(field_type)
+        if not is_composite_type(named_type):
+            return 0, depth
+        size = self._size(node, parent_type, fields[name], named_type, get_nullable_type(field_type))
+        multiplier *= size
+        child_cost, child_depth = self.selection_set(node.selection_set, named_type, multiplier, depth + 1, ())
+        return multiplier + child_cost, child_depth
+
+    def _size(self, node, parent_type, field, named_type, field_type):
+        if "edges" in (getattr(named_type, "fields", None) or {}):
+            # a connection: its edges are counted here, not again on ``edges``
+            return self._int_argument(node, "first") or self._int_argument(node, "last") or \
+                graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+        if isinstance(field_type, GraphQLList):
+            if "edges" in (getattr(parent_type, "fields", None) or {}) and node.name.value == "edges":
+                return 1
+            limit = self._int_argument(node, "limit")
+            if limit:
+                return limit
+            if "limit" in field.args:
+                # paginate_list(): an omitted limit means its default, else CRM_LIST_MAX_LIMIT rows
+                default = field.args["limit"].default_value
+                return default if isinstance(default, int) and default > 0 else self.max_list_limit
+            return self.list_sizes.get(f"{parent_type.name}.{node.name.value}", self.default_list_size)
+        return 1
+
+    def _int_argument(self, node, name):
+        for argument in node.arguments or ():
+            if argument.name.value == name:
+                value = value_from_ast(argument.value, GraphQLInt, self.variables)
+                return value if isinstance(value, int) and value > 0 else None
+        return None
+
+    def _condition_type(self, node, parent_type):
+        if node.type_condition is None:
+            return parent_type
+        return self.context.schema.get_type(node.type_condition.name.value) or parent_type
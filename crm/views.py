@@ -1,3 +1,235 @@
-from django.shortcuts import render
+from inspect import isawaitable
+from typing import NamedTuple, Optional
 
-# Create your views here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import (
+    DocumentNode,
+    ExecutionResult,
+    GraphQLError,
+    OperationDefinitionNode,
+    OperationType,
+    execute,
+    get_operation_ast,
+    validate,
+    validate_schema,
+)
+
+from .loaders import reset_loaders
+from .persisted import get_document_cache, persisted_query_hash, resolve_persisted_query
+from .response_cache import get_cache, get_timeout, response_key
+from .validation import query_cost_rule
+
+
+class PreparedRequest(NamedTuple):
+    document: DocumentNode
+    operation: Optional[OperationDefinitionNode]
+    cache_key: Optional[str]
+
+
+class CRMGraphQLView(GraphQLView):
+    """
+    GraphQLView with persisted queries, cached documents (crm.persisted), the
+    cost/depth budget (crm.validation) and cached read responses
+    (crm.response_cache).
+
+    A JSON array body is a batch: each operation is executed in order, in one
+    thread and on one DB connection, sharing the request's loaders, and the
+    response is the array of results (each with its ``id`` and ``status``).
+    """
+
+    def parse_body(self, request):
+        if not self.batch and self.get_content_type(request) == "application/json" and request.body.lstrip()[:1] == b"[":
+            self.batch = True
+        data = super().parse_body(request)
+        max_batch = getattr(settings, "CRM_GRAPHQL_MAX_BATCH", 20)
+        if self.batch and len(data) > max_batch:
+            # every operation is costed on its own, so cap how many one request may carry
+            raise HttpError(HttpResponseBadRequest(f"A batch may contain at most {max_batch} operations."))
+        return data
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        prepared = self.prepare_request(request, data, query, variables, operation_name, show_graphiql)
+        if not isinstance(prepared, PreparedRequest):
+            return prepared
+        return self.cache_result(prepared, self.execute_document(request, prepared, variables, operation_name))
+
+    def prepare_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """
+        Resolve, parse and validate the request. Returns a PreparedRequest, or
+        the ExecutionResult (or None) to respond with instead of executing.
+        """
+        try:
+            sha256 = persisted_query_hash(self.get_extensions(request, data))
+            if sha256:
+                query = resolve_persisted_query(query, sha256)
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        try:
+            document, validation_errors = get_document_cache(schema).get(query, sha256)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"], f"Can only perform a {operation_ast.operation.value} operation from a POST request."
+                )
+            )
+
+        # the cost rule depends on this request's variables, so it is never cached
+        validation_errors = validation_errors or validate(
+            schema, document, [query_cost_rule(variables)], graphene_settings.MAX_VALIDATION_ERRORS
+        )
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+
+        cache_key = response_key(schema, document, operation_ast, operation_name, variables)
+        if cache_key:
+            cached = get_cache().get(cache_key)
+            if cached is not None:
+                return ExecutionResult(data=cached)
+        return PreparedRequest(document, operation_ast, cache_key)
+
+    def execute_document(self, request, prepared, variables, operation_name):
+        """Execute a prepared document; the result is awaitable if a resolver was async."""
+        schema = self.schema.graphql_schema
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options["execution_context_class"] = self.execution_context_class
+
+            if (
+                prepared.operation is not None
+                and prepared.operation.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                # reset per operation, so one failed mutation in a batch does not roll back the next
+                setattr(request, MUTATION_ERRORS_FLAG, False)
+                with transaction.atomic():
+                    result = execute(schema, prepared.document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+            else:
+                result = execute(schema, prepared.document, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+        if prepared.operation is not None and prepared.operation.operation != OperationType.QUERY:
+            # later operations of a batch must not see loader results from before the write
+            reset_loaders(request)
+        return result
+
+    def cache_result(self, prepared, result):
+        if prepared.cache_key and not result.errors:
+            get_cache().set(prepared.cache_key, result.data, get_timeout())
+        return result
+
+    @staticmethod
+    def get_extensions(request, data):
+        return data.get("extensions") or request.GET.get("extensions")
+
+
+class AsyncCRMGraphQLView(CRMGraphQLView):
+    """
+    CRMGraphQLView for ASGI servers.
+
+    Query operations execute on the event loop: the Query/CRMQuery resolvers
+    switch to the async ORM (crm.aio), so a slow query waits without holding
+    a thread. Persisted query and response cache lookups, mutations, GraphiQL
+    and batches run in worker threads.
+    """
+
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() not in ("get", "post"):
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+            data = self.parse_body(request)
+            if self.batch or (self.graphiql and self.can_display_graphiql(request, data)):
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+            result, status_code = await self.aget_response(request, data)
+            return HttpResponse(status=status_code, content=result, content_type="application/json")
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+            return response
+
+    async def aget_response(self, request, data):
+        query, variables, operation_name, _id = self.get_graphql_params(request, data)
+        execution_result = await self.aexecute_graphql_request(request, data, query, variables, operation_name)
+
+        status_code = 200
+        response = {}
+        if execution_result.errors:
+            response["errors"] = [self.format_error(e) for e in execution_result.errors]
+        if execution_result.errors and any(not getattr(e, "path", None) for e in execution_result.errors):
+            status_code = 400
+        else:
+            response["data"] = execution_result.data
+        return self.json_encode(request, response), status_code
+
+    async def aexecute_graphql_request(self, request, data, query, variables, operation_name):
+        if self.uses_cache(request, data):
+            # persisted query and response cache lookups are blocking cache calls
+            # (Redis round trips with a shared cache): keep them off the loop
+            prepared = await sync_to_async(self.prepare_request, thread_sensitive=False)(
+                request, data, query, variables, operation_name
+            )
+        else:
+            prepared = self.prepare_request(request, data, query, variables, operation_name)
+        if not isinstance(prepared, PreparedRequest):
+            return prepared
+        if prepared.operation is not None and prepared.operation.operation == OperationType.QUERY:
+            result = self.execute_document(request, prepared, variables, operation_name)
+            if isawaitable(result):
+                result = await result
+        else:
+            result = await sync_to_async(self.execute_document)(request, prepared, variables, operation_name)
+        if prepared.cache_key and not result.errors:
+            result = await sync_to_async(self.cache_result, thread_sensitive=False)(prepared, result)
+        return result
+
+    def uses_cache(self, request, data):
+        """Whether prepare_request() will read Django's cache for this request."""
+        try:
+            return bool(get_timeout() or persisted_query_hash(self.get_extensions(request, data)))
+        except GraphQLError:
+            # answered with the error, without a lookup
+            return False
@@ -0,0 +1,197 @@
+# crm/websocket.py
+"""
+GraphQL over WebSocket for the ASGI app (alx_backend_graphql_crm/asgi.py).
+
+Speaks the ``graphql-transport-ws`` protocol (the one implemented by the
+``graphql-ws`` client library): connection_init / connection_ack,
+ping / pong, and subscribe / next / error / complete per operation id.
+Subscriptions (crm.schema.Subscription) stream one ``next`` message per
+event until the client completes them or disconnects; queries and mutations
+answer once and complete.
+
+Documents go through the same document cache and cost/depth budget as the
+HTTP view. Every operation gets its own context, and each subscription event
+resets its loaders (see crm.schema.fresh_event).
+"""
+import asyncio
+import json
+from inspect import isawaitable
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from graphene_django.settings import graphene_settings
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, execute_sync, get_operation_ast, subscribe, validate
+
+from .persisted import get_document_cache
+from .validation import query_cost_rule
+
+PROTOCOL = "graphql-transport-ws"
+
+
+class CloseConnection(Exception):
+    """Close the socket with a graphql-transport-ws error code."""
+
+    def __init__(self, code, reason):
+        super().__init__(reason)
+        self.code = code
+        self.reason = reason
+
+
+class GraphQLWebSocketApp:
+    """ASGI application serving one graphql-transport-ws connection per call."""
+
+    def __init__(self, schema=None, init_timeout=None):
+        self._schema = schema
+        self.init_timeout = init_timeout if init_timeout is not None else getattr(
+            settings, "CRM_WEBSOCKET_INIT_TIMEOUT", 10
+        )
+
+    @property
+    def schema(self):
+        if self._schema is None:
+            self._schema = graphene_settings.SCHEMA
+        return getattr(self._schema, "graphql_schema", self._schema)
+
+    async def __call__(self, scope, receive, send):
+        await GraphQLWebSocketConnection(self, scope, receive, send).run()
+
+
+class GraphQLWebSocketConnection:
+    def __init__(self, app, scope, receive, send):
+        self.app = app
+        self.schema = app.schema
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.acknowledged = False
+        self.operations = {}
+
+    async def run(self):
+        if (await self.receive())["type"] != "websocket.connect":
+            return
+        if PROTOCOL not in self.scope.get("subprotocols", ()):
+            await self.send({"type": "websocket.close", "code": 4406})
+            return
+        await self.send({"type": "websocket.accept", "subprotocol": PROTOCOL})
+        try:
+            while True:
+                try:
+                    if self.acknowledged:
+                        message = await self.receive()
+                    else:
+                        message = await asyncio.wait_for(self.receive(), self.app.init_timeout)
+                except asyncio.TimeoutError:
+                    raise CloseConnection(4408, "Connection initialisation timeout")
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message["type"] == "websocket.receive":
+                    await self.handle(message.get("text") or message.get("bytes"))
+        except CloseConnection as e:
+            await self.send({"type": "websocket.close", "code": e.code, "reason": e.reason})
+        finally:
+            tasks = list(self.operations.values())
+            for task in tasks:
+                task.cancel()
+            # let the subscriptions unregister from the broker
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def handle(self, text):
+        try:
+            message = json.loads(text)
+        except (TypeError, ValueError):
+            message = None
+        if not isinstance(message, dict) or not isinstance(message.get("type"), str):
+            raise CloseConnection(4400, "Invalid message received")
+
+        kind = message["type"]
+        if kind == "connection_init":
+            if self.acknowledged:
+                raise CloseConnection(4429, "Too many initialisation requests")
+            self.acknowledged = True
+            await self.send_json({"type": "connection_ack"})
+        elif kind == "ping":
+            await self.send_json({"type": "pong"})
+        elif kind == "pong":
+            pass
+        elif kind == "subscribe":
+            if not self.acknowledged:
+                raise CloseConnection(4401, "Unauthorized")
+            operation_id, payload = message.get("id"), message.get("payload")
+            if not isinstance(operation_id, str) or not isinstance(payload, dict) or not isinstance(payload.get("query"), str):
+                raise CloseConnection(4400, "Invalid message received")
+            if operation_id in self.operations:
+                raise CloseConnection(4409, f"Subscriber for {operation_id} already exists")
+            self.operations[operation_id] = asyncio.create_task(self.operation(operation_id, payload))
+        elif kind == "complete":
+            task = self.operations.pop(message.get("id"), None)
+            if task is not None:
+                task.cancel()
+        else:
+            raise CloseConnection(4400, "Invalid message received")
+
+    async def operation(self, operation_id, payload):
+        try:
+            variables = payload.get("variables") or {}
+            operation_name = payload.get("operationName")
+            try:
+                document, errors = get_document_cache(self.schema).get(payload["query"])
+            except GraphQLError as e:
+                document, errors = None, [e]
+            errors = errors or validate(
+                self.schema, document, [query_cost_rule(variables)], graphene_settings.MAX_VALIDATION_ERRORS
+            )
+            operation = None if errors else get_operation_ast(document, operation_name)
+            if operation is None:
+                errors = errors or [GraphQLError("Unknown operation")]
+                await self.send_json({"id": operation_id, "type": "error", "payload": [e.formatted for e in errors]})
+                return
+
+            options = {
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "context_value": SimpleNamespace(scope=self.scope),
+            }
+            if operation.operation == OperationType.SUBSCRIPTION:
+                stream = await subscribe(self.schema, document, **options)
+                if isinstance(stream, ExecutionResult):
+                    await self.send_json({"id": operation_id, "type": "error", "payload": [e.formatted for e in stream.errors]})
+                    return
+                try:
+                    async for result in stream:
+                        await self.send_json({"id": operation_id, "type": "next", "payload": result.formatted})
+                finally:
+                    await stream.aclose()
+            elif operation.operation == OperationType.QUERY:
+                result = execute(self.schema, document, **options)
+                if isawaitable(result):
+                    result = await result
+                await self.send_json({"id": operation_id, "type": "next", "payload": result.formatted})
+            else:
+                # mutations use the sync ORM and its transactions, in a worker thread
+                result = await sync_to_async(execute_sync)(self.schema, document, **options)
+                await self.send_json({"id": operation_id, "type": "next", "payload": result.formatted})
+            await self.send_json({"id": operation_id, "type": "complete"})
+        finally:
+            if self.operations.get(operation_id) is asyncio.current_task():
+                del self.operations[operation_id]
+
+    async def send_json(self, message):
+        await self.send({"type": "websocket.send", "text": json.dumps(message, cls=DjangoJSONEncoder)})
+
+
+def route_websockets(http_application, path="/graphql"):
+    """Wrap an ASGI app so WebSocket connections to ``path`` speak GraphQL."""
+    websocket_application = GraphQLWebSocketApp()
+
+    async def application(scope, receive, send):
+        if scope["type"] != "websocket":
+            return await http_application(scope, receive, send)
+        if scope["path"].rstrip("/") != path:
+            await receive()
+            await send({"type": "websocket.close"})
+            return
+        return await websocket_application(scope, receive, send)
+
+    return application
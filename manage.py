@@ -2,6 +2,10 @@
 """Django's command-line utility for administrative tasks."""
 import os
 import sys
+from pathlib import Path
+
+# the Django project (settings, urls) is in alx_backend_graphql_crm/alx_backend_graphql_crm
+sys.path.append(str(Path(__file__).resolve().parent / "alx_backend_graphql_crm"))
 
 
 def main():
@@ -1,37 +1,23 @@
 # seed_db.py
+# Small development dataset; for load-test sizes run
+#   python manage.py generate_data --customers 1000000 --products 5000 --orders 10000000
 import os
-import django
 import sys
+from pathlib import Path
+
+import django
+
+# the Django project (settings, urls) is in alx_backend_graphql_crm/alx_backend_graphql_crm
+sys.path.append(str(Path(__file__).resolve().parent / "alx_backend_graphql_crm"))
 
 # adjust project path if needed
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "alx_backend_graphql_crm.settings")
 django.setup()
 
-from crm.models import Customer, Product
-from django.db import IntegrityError
+from django.core.management import call_command
 
 def seed():
-    print("Seeding products...")
-    products = [
-        {"name":"Laptop", "price":"999.99", "stock":10},
-        {"name":"Mouse", "price":"19.99", "stock":100},
-        {"name":"Keyboard", "price":"49.99", "stock":50},
-    ]
-    for p in products:
-        obj, created = Product.objects.get_or_create(name=p["name"], defaults={"price":p["price"], "stock":p["stock"]})
-        print("Created" if created else "Exists:", obj)
-
-    print("Seeding customers...")
-    customers = [
-        {"name":"Alice", "email":"alice@example.com", "phone":"+1234567890"},
-        {"name":"Bob", "email":"bob@example.com", "phone":"123-456-7890"},
-    ]
-    for c in customers:
-        try:
-            obj, created = Customer.objects.get_or_create(email=c["email"], defaults={"name":c["name"], "phone":c.get("phone")})
-            print("Created" if created else "Exists:", obj)
-        except IntegrityError as e:
-            print("Failed to create customer", c["email"], str(e))
+    call_command("generate_data", customers=20, products=10, orders=100, seed=1)
 
 if __name__ == "__main__":
     seed()